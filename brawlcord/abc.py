@@ -1,22 +1,39 @@
+import asyncio
+import copy
 import random
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
+from math import ceil
 
 import discord
 from redbot.core import Config
 from redbot.core.commands import Context
+from redbot.core.data_manager import cog_data_path
 from redbot.core.bot import Red
 from redbot.core.utils.chat_formatting import humanize_timedelta
 from redbot.core.utils.menus import DEFAULT_CONTROLS, menu
 from redbot.core.utils.predicates import MessagePredicate
 
+from .utils.admission import AdmissionControl
 from .utils.battlelog import BattleLogEntry, PartialBattleLogEntry
 from .utils.box import Box
-from .utils.constants import default_stats, EMBED_COLOR
+from .utils.brawlers import BrawlerRegistry
+from .utils.cache import UserCache
+from .utils.constants import (
+    default_stats, EMBED_COLOR, TOKEN_BANK_INTERVAL, TOKEN_BANK_MAX, TOKEN_BANK_REFILL
+)
+from .utils.core import utc_timestamp
+from .utils.dispatcher import ReactionDispatcher
 from .utils.emojis import (
     brawler_emojis, emojis, gamemode_emotes, league_emojis, rank_emojis, sp_icons
 )
 from .utils.errors import AmbiguityError
+from .utils.history import BattleHistory
+from .utils.leaderboard import LeaderboardIndex, Leaderboards
+from .utils.locks import CONFIRM_TIMEOUT, UserLocks
+from .utils.matchmaking import MatchmakingQueue
+from .utils.outbox import Outbox, RequestCount
+from .utils.sessions import SessionRegistry
 from .utils.shop import Shop
 
 reward_types = {
@@ -32,6 +49,28 @@ reward_types = {
 }
 
 
+# user data keys read or written when applying brawl rewards
+REWARD_KEYS = (
+    "bank_update_ts",
+    "brawlers",
+    "lvl",
+    "selected",
+    "startokens",
+    "starpoints",
+    "st_epoch",
+    "todays_st",
+    "token_doubler",
+    "tokens",
+    "tokens_in_bank",
+    "tppassed",
+    "tpstored",
+    "xp",
+)
+
+# user data keys of the token bank
+TOKEN_BANK_KEYS = ("tokens_in_bank", "bank_update_ts")
+
+
 class MixinMeta(ABC):
     """Mixin meta class for type hinting.
 
@@ -41,8 +80,23 @@ class MixinMeta(ABC):
     def __init__(self, *_args):
         self.bot: Red
         self.config: Config
+        self.sessions: SessionRegistry
+        self.admission: AdmissionControl
+        self.matchmaking: MatchmakingQueue
+        self.user_cache: UserCache
+        self.user_locks: UserLocks
+        self.battle_history: BattleHistory
+        self.leaderboards: Leaderboards
+        self.leaderboard_snapshot: bool
+        self.battle_log_limit: int
+        self.live_matches: bool
+        self.reaction_dispatcher: ReactionDispatcher
+        self.outbox: Outbox
+        self.match_requests: RequestCount
+        self.counted_matches: int
 
         self.BRAWLERS: dict
+        self.brawler_registry: BrawlerRegistry
         self.REWARDS: dict
         self.XP_LEVELS: dict
         self.RANKS: dict
@@ -61,14 +115,13 @@ class MixinMeta(ABC):
     ):
         """Get stats of a player."""
 
-        if not is_iter:
-            return await getattr(self.config.user(user), stat)()
+        record = await self.user_cache.get_record(user.id)
+        value = record[stat]
 
-        async with getattr(self.config.user(user), stat)() as stat:
-            if not substat:
-                return stat
-            else:
-                return stat[substat]
+        if is_iter and substat:
+            value = value[substat]
+
+        return copy.deepcopy(value)
 
     async def update_player_stat(
         self, user: discord.User, stat: str, value,
@@ -76,25 +129,24 @@ class MixinMeta(ABC):
     ):
         """Update stats of a player."""
 
+        # The record is modified in place without awaiting in between,
+        # so `add_self` updates can't interleave with other writes.
+        record = await self.user_cache.get_record(user.id)
+
         if substat:
-            async with getattr(self.config.user(user), stat)() as stat:
-                if not sub_index:
-                    if not add_self:
-                        stat[substat] = value
-                    else:
-                        stat[substat] += value
-                else:
-                    if not add_self:
-                        stat[substat][sub_index] = value
-                    else:
-                        stat[substat][sub_index] += value
-        else:
-            stat_attr = getattr(self.config.user(user), stat)
-            if not add_self:
-                old_val = 0
+            if not sub_index:
+                container, key = record[stat], substat
             else:
-                old_val = await self.get_player_stat(user, stat)
-            await stat_attr.set(value + old_val)
+                container, key = record[stat][substat], sub_index
+        else:
+            container, key = record, stat
+
+        if not add_self:
+            container[key] = value
+        else:
+            container[key] += value
+
+        self.user_cache.mark_dirty(user.id, stat)
 
     async def get_trophies(
         self, user: discord.User,
@@ -114,6 +166,54 @@ class MixinMeta(ABC):
         else:
             return brawlers[brawler_name][stat]
 
+    def apply_token_bank_refills(self, data: dict):
+        """Add the tokens refilled since the last bank update to the user's bank.
+
+        The bank gets `TOKEN_BANK_REFILL` tokens for every `TOKEN_BANK_INTERVAL`
+        passed since `bank_update_ts`, up to `TOKEN_BANK_MAX`. While the bank is
+        not full, the timestamp only advances by the intervals used, and it is
+        set to now when the bank gets full.
+
+        Like the old refill task, spending tokens from a bank which has been full
+        for a whole interval gives one refill at once. The timestamp of a full
+        bank is kept at most two intervals old so that idle intervals don't pile
+        up, which changes it at most once per interval.
+
+        `data` must contain the `tokens_in_bank` and `bank_update_ts` keys and is
+        updated in place.
+        """
+
+        tokens_in_bank = data["tokens_in_bank"]
+        bank_update_ts = data["bank_update_ts"]
+        if bank_update_ts is None:
+            return
+
+        timestamp = utc_timestamp(datetime.utcnow())
+        if tokens_in_bank >= TOKEN_BANK_MAX:
+            if timestamp - bank_update_ts >= 2 * TOKEN_BANK_INTERVAL:
+                data["bank_update_ts"] = timestamp - TOKEN_BANK_INTERVAL
+            return
+
+        intervals = int((timestamp - bank_update_ts) // TOKEN_BANK_INTERVAL)
+        if intervals <= 0:
+            return
+
+        needed = ceil((TOKEN_BANK_MAX - tokens_in_bank) / TOKEN_BANK_REFILL)
+        if intervals >= needed:
+            data["tokens_in_bank"] = TOKEN_BANK_MAX
+            data["bank_update_ts"] = timestamp
+        else:
+            data["tokens_in_bank"] = tokens_in_bank + intervals * TOKEN_BANK_REFILL
+            data["bank_update_ts"] = bank_update_ts + intervals * TOKEN_BANK_INTERVAL
+
+    async def get_token_bank(self, user: discord.User) -> int:
+        """Return the tokens in a user's bank, saving any pending refills."""
+
+        async with self.user_cache.transaction(user.id, TOKEN_BANK_KEYS) as data:
+            self.apply_token_bank_refills(data)
+
+        return data["tokens_in_bank"]
+
     async def brawl_rewards(
         self,
         user: discord.User,
@@ -121,17 +221,88 @@ class MixinMeta(ABC):
         gm: str,
         is_starplayer=False,
     ):
-        """Adjust user variables and return embeds containing reward."""
+        """Adjust user variables and return embeds containing reward.
+
+        All the rewards of the brawl (brawl rewards, personal best, rank up,
+        trophy road and level up) are applied to the user's data in a single
+        transaction.
+        """
+
+        st_epoch = await self.config.st_epoch()
+
+        async with self.user_cache.transaction(user.id, REWARD_KEYS) as data:
+            self.apply_token_bank_refills(data)
+            self.apply_st_reset(data, st_epoch)
+            brawl = self.apply_brawl_rewards(data, points, gm, is_starplayer)
+            self.apply_pb(data, brawl["brawler"])
+            rank_up = self.apply_rank_up(data, brawl["brawler"])
+            trophy_road_tier = self.apply_trophy_road(data)
+            level_up = self.apply_level_up(data)
+
+        embed = self.brawl_rewards_embed(user, brawl, is_starplayer)
+
+        rank_up_embed = False
+        if rank_up:
+            rank_up_embed = self.rank_up_embed(user, brawl["brawler"], rank_up)
+
+        trophy_road_embed = False
+        if trophy_road_tier:
+            trophy_road_embed = self.trophy_road_embed(user, trophy_road_tier)
+
+        level_up_msgs = False
+        if level_up:
+            level_up_msgs = (
+                f"Level up! You have reached level {level_up['lvl']}.",
+                f"Rewards: {level_up['tokens']} {emojis['token']}"
+            )
+
+        trophies = brawl["trophies"]
+        reward_trophies = brawl["reward_trophies"]
+
+        return (
+            (embed, trophies - reward_trophies, reward_trophies),
+            level_up_msgs,
+            rank_up_embed,
+            trophy_road_embed
+        )
+
+    def apply_token_doubler(self, data: dict, tokens: int):
+        """Apply the user's token doubler to rewarded tokens.
+
+        Returns the boosted tokens. `data` is updated in place.
+        """
+
+        token_doubler = data["token_doubler"]
+
+        upd_td = token_doubler - tokens
+        if upd_td < 0:
+            upd_td = 0
+
+        if token_doubler > tokens:
+            tokens *= 2
+        else:
+            tokens += token_doubler
+
+        data["token_doubler"] = upd_td
+
+        return tokens
+
+    def apply_brawl_rewards(
+        self, data: dict, points: int, gm: str, is_starplayer=False
+    ) -> dict:
+        """Apply brawl rewards to user data and return the rewards.
+
+        `data` is updated in place.
+        """
 
         star_token = 0
         if points > 0:
             reward_tokens = 20
             reward_xp = 8
             position = 1
-            async with self.config.user(user).todays_st() as todays_st:
-                if gm not in todays_st:
-                    star_token = 1
-                    todays_st.append(gm)
+            if gm not in data["todays_st"]:
+                star_token = 1
+                data["todays_st"].append(gm)
         elif points < 0:
             reward_tokens = 10
             reward_xp = 4
@@ -144,54 +315,48 @@ class MixinMeta(ABC):
         if is_starplayer:
             reward_xp += 10
 
-        tokens_in_bank = await self.get_player_stat(user, 'tokens_in_bank')
+        tokens_in_bank = data["tokens_in_bank"]
 
         if reward_tokens > tokens_in_bank:
             reward_tokens = tokens_in_bank
 
-        tokens_in_bank -= reward_tokens
+        data["tokens_in_bank"] = tokens_in_bank - reward_tokens
 
         # brawler trophies
-        selected_brawler = await self.get_player_stat(
-            user, 'selected', is_iter=True, substat='brawler')
-        brawler_data = await self.get_player_stat(
-            user, 'brawlers', is_iter=True, substat=selected_brawler)
-        trophies = brawler_data['trophies']
+        selected_brawler = data["selected"]["brawler"]
+        brawler_data = data["brawlers"][selected_brawler]
 
-        reward_trophies = self.trophies_to_reward_mapping(trophies, '3v3', position)
-
-        trophies += reward_trophies
-
-        token_doubler = await self.get_player_stat(user, 'token_doubler')
-
-        upd_td = token_doubler - reward_tokens
-        if upd_td < 0:
-            upd_td = 0
-
-        if token_doubler > reward_tokens:
-            reward_tokens *= 2
-        else:
-            reward_tokens += token_doubler
-
-        await self.update_player_stat(
-            user, 'tokens', reward_tokens, add_self=True)
-        await self.update_player_stat(user, 'tokens_in_bank', tokens_in_bank)
-        await self.update_player_stat(user, 'xp', reward_xp, add_self=True)
-        await self.update_player_stat(
-            user, 'brawlers', trophies,
-            substat=selected_brawler, sub_index='trophies'
+        reward_trophies = self.trophies_to_reward_mapping(
+            brawler_data["trophies"], '3v3', position
         )
-        await self.update_player_stat(user, 'token_doubler', upd_td)
-        await self.update_player_stat(
-            user, 'startokens', star_token, add_self=True
-        )
-        await self.handle_pb(user, selected_brawler)
+        brawler_data["trophies"] += reward_trophies
+
+        had_token_doubler = data["token_doubler"] > 0
+        reward_tokens = self.apply_token_doubler(data, reward_tokens)
+
+        data["tokens"] += reward_tokens
+        data["xp"] += reward_xp
+        data["startokens"] += star_token
+
+        return {
+            "brawler": selected_brawler,
+            "trophies": brawler_data["trophies"],
+            "reward_trophies": reward_trophies,
+            "tokens": reward_tokens,
+            "xp": reward_xp,
+            "star_token": star_token,
+            "token_doubler": data["token_doubler"] if had_token_doubler else None
+        }
+
+    def brawl_rewards_embed(self, user: discord.User, rewards: dict, is_starplayer=False):
+        """Return embed containing brawl rewards."""
 
         user_avatar = user.avatar_url
 
         embed = discord.Embed(color=EMBED_COLOR, title="Rewards")
         embed.set_author(name=user.name, icon_url=user_avatar)
 
+        reward_xp = rewards["xp"]
         reward_xp_str = (
             "{}".format(
                 f'{reward_xp} (Star Player)' if is_starplayer
@@ -200,29 +365,26 @@ class MixinMeta(ABC):
         )
 
         embed.add_field(name="Trophies",
-                        value=f"{emojis['trophies']} {reward_trophies}")
+                        value=f"{emojis['trophies']} {rewards['reward_trophies']}")
         embed.add_field(
-            name="Tokens", value=f"{emojis['token']} {reward_tokens}")
+            name="Tokens", value=f"{emojis['token']} {rewards['tokens']}")
         embed.add_field(name="Experience",
                         value=f"{emojis['xp']} {reward_xp_str}")
 
-        if token_doubler > 0:
+        if rewards["token_doubler"] is not None:
             embed.add_field(
                 name="Token Doubler",
-                value=f"{emojis['tokendoubler']} x{upd_td} remaining!"
+                value=f"{emojis['tokendoubler']} x{rewards['token_doubler']} remaining!"
             )
 
-        if star_token:
+        if rewards["star_token"]:
             embed.add_field(
                 name="Star Token",
                 value=f"{emojis['startoken']} 1",
                 inline=False
             )
 
-        rank_up = await self.handle_rank_ups(user, selected_brawler)
-        trophy_road_reward = await self.handle_trophy_road(user)
-
-        return (embed, trophies-reward_trophies, reward_trophies), rank_up, trophy_road_reward
+        return embed
 
     def trophies_to_reward_mapping(
         self, trophies: int, game_type="3v3", position=1
@@ -261,11 +423,15 @@ class MixinMeta(ABC):
 
         return reward
 
-    async def xp_handler(self, user: discord.User):
-        """Handle xp level ups."""
+    def apply_level_up(self, data: dict):
+        """Handle xp level ups.
 
-        xp = await self.get_player_stat(user, 'xp')
-        lvl = await self.get_player_stat(user, 'lvl')
+        Returns a dict with the new level and rewarded tokens, or `False` if
+        the user didn't level up. `data` is updated in place.
+        """
+
+        xp = data["xp"]
+        lvl = data["lvl"]
 
         next_xp = self.XP_LEVELS[str(lvl)]["Progress"]
 
@@ -274,44 +440,23 @@ class MixinMeta(ABC):
         else:
             return False
 
-        await self.update_player_stat(user, 'xp', carry)
-        await self.update_player_stat(user, 'lvl', lvl + 1)
-
-        level_up_msg = f"Level up! You have reached level {lvl+1}."
+        data["xp"] = carry
+        data["lvl"] = lvl + 1
 
         reward_tokens = self.XP_LEVELS[str(lvl)]["TokensRewardCount"]
+        reward_tokens = self.apply_token_doubler(data, reward_tokens)
 
-        tokens = await self.get_player_stat(user, 'tokens')
-
-        token_doubler = await self.get_player_stat(user, 'token_doubler')
-
-        upd_td = token_doubler - reward_tokens
-        if upd_td < 0:
-            upd_td = 0
-
-        if token_doubler > reward_tokens:
-            reward_tokens *= 2
-        else:
-            reward_tokens += token_doubler
-
-        reward_msg = f"Rewards: {reward_tokens} {emojis['token']}"
-
-        tokens += reward_tokens
-        await self.update_player_stat(user, 'tokens', tokens)
-        await self.update_player_stat(user, 'token_doubler', upd_td)
+        data["tokens"] += reward_tokens
 
-        return (level_up_msg, reward_msg)
+        return {"lvl": lvl + 1, "tokens": reward_tokens}
 
-    async def handle_pb(self, user: discord.User, brawler: str):
-        """Handle personal best changes."""
+    def apply_pb(self, data: dict, brawler: str):
+        """Handle personal best changes. `data` is updated in place."""
 
-        # individual brawler
-        trophies = await self.get_trophies(user=user, brawler_name=brawler)
-        pb = await self.get_trophies(user=user, pb=True, brawler_name=brawler)
+        brawler_data = data["brawlers"][brawler]
 
-        if trophies > pb:
-            await self.update_player_stat(
-                user, 'brawlers', trophies, substat=brawler, sub_index='pb')
+        if brawler_data["trophies"] > brawler_data["pb"]:
+            brawler_data["pb"] = brawler_data["trophies"]
 
     def get_rank(self, pb):
         """Return rank of the Brawler based on its personal best."""
@@ -325,14 +470,14 @@ class MixinMeta(ABC):
         else:
             return 35
 
-    async def handle_rank_ups(self, user: discord.User, brawler: str):
-        """Function to handle Brawler rank ups.
+    def apply_rank_up(self, data: dict, brawler: str):
+        """Handle Brawler rank ups.
 
-        Returns an embed containing rewards if a brawler rank ups.
+        Returns a dict containing rewards if the brawler ranks up and `False`
+        otherwise. `data` is updated in place.
         """
 
-        brawler_data = await self.get_player_stat(
-            user, 'brawlers', is_iter=True, substat=brawler)
+        brawler_data = data["brawlers"][brawler]
 
         pb = brawler_data['pb']
         rank = brawler_data['rank']
@@ -342,86 +487,93 @@ class MixinMeta(ABC):
         if rank_as_per_pb <= rank:
             return False
 
-        await self.update_player_stat(
-            user, 'brawlers', rank_as_per_pb, brawler, 'rank')
+        brawler_data["rank"] = rank_as_per_pb
 
         rank_up_tokens = self.RANKS[str(rank)]["PrimaryLvlUpRewardCount"]
 
-        token_doubler = await self.get_player_stat(user, 'token_doubler')
+        had_token_doubler = data["token_doubler"] > 0
+        rank_up_tokens = self.apply_token_doubler(data, rank_up_tokens)
 
-        upd_td = token_doubler - rank_up_tokens
-        if upd_td < 0:
-            upd_td = 0
+        rank_up_starpoints = self.RANKS[str(rank)]["SecondaryLvlUpRewardCount"]
 
-        if token_doubler > rank_up_tokens:
-            rank_up_tokens *= 2
-        else:
-            rank_up_tokens += token_doubler
+        data["tokens"] += rank_up_tokens
+        data["starpoints"] += rank_up_starpoints
 
-        rank_up_starpoints = self.RANKS[str(rank)]["SecondaryLvlUpRewardCount"]
+        return {
+            "old_rank": rank,
+            "new_rank": rank_as_per_pb,
+            "tokens": rank_up_tokens,
+            "starpoints": rank_up_starpoints,
+            "token_doubler": data["token_doubler"] if had_token_doubler else None
+        }
 
-        await self.update_player_stat(
-            user, 'tokens', rank_up_tokens, add_self=True)
-        await self.update_player_stat(
-            user, 'starpoints', rank_up_starpoints, add_self=True)
-        await self.update_player_stat(
-            user, 'token_doubler', upd_td)
+    def rank_up_embed(self, user: discord.User, brawler: str, rank_up: dict):
+        """Return embed containing rank up rewards."""
 
         embed = discord.Embed(
             color=EMBED_COLOR,
-            title=f"Brawler Rank Up! {rank} → {rank_as_per_pb}"
+            title=f"Brawler Rank Up! {rank_up['old_rank']} → {rank_up['new_rank']}"
         )
         embed.set_author(name=user.name, icon_url=user.avatar_url)
         embed.add_field(
             name="Brawler", value=f"{brawler_emojis[brawler]} {brawler}")
         embed.add_field(
-            name="Tokens", value=f"{emojis['token']} {rank_up_tokens}")
-        if rank_up_starpoints:
+            name="Tokens", value=f"{emojis['token']} {rank_up['tokens']}")
+        if rank_up["starpoints"]:
             embed.add_field(
                 name="Star Points",
-                value=f"{emojis['starpoints']} {rank_up_starpoints}"
+                value=f"{emojis['starpoints']} {rank_up['starpoints']}"
             )
-        if token_doubler > 0:
+        if rank_up["token_doubler"] is not None:
             embed.add_field(
                 name="Token Doubler",
-                value=f"{emojis['tokendoubler']} x{upd_td} remaining!",
+                value=f"{emojis['tokendoubler']} x{rank_up['token_doubler']} remaining!",
                 inline=False
             )
         return embed
 
-    async def handle_trophy_road(self, user: discord.User):
-        """Function to handle trophy road progress."""
+    def apply_trophy_road(self, data: dict):
+        """Handle trophy road progress.
 
-        trophies = await self.get_trophies(user)
-        tppased = await self.get_player_stat(user, 'tppassed')
+        Returns the reached tier or `False`. `data` is updated in place.
+        """
+
+        trophies = sum(
+            brawler_data["trophies"] for brawler_data in data["brawlers"].values()
+        )
 
         for tier in self.TROPHY_ROAD:
-            if tier in tppased:
+            if tier in data["tppassed"]:
                 continue
             threshold = self.TROPHY_ROAD[tier]['Trophies']
 
             if trophies > threshold:
-                async with self.config.user(user).tppassed() as tppassed:
-                    tppassed.append(tier)
-                async with self.config.user(user).tpstored() as tpstored:
-                    tpstored.append(tier)
-
-                reward_name, reward_emoji, reward_str = self.tp_reward_strings(
-                    self.TROPHY_ROAD[tier], tier)
-
-                desc = "Claim the reward by using the `-rewards` command!"
-                title = f"Trophy Road Reward [{threshold} trophies]"
-                embed = discord.Embed(
-                    color=EMBED_COLOR, title=title, description=desc)
-                embed.set_author(name=user.name, icon_url=user.avatar_url)
-                embed.add_field(name=reward_name,
-                                value=f"{reward_emoji} {reward_str}")
+                data["tppassed"].append(tier)
+                data["tpstored"].append(tier)
 
-                return embed
+                return tier
 
         else:
             return False
 
+    def trophy_road_embed(self, user: discord.User, tier: str):
+        """Return embed containing trophy road reward."""
+
+        threshold = self.TROPHY_ROAD[tier]['Trophies']
+
+        reward_name, reward_emoji, reward_str = self.tp_reward_strings(
+            self.TROPHY_ROAD[tier], tier)
+
+        desc = "Claim the reward by using the `-rewards` command!"
+        title = f"Trophy Road Reward [{threshold} trophies]"
+        embed = discord.Embed(
+            color=EMBED_COLOR, title=title, description=desc)
+        embed.set_author(name=user.name, icon_url=user.avatar_url)
+        embed.add_field(name=reward_name,
+                        value=f"{reward_emoji} {reward_str}")
+
+        return embed
+
     def tp_reward_strings(self, reward_data, tier):
         reward_type = reward_data["RewardType"]
         reward_name = reward_types[reward_type][0]
@@ -457,18 +609,18 @@ class MixinMeta(ABC):
                 user, 'gold', reward_count, add_self=True)
 
         elif reward_type == 3:
-            async with self.config.user(user).brawlers() as brawlers:
-                brawlers[reward_extra] = default_stats
+            async with self.user_cache.user(user).brawlers() as brawlers:
+                brawlers[reward_extra] = copy.deepcopy(default_stats)
 
         elif reward_type == 6:
-            async with self.config.user(user).boxes() as boxes:
+            async with self.user_cache.user(user).boxes() as boxes:
                 boxes['brawl'] += reward_count
 
             brawler_data = await self.get_player_stat(
                 user, 'brawlers', is_iter=True)
 
-            box = Box(self.BRAWLERS, brawler_data)
-            embed = await box.brawlbox(self.config.user(user), user)
+            box = Box(self.brawler_registry, brawler_data)
+            embed = await box.brawlbox(self.user_cache.user(user), user)
 
             try:
                 await ctx.send(embed=embed)
@@ -487,14 +639,14 @@ class MixinMeta(ABC):
                 user, 'token_doubler', reward_count, add_self=True)
 
         elif reward_type == 10:
-            async with self.config.user(user).boxes() as boxes:
+            async with self.user_cache.user(user).boxes() as boxes:
                 boxes['mega'] += reward_count
 
             brawler_data = await self.get_player_stat(
                 user, 'brawlers', is_iter=True)
 
-            box = Box(self.BRAWLERS, brawler_data)
-            embed = await box.megabox(self.config.user(user), user)
+            box = Box(self.brawler_registry, brawler_data)
+            embed = await box.megabox(self.user_cache.user(user), user)
 
             try:
                 await ctx.send(embed=embed)
@@ -506,9 +658,12 @@ class MixinMeta(ABC):
 
         elif reward_type == 12:
             await ctx.send("Enter the name of Brawler to add powerpoints to:")
-            pred = await self.bot.wait_for(
-                "message", check=MessagePredicate.same_context(ctx)
-            )
+            try:
+                pred = await self.bot.wait_for(
+                    "message", check=MessagePredicate.same_context(ctx), timeout=CONFIRM_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                return await ctx.send("Reward claim cancelled.")
 
             brawler = pred.content
             # for users who input 'el_primo'
@@ -549,7 +704,7 @@ class MixinMeta(ABC):
             await ctx.send(f"Added {reward_count} powerpoints to {brawler}.")
 
         elif reward_type == 13:
-            async with self.config.user(user).gamemodes() as gamemodes:
+            async with self.user_cache.user(user).gamemodes() as gamemodes:
                 if reward_extra == "Brawl Ball":
                     gamemodes.append(reward_extra)
 
@@ -572,14 +727,14 @@ class MixinMeta(ABC):
                     gamemodes.append("Takedown")
 
         elif reward_type == 14:
-            async with self.config.user(user).boxes() as boxes:
+            async with self.user_cache.user(user).boxes() as boxes:
                 boxes['big'] += reward_count
 
             brawler_data = await self.get_player_stat(
                 user, 'brawlers', is_iter=True)
 
-            box = Box(self.BRAWLERS, brawler_data)
-            embed = await box.bigbox(self.config.user(user), user)
+            box = Box(self.brawler_registry, brawler_data)
+            embed = await box.bigbox(self.user_cache.user(user), user)
 
             try:
                 await ctx.send(embed=embed)
@@ -589,7 +744,7 @@ class MixinMeta(ABC):
                     " Please give/ask someone to give me that permission."
                 )
 
-        async with self.config.user(user).tpstored() as tpstored:
+        async with self.user_cache.user(user).tpstored() as tpstored:
             tpstored.remove(reward_number)
 
     def get_sp_info(self, brawler_name: str, sp: str):
@@ -615,53 +770,77 @@ class MixinMeta(ABC):
 
         return brawler_name
 
+    def update_leaderboards(self, user_id: int, record: dict):
+        """Update the leaderboard indexes after a user's brawlers changed.
+
+        Registered as a `UserCache` listener. `record` is `None` if the user's
+        data was cleared.
+        """
+
+        if record is None:
+            self.leaderboards.remove_user(user_id)
+        else:
+            self.leaderboards.update_user(user_id, record["brawlers"])
+
+    async def build_leaderboards(self):
+        """Build the leaderboard indexes from a snapshot or from stored user data."""
+
+        snapshot_fp = cog_data_path(self) / "leaderboard.json"
+
+        if self.leaderboard_snapshot:
+            if self.leaderboards.load_snapshot(snapshot_fp):
+                # The snapshot is only valid until the data changes again, so
+                # remove it to rebuild from storage if the bot doesn't shut down cleanly.
+                snapshot_fp.unlink()
+                return
+
+        self.leaderboards.build(await self.user_cache.all_users())
+
+    def save_leaderboard_snapshot(self):
+        """Write the leaderboard indexes to the data path for a faster startup."""
+
+        self.leaderboards.save_snapshot(cog_data_path(self) / "leaderboard.json")
+
     async def leaderboard_handler(
         self, ctx: Context, title: str, thumb_url: str,
         padding: int, pb=False, brawler_name=None
     ):
         """Handler for all leaderboards."""
 
-        all_users = await self.config.all_users()
-        users = []
-        for user_id in all_users:
-            try:
-                user = self.bot.get_user(user_id)
-                if not user:
-                    continue
-                trophies = await self.get_trophies(
-                    user, pb=pb, brawler_name=brawler_name)
-                users.append((user, trophies))
-            except Exception:
-                pass
+        if brawler_name:
+            index = self.leaderboards.brawlers.get(brawler_name, LeaderboardIndex())
+        elif pb:
+            index = self.leaderboards.pb
+        else:
+            index = self.leaderboards.trophies
 
-        # remove duplicates
-        users = list(set(users))
-        users = sorted(users, key=lambda k: k[1], reverse=True)
+        async def entry_str(position: int, user: discord.User, trophies: int):
+            if brawler_name:
+                emoji = rank_emojis['br' + str(index.data(user.id))]
+            else:
+                _, emoji = await self.get_league_data(trophies)
+            return f"`{(position+1):02d}.` {user} {emoji}{trophies:>{padding},}"
 
         embed_desc = (
             "Check out who is at the top of the Brawlcord leaderboard!\n\u200b"
         )
         add_user = True
         # return first 10 (or fewer) members
-        for i in range(10):
+        top = []
+        for position, (user_id, trophies) in enumerate(index.iter_top()):
+            if len(top) >= 10:
+                break
+            user = self.bot.get_user(user_id)
+            if user:
+                top.append((position, user, trophies))
+
+        for position, user, trophies in top:
             try:
-                trophies = users[i][1]
-                user = users[i][0]
-                if brawler_name:
-                    emoji = await self.get_rank_emoji(user, brawler_name)
-                else:
-                    _, emoji = await self.get_league_data(trophies)
                 if user.id == ctx.author.id:
-                    embed_desc += (
-                        f"**\n`{(i+1):02d}.` {user} {emoji}"
-                        f"{trophies:>{padding},}**"
-                    )
+                    embed_desc += f"**\n{await entry_str(position, user, trophies)}**"
                     add_user = False
                 else:
-                    embed_desc += (
-                        f"\n`{(i+1):02d}.` {user} {emoji}"
-                        f"{trophies:>{padding},}"
-                    )
+                    embed_desc += f"\n{await entry_str(position, user, trophies)}"
             except Exception:
                 pass
 
@@ -671,31 +850,17 @@ class MixinMeta(ABC):
 
         # add rank of user
         if add_user:
-            for idx, user in enumerate(users):
-                if ctx.author == user[0]:
-                    val_str = ""
-                    try:
-                        trophies = users[idx][1]
-                        user = users[idx][0]
-                        if brawler_name:
-                            emoji = await self.get_rank_emoji(
-                                user, brawler_name)
-                        else:
-                            _, emoji = await self.get_league_data(trophies)
-                        val_str += (
-                            f"\n**`{(idx+1):02d}.` {user} {emoji}"
-                            f"{trophies:>{padding},}**"
-                        )
-                    except Exception:
-                        pass
-            try:
-                embed.add_field(name="Your position", value=val_str)
-            except UnboundLocalError:
-                # happens only in case of brawlers
+            position = index.rank(ctx.author.id)
+            if position is not None:
+                try:
+                    val_str = await entry_str(
+                        position, ctx.author, index.score(ctx.author.id))
+                    embed.add_field(name="Your position", value=f"\n**{val_str}**")
+                except Exception:
+                    pass
+            elif brawler_name:
                 embed.add_field(name=f"\u200bNo one owns {brawler_name}!",
                                 value="Open boxes to unlock new Brawlers.")
-            except Exception:
-                pass
 
         try:
             await ctx.send(embed=embed)
@@ -728,37 +893,29 @@ class MixinMeta(ABC):
 
         return league_number, league_emojis[league_name]
 
-    async def get_rank_emoji(self, user: discord.User, brawler: str):
-
-        data = await self.get_player_stat(
-            user, 'brawlers', is_iter=True, substat=brawler)
-        rank = self.get_rank(data['pb'])
-
-        return rank_emojis['br' + str(rank)]
-
     def _box_name(self, box: str):
         """Return box name"""
 
         return box.split("box")[0].title() + " Box"
 
-    async def create_shop(self, user: discord.User, update=True) -> Shop:
+    async def get_shop(self, user: discord.User) -> Shop:
+        """Return the user's shop for the current day, generating it if required.
 
-        brawler_data = await self.get_player_stat(
-            user, 'brawlers', is_iter=True
-        )
+        A shop is generated on first access after each daily reset, which is
+        detected by comparing the user's shop epoch with the global one.
+        """
 
-        shop = Shop(self.BRAWLERS, brawler_data)
-        shop.generate_shop_items()
-        data = shop.to_json()
+        shop_epoch = await self.config.shop_epoch()
 
-        await self.config.user(user).shop.set(data)
+        keys = ("brawlers", "shop", "shop_epoch")
+        async with self.user_cache.transaction(user.id, keys) as data:
+            if data["shop"] and data["shop_epoch"] == shop_epoch:
+                return Shop.from_json(data["shop"])
 
-        if update:
-            time_now = datetime.utcnow()
-            epoch = datetime(1970, 1, 1)
-            # get timestamp in UTC
-            timestamp = (time_now - epoch).total_seconds()
-            await self.config.shop_reset_ts.set(timestamp)
+            shop = Shop(self.BRAWLERS, data["brawlers"])
+            shop.generate_shop_items()
+            data["shop"] = shop.to_json()
+            data["shop_epoch"] = shop_epoch
 
         return shop
 
@@ -767,17 +924,13 @@ class MixinMeta(ABC):
 
         user = ctx.author
 
-        shop_data = await self.config.user(user).shop()
-        if not shop_data:
-            shop = await self.create_shop(user, update=False)
-        else:
-            shop = Shop.from_json(shop_data)
-
-        last_reset = datetime.utcfromtimestamp(
-            await self.config.shop_reset_ts()
-        )
+        shop = await self.get_shop(user)
 
-        next_reset = last_reset + timedelta(days=1)
+        last_reset = await self.config.shop_reset_ts()
+        if last_reset:
+            next_reset = datetime.utcfromtimestamp(last_reset) + timedelta(days=1)
+        else:
+            next_reset = datetime.utcnow() + timedelta(days=1)
 
         next_reset_str = humanize_timedelta(
             timedelta=next_reset - datetime.utcnow()
@@ -787,17 +940,25 @@ class MixinMeta(ABC):
 
         await menu(ctx, em, DEFAULT_CONTROLS)
 
-    async def reset_st(self, user: discord.User):
-        """Reset user star tokens list and update timestamp."""
+    def apply_st_reset(self, data: dict, st_epoch: int):
+        """Clear the user's collected star tokens if they are from an older epoch.
 
-        async with self.config.user(user).todays_st() as todays_st:
-            todays_st.clear()
+        `data` must contain the `todays_st` and `st_epoch` keys and is updated in place.
+        """
+
+        if data["st_epoch"] != st_epoch:
+            data["todays_st"] = []
+            data["st_epoch"] = st_epoch
+
+    async def get_todays_st(self, user: discord.User) -> list:
+        """Return the game modes in which the user collected today's star tokens."""
+
+        st_epoch = await self.config.st_epoch()
+
+        async with self.user_cache.transaction(user.id, ("todays_st", "st_epoch")) as data:
+            self.apply_st_reset(data, st_epoch)
 
-        time_now = datetime.utcnow()
-        epoch = datetime(1970, 1, 1)
-        # get timestamp in UTC
-        timestamp = (time_now - epoch).total_seconds()
-        await self.config.st_reset_ts.set(timestamp)
+        return data["todays_st"]
 
     async def save_battle_log(self, log_data: dict):
         """Save complete log entry."""
@@ -805,7 +966,7 @@ class MixinMeta(ABC):
         if len(log_data) == 1:
             # One user is the bot.
             user = log_data[0]["user"]
-            partial_logs = await self.config.user(user).partial_battle_log()
+            partial_logs = await self.user_cache.user(user).partial_battle_log()
             partial_log_json = partial_logs[-1]
 
             partial_log = await PartialBattleLogEntry.from_json(partial_log_json, self.bot)
@@ -818,8 +979,7 @@ class MixinMeta(ABC):
                 "reward_trophies": 0
             }
             log_entry = BattleLogEntry(partial_log, player_extras, opponent_extras).to_json()
-            async with self.config.user(user).battle_log() as battle_log:
-                battle_log.append(log_entry)
+            await self.battle_history.append(user.id, log_entry)
         else:
             for i in [0, 1]:
                 if i == 0:
@@ -828,7 +988,7 @@ class MixinMeta(ABC):
                     other = 0
 
                 user = log_data[i]["user"]
-                partial_logs = await self.config.user(user).partial_battle_log()
+                partial_logs = await self.user_cache.user(user).partial_battle_log()
                 partial_log_json = partial_logs[-1]
 
                 partial_log = await PartialBattleLogEntry.from_json(partial_log_json, self.bot)
@@ -841,8 +1001,40 @@ class MixinMeta(ABC):
                     "reward_trophies": log_data[other]["reward"]
                 }
                 log_entry = BattleLogEntry(partial_log, player_extras, opponent_extras).to_json()
-                async with self.config.user(user).battle_log() as battle_log:
-                    battle_log.append(log_entry)
+                await self.battle_history.append(user.id, log_entry)
+
+    async def compact_battle_logs(self):
+        """Trim partial battle logs of all users to the current retention limit."""
+
+        limit = self.battle_log_limit
+
+        for user_id, data in (await self.user_cache.all_users()).items():
+            if len(data.get("partial_battle_log", [])) <= limit:
+                continue
+            if user_id in self.user_cache:
+                async with self.user_cache.user_from_id(user_id).partial_battle_log() as log:
+                    del log[:len(log) - limit]
+            else:
+                await self.config.user_from_id(user_id).partial_battle_log.set(
+                    data["partial_battle_log"][-limit:]
+                )
+
+        await self.config.compacted_log_limit.set(limit)
+
+    async def migrate_battle_logs(self):
+        """Move battle logs saved in user data to the battle history store."""
+
+        for user_id, data in (await self.user_cache.all_users()).items():
+            battle_log = data.get("battle_log", [])
+            if not battle_log:
+                continue
+            await self.battle_history.append_many(user_id, battle_log)
+            if user_id in self.user_cache:
+                await self.user_cache.user_from_id(user_id).battle_log.set([])
+            else:
+                await self.config.user_from_id(user_id).battle_log.set([])
+
+        await self.config.battle_history_migrated.set(True)
 
     def parse_gamemode(self, gamemode: str):
         """Returns full game mode name from user input.
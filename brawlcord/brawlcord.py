@@ -3,9 +3,10 @@ import json
 import logging
 from abc import ABC
 
+import discord
 from redbot.core import commands, Config
 from redbot.core.bot import Red
-from redbot.core.data_manager import bundled_data_path
+from redbot.core.data_manager import bundled_data_path, cog_data_path
 from redbot.core.commands import Context
 
 from .brawlhelp import BrawlcordHelp
@@ -15,14 +16,27 @@ from .misc import MiscMixin
 from .owner import OwnerMixin
 from .stats import StatisticsMixin
 from .tasks import TasksMixin
+from .utils.admission import AdmissionControl
+from .utils.battlelog import DEFAULT_LOG_LIMIT
+from .utils.brawlers import BrawlerRegistry
+from .utils.cache import UserCache
 from .utils.constants import default_stats
+from .utils.dispatcher import ReactionDispatcher
 from .utils.errors import MaintenanceError
+from .utils.history import BattleHistory
+from .utils.leaderboard import Leaderboards
+from .utils.locks import UserLocks
+from .utils.matchmaking import MatchmakingQueue
+from .utils.outbox import Outbox, RequestCount
+from .utils.sessions import SessionRegistry
 
 __version__ = "2.3.1"
 __author__ = "Snowsee"
 
 old_info = None
 old_invite = None
+# writes the pending changes of the last unloaded instance
+unload_task = None
 
 default = {
     "report_channel": None,
@@ -33,8 +47,31 @@ default = {
     },
     "shop_reset_ts": None,  # shop reset timestamp
     "st_reset_ts": None,  # star tokens reset timestamp
+    # incremented on every daily reset, compared with the users' epoch stamps
+    "shop_epoch": 0,
+    "st_epoch": 0,
     "clubs": [],
     "club_id_length": 5,
+    # maximum number of user records kept in memory
+    "user_cache_size": 1000,
+    # seconds between writes of cached user changes to storage
+    "user_cache_flush_interval": 30,
+    # number of entries kept in each user's partial battle log
+    "battle_log_limit": DEFAULT_LOG_LIMIT,
+    # limit the partial battle logs were last trimmed to
+    "compacted_log_limit": None,
+    # whether battle logs were moved from user data to the battle history store
+    "battle_history_migrated": False,
+    # whether to save the leaderboards on unload and load them on the next startup
+    "leaderboard_snapshot": False,
+    # whether brawls edit one message per player instead of sending new messages every turn
+    "live_match_messages": False,
+    # highest number of brawls which can run at once
+    "max_brawls": 500,
+    # highest number of brawls which are played at once, others wait in a queue
+    "brawl_budget": 100,
+    # seconds a brawl can wait in the queue before it is dropped
+    "brawl_queue_deadline": 120,
     # Whether the bot has informed the bot owners about discontinuation of the Red cog or not.
     "informed_about_discontinuation": False,
 }
@@ -87,9 +124,14 @@ default_user = {
         "megabox": 0
     },
     "shop": {},
+    # shop epoch in which the shop was generated
+    "shop_epoch": None,
     # list of gamemodes where the user
     # already received daily star tokens
     "todays_st": [],
+    # star tokens epoch in which todays_st was last reset
+    "st_epoch": None,
+    # legacy, battle logs are now kept in the battle history store
     "battle_log": [],
     "partial_battle_log": [],
     "club": None,  # club identifier
@@ -122,7 +164,11 @@ class Brawlcord(
 
         self.bot = bot
 
-        self.sessions = []
+        self.sessions = SessionRegistry(default["max_brawls"])
+        self.admission = AdmissionControl(
+            default["brawl_budget"], default["brawl_queue_deadline"]
+        )
+        self.matchmaking = MatchmakingQueue()
 
         self.config = Config.get_conf(
             self, 1_070_701_001, force_registration=True)
@@ -132,7 +178,25 @@ class Brawlcord(
         self.config.register_global(**default)
         self.config.register_user(**default_user)
 
+        self.user_cache = UserCache(self.config)
+        self.user_locks = UserLocks()
+
+        self.battle_history = BattleHistory(cog_data_path(self) / "battle_history.db")
+
+        self.battle_log_limit = DEFAULT_LOG_LIMIT
+        self.live_matches = False
+        self.reaction_dispatcher = ReactionDispatcher()
+        self.outbox = Outbox()
+        # direct messages and requests of the brawls played since the cog was loaded
+        self.match_requests = RequestCount()
+        self.counted_matches = 0
+
+        self.leaderboards = Leaderboards(self.get_rank)
+        self.leaderboard_snapshot = False
+        self.user_cache.add_listener("brawlers", self.update_leaderboards)
+
         self.BRAWLERS: dict = None
+        self.brawler_registry: BrawlerRegistry = None
         self.REWARDS: dict = None
         self.XP_LEVELS: dict = None
         self.RANKS: dict = None
@@ -150,12 +214,14 @@ class Brawlcord(
                 logging.exception("Error in task", exc_info=exc)
                 print("Error in task:", exc)
 
-        self.bank_update_task = self.bot.loop.create_task(self.update_token_bank())
         self.status_task = self.bot.loop.create_task(self.update_status())
         self.shop_and_st_task = self.bot.loop.create_task(self.update_shop_and_st())
-        self.bank_update_task.add_done_callback(error_callback)
+        self.cache_flush_task = self.bot.loop.create_task(self.flush_user_cache())
+        self.dispatcher_task = self.bot.loop.create_task(self.tick_reaction_dispatcher())
         self.shop_and_st_task.add_done_callback(error_callback)
         self.status_task.add_done_callback(error_callback)
+        self.cache_flush_task.add_done_callback(error_callback)
+        self.dispatcher_task.add_done_callback(error_callback)
 
     async def initialize(self):
         brawlers_fp = bundled_data_path(self) / "brawlers.json"
@@ -169,6 +235,7 @@ class Brawlcord(
 
         with brawlers_fp.open("r") as f:
             self.BRAWLERS = json.load(f)
+        self.brawler_registry = BrawlerRegistry(self.BRAWLERS)
         with rewards_fp.open("r") as f:
             self.REWARDS = json.load(f)
         with xp_levels_fp.open("r") as f:
@@ -184,6 +251,25 @@ class Brawlcord(
         with leagues_fp.open("r") as f:
             self.LEAGUES = json.load(f)
 
+        self.user_cache.max_size = await self.config.user_cache_size()
+
+        self.leaderboard_snapshot = await self.config.leaderboard_snapshot()
+        await self.build_leaderboards()
+
+        await self.battle_history.initialize()
+        if not await self.config.battle_history_migrated():
+            self.bot.loop.create_task(self.migrate_battle_logs())
+
+        self.live_matches = await self.config.live_match_messages()
+        self.sessions.max_sessions = await self.config.max_brawls()
+        self.admission.set_budget(await self.config.brawl_budget())
+        self.admission.deadline = await self.config.brawl_queue_deadline()
+
+        self.battle_log_limit = await self.config.battle_log_limit()
+        if await self.config.compacted_log_limit() != self.battle_log_limit:
+            # One-time pass to trim logs saved before they were bounded.
+            self.bot.loop.create_task(self.compact_battle_logs())
+
         custom_help = await self.config.custom_help()
         if custom_help:
             self.bot._help_formatter = BrawlcordHelp(self.bot)
@@ -208,6 +294,14 @@ class Brawlcord(
         if old_info:
             await ctx.invoke(old_info)
 
+    @commands.Cog.listener()
+    async def on_reaction_add(self, reaction: discord.Reaction, user: discord.User):
+        self.reaction_dispatcher.dispatch("reaction_add", reaction, user)
+
+    @commands.Cog.listener()
+    async def on_reaction_remove(self, reaction: discord.Reaction, user: discord.User):
+        self.reaction_dispatcher.dispatch("reaction_remove", reaction, user)
+
     async def cog_command_error(self, ctx: Context, error: Exception):
         if not isinstance(
             getattr(error, "original", error),
@@ -224,11 +318,36 @@ class Brawlcord(
             ctx, getattr(error, "original", error), unhandled_by_cog=True
         )
 
+    async def close_stores(self):
+        """Write pending user changes to storage and close the battle history."""
+
+        try:
+            await self.user_cache.flush()
+        finally:
+            await self.battle_history.close()
+
     def cog_unload(self):
         # Cancel various tasks.
-        self.bank_update_task.cancel()
         self.status_task.cancel()
         self.shop_and_st_task.cancel()
+        self.cache_flush_task.cancel()
+        self.dispatcher_task.cancel()
+        self.reaction_dispatcher.cancel_all()
+
+        # Stop brawls before the last flush, so that they can't change user
+        # data which would never be written.
+        self.sessions.close()
+
+        # Write pending user changes to storage. The next instance waits for
+        # this in `setup` before reading them.
+        global unload_task
+        unload_task = self.bot.loop.create_task(self.close_stores())
+
+        if self.leaderboard_snapshot:
+            try:
+                self.save_leaderboard_snapshot()
+            except Exception:
+                log.exception("Couldn't save leaderboard snapshot.")
 
         # Restore old invite command.
         global old_invite
@@ -250,6 +369,15 @@ class Brawlcord(
 
 
 async def setup(bot: Red):
+    # Wait for the last unloaded instance to write its changes.
+    global unload_task
+    if unload_task is not None:
+        try:
+            await unload_task
+        except Exception:
+            log.exception("Couldn't write pending changes on unload.")
+        unload_task = None
+
     # Replace invite command.
     global old_invite
     old_invite = bot.get_command("invite")
@@ -47,7 +47,7 @@ class BrawlcordHelp(RedHelpFormatter):
         emb["footer"]["text"] = tagline
 
         gameplay_cmds = [
-            "brawl", "brawler", "tutorial", "allbrawlers", "gamemode",
+            "brawl", "autobrawl", "matchmaking", "brawler", "tutorial", "allbrawlers", "gamemode",
             "gamemodes", "upgrade", "shop", "select", "battlelog", "club"
         ]
         stat_cmds = [
@@ -10,6 +10,7 @@ from .utils.constants import EMBED_COLOR
 from .utils.cooldown import user_cooldown, user_cooldown_msg
 from .utils.core import maintenance
 from .utils.emojis import emojis
+from .utils.locks import locked
 
 DAY = 86400
 WEEK = 604800
@@ -20,6 +21,7 @@ class EconomyMixin(MixinMeta):
 
     @commands.command(name="brawlbox", aliases=['box'])
     @maintenance()
+    @locked()
     async def _brawl_box(self, ctx: Context):
         """Open a Brawl Box using Tokens"""
 
@@ -35,9 +37,9 @@ class EconomyMixin(MixinMeta):
         brawler_data = await self.get_player_stat(
             user, 'brawlers', is_iter=True)
 
-        box = Box(self.BRAWLERS, brawler_data)
+        box = Box(self.brawler_registry, brawler_data)
         try:
-            embed = await box.brawlbox(self.config.user(user), user)
+            embed = await box.brawlbox(self.user_cache.user(user), user)
         except Exception as exc:
             return await ctx.send(
                 f"Error \"{exc}\" while opening a Brawl Box."
@@ -56,6 +58,7 @@ class EconomyMixin(MixinMeta):
 
     @commands.command(name="bigbox", aliases=['big'])
     @maintenance()
+    @locked()
     async def _big_box(self, ctx: Context):
         """Open a Big Box using Star Tokens"""
 
@@ -71,9 +74,9 @@ class EconomyMixin(MixinMeta):
         brawler_data = await self.get_player_stat(
             user, 'brawlers', is_iter=True)
 
-        box = Box(self.BRAWLERS, brawler_data)
+        box = Box(self.brawler_registry, brawler_data)
         try:
-            embed = await box.bigbox(self.config.user(user), user)
+            embed = await box.bigbox(self.user_cache.user(user), user)
         except Exception as exc:
             return await ctx.send(
                 f"Error {exc} while opening a Big Box."
@@ -203,6 +206,7 @@ class EconomyMixin(MixinMeta):
             )
 
     @_rewards.command(name="claim")
+    @locked()
     async def rewards_claim(self, ctx: Context, reward_number: str):
         """Claim collected trophy road reward"""
 
@@ -220,6 +224,7 @@ class EconomyMixin(MixinMeta):
         await ctx.send("Reward successfully claimed.")
 
     @_rewards.command(name="claimall")
+    @locked()
     async def rewards_claim_all(self, ctx: Context):
         """Claim all collected trophy road rewards"""
         user = ctx.author
@@ -238,11 +243,12 @@ class EconomyMixin(MixinMeta):
         pass
 
     @_claim.command(name="daily")
+    @locked()
     async def claim_daily(self, ctx: Context):
         """Claim daily reward"""
 
-        if not await user_cooldown(1, DAY, self.config, ctx):
-            msg = await user_cooldown_msg(ctx, self.config)
+        if not await user_cooldown(1, DAY, self.user_cache, ctx):
+            msg = await user_cooldown_msg(ctx, self.user_cache)
             return await ctx.send(msg)
 
         user = ctx.author
@@ -250,9 +256,9 @@ class EconomyMixin(MixinMeta):
         brawler_data = await self.get_player_stat(
             user, 'brawlers', is_iter=True)
 
-        box = Box(self.BRAWLERS, brawler_data)
+        box = Box(self.brawler_registry, brawler_data)
         try:
-            embed = await box.brawlbox(self.config.user(user), user)
+            embed = await box.brawlbox(self.user_cache.user(user), user)
         except Exception as exc:
             return await ctx.send(
                 f"Error \"{exc}\" while opening a Brawl Box."
@@ -268,11 +274,12 @@ class EconomyMixin(MixinMeta):
             )
 
     @_claim.command(name="weekly")
+    @locked()
     async def claim_weekly(self, ctx: Context):
         """Claim weekly reward"""
 
-        if not await user_cooldown(1, WEEK, self.config, ctx):
-            msg = await user_cooldown_msg(ctx, self.config)
+        if not await user_cooldown(1, WEEK, self.user_cache, ctx):
+            msg = await user_cooldown_msg(ctx, self.user_cache)
             return await ctx.send(msg)
 
         user = ctx.author
@@ -280,9 +287,9 @@ class EconomyMixin(MixinMeta):
         brawler_data = await self.get_player_stat(
             user, 'brawlers', is_iter=True)
 
-        box = Box(self.BRAWLERS, brawler_data)
+        box = Box(self.brawler_registry, brawler_data)
         try:
-            embed = await box.bigbox(self.config.user(user), user)
+            embed = await box.bigbox(self.user_cache.user(user), user)
         except Exception as exc:
             return await ctx.send(
                 f"Error \"{exc}\" while opening a Big Box."
@@ -344,6 +351,7 @@ class EconomyMixin(MixinMeta):
             )
 
     @_gifted.command(name="mega")
+    @locked()
     async def _gifted_mega(self, ctx: Context):
         """Open a gifted Mega Box, if saved"""
 
@@ -358,9 +366,9 @@ class EconomyMixin(MixinMeta):
         brawler_data = await self.get_player_stat(
             user, 'brawlers', is_iter=True)
 
-        box = Box(self.BRAWLERS, brawler_data)
+        box = Box(self.brawler_registry, brawler_data)
         try:
-            embed = await box.megabox(self.config.user(user), user)
+            embed = await box.megabox(self.user_cache.user(user), user)
         except Exception as exc:
             return await ctx.send(
                 f"Error \"{exc}\" while opening a Mega Box."
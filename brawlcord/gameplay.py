@@ -11,14 +11,14 @@ from redbot.core.utils.predicates import ReactionPredicate
 
 from .abc import MixinMeta
 from .utils.battlelog import BattleLogEntry
-from .utils.brawlers import Brawler, brawlers_map
+from .utils.brawlers import Brawler
 from .utils.club import Club
 from .utils.constants import COMMUNITY_SERVER, EMBED_COLOR, SHELLY_TUT
 from .utils.core import maintenance
 from .utils.emojis import brawler_emojis, club_icons, emojis, gamemode_emotes, level_emotes
-from .utils.errors import AmbiguityError, UserRejected
+from .utils.errors import AmbiguityError, SessionLimitReached, UserRejected
 from .utils.gamemodes import GameMode, gamemodes_map
-from .utils.shop import Shop
+from .utils.locks import CONFIRM_TIMEOUT, locked
 
 LOG_COLORS = {
     "Victory": 0x6CFF52,
@@ -38,6 +38,76 @@ class GameplayMixin(MixinMeta):
     async def _brawl(self, ctx: Context, *, opponent: discord.Member = None):
         """Brawl against other players"""
 
+        await self.start_brawl(ctx, opponent)
+
+    @commands.command(name="autobrawl", aliases=["ab"])
+    @commands.guild_only()
+    @maintenance()
+    async def _auto_brawl(self, ctx: Context):
+        """Brawl against the bot with your moves picked automatically
+
+        The whole brawl is played at once and its result is shown in the channel.
+        """
+
+        await self.start_brawl(ctx, auto=True)
+
+    @commands.command(name="matchmaking", aliases=["mm"])
+    @commands.guild_only()
+    @maintenance()
+    async def _matchmaking(self, ctx: Context):
+        """Brawl against a player with similar trophies
+
+        You brawl against the bot if no player is found in time.
+        """
+
+        user = ctx.author
+
+        if not await self.get_player_stat(user, 'tutorial_finished'):
+            return await ctx.send(
+                "You have not finished the tutorial yet."
+                " Please use the `-tutorial` command to proceed."
+            )
+
+        if user.id in self.sessions:
+            return await ctx.send("You are already in a brawl!")
+
+        if user.id in self.matchmaking:
+            return await ctx.send("You are already looking for an opponent!")
+
+        selected = await self.get_player_stat(user, "selected", is_iter=True)
+        gm = selected["gamemode"]
+        trophies = await self.get_trophies(user, brawler_name=selected["brawler"])
+
+        await ctx.send(f"{user.mention} Looking for an opponent in {gm}...")
+
+        try:
+            match = await self.matchmaking.find(user, gm, trophies)
+        except ValueError:
+            # another search of the user started while the trophies were fetched
+            return await ctx.send("You are already looking for an opponent!")
+
+        if match is None:
+            await ctx.send(f"{user.mention} No opponent found. Brawling against the bot!")
+            return await self.start_brawl(ctx)
+
+        if match.guest.id == user.id:
+            return await ctx.send(
+                f"{user.mention} Matched against {match.host.name}!"
+                " Waiting for the brawl to start..."
+            )
+
+        await self.start_brawl(ctx, match.guest, challenge=False)
+
+    async def start_brawl(
+        self, ctx: Context, opponent: discord.Member = None, auto=False, challenge=True
+    ):
+        """Play a brawl and give the rewards to the players.
+
+        If `auto` is `True`, the brawl is played against the bot at once,
+        without asking the player for their moves. If `challenge` is `False`,
+        the opponent doesn't have to accept the brawl.
+        """
+
         guild = ctx.guild
         user = ctx.author
 
@@ -64,27 +134,68 @@ class GameplayMixin(MixinMeta):
         if user.id in self.sessions:
             return await ctx.send("You are already in a brawl!")
 
+        if user.id in self.matchmaking:
+            return await ctx.send("You are already looking for an opponent!")
+
+        user_ids = [user.id]
         if opponent:
             if opponent.id in self.sessions:
                 return await ctx.send(f"{opponent} is already in a brawl!")
 
             if opponent != guild.me:
-                self.sessions.append(opponent.id)
-
-        self.sessions.append(user.id)
+                user_ids.append(opponent.id)
 
-        gm = await self.get_player_stat(
-            user, "selected", is_iter=True, substat="gamemode"
-        )
+        mentions = user.mention
+        if opponent and not challenge:
+            # a matched opponent is waiting for the brawl to start
+            mentions += f" {opponent.mention}"
 
-        g: GameMode = gamemodes_map[gm](
-            ctx, user, opponent, self.config.user, self.BRAWLERS)
+        try:
+            session = self.sessions.start(user_ids, ctx.channel.id, auto)
+        except SessionLimitReached:
+            return await ctx.send(
+                f"{mentions} Too many brawls are running right now."
+                " Please try again in a few minutes."
+            )
+        session.task = asyncio.current_task()
 
-        await ctx.send(f"Please check your Direct Messages.")
+        async def queued(position: int):
+            await ctx.send(
+                f"{mentions} All brawl slots are taken. You are #{position} in the queue,"
+                " your brawl will start as soon as a slot is free."
+            )
 
+        admitted = False
         try:
+            # auto brawls end at once, so they don't wait for a slot
+            if not auto:
+                try:
+                    await self.admission.acquire(queued)
+                except asyncio.TimeoutError:
+                    return await ctx.send(
+                        f"{mentions} No brawl slot was free in time. Please try again later."
+                    )
+                admitted = True
+
+            gm = await self.get_player_stat(
+                user, "selected", is_iter=True, substat="gamemode"
+            )
+
+            g: GameMode = gamemodes_map[gm](
+                ctx, user, opponent, self.user_cache.user, self.brawler_registry,
+                self.reaction_dispatcher, self.outbox, log_limit=self.battle_log_limit,
+                live=self.live_matches, challenge=challenge
+            )
+            session.game = g
+
+            if not auto:
+                await ctx.send(f"{mentions} Please check your Direct Messages.")
+
             first_player, second_player = await g.initialize(ctx)
-            winner, loser = await g.play(ctx)
+            if auto:
+                winner, loser = await g.auto_play(ctx)
+            else:
+                winner, loser = await g.play(ctx)
         except (asyncio.TimeoutError, UserRejected, discord.Forbidden):
             return
         except Exception as exc:
@@ -94,15 +205,17 @@ class GameplayMixin(MixinMeta):
                 " Please notify bot owner by using `-report` command."
             )
         finally:
-            self.sessions.remove(user.id)
-            try:
-                self.sessions.remove(opponent.id)
-            except (ValueError, AttributeError):
-                pass
+            if admitted:
+                self.admission.release()
+            self.sessions.end(session)
 
         players = [first_player, second_player]
 
-        if winner:
+        if auto:
+            await ctx.send(
+                f"{user.mention} Auto brawl ended.", embed=await g.summary_embed(ctx, user)
+            )
+        elif winner:
             await ctx.send(
                 f"{first_player.mention} {second_player.mention}"
                 f" Match ended. Winner: {winner.name}!"
@@ -114,6 +227,7 @@ class GameplayMixin(MixinMeta):
             )
 
         log_data = []
+        rewards = []
         count = 0
         for player in players:
             if player == guild.me:
@@ -125,25 +239,32 @@ class GameplayMixin(MixinMeta):
             else:
                 points = 0
 
-            # brawl rewards, rank up rewards and trophy road rewards
-            br, rur, trr = await self.brawl_rewards(player, points, gm)
+            # brawl rewards, level up, rank up rewards and trophy road rewards
+            async with self.user_locks.acquire(player.id):
+                br, level_up, rur, trr = await self.brawl_rewards(player, points, gm)
 
             log_data.append({"user": player, "trophies": br[1], "reward": br[2]})
 
             count += 1
             if count == 1:
                 await ctx.send("Direct messaging rewards!")
-            level_up = await self.xp_handler(player)
-            await player.send(embed=br[0])
+            rewards.append(self.outbox.send(player, embed=br[0], count=g.requests))
             if level_up:
-                await player.send(f"{level_up[0]}\n{level_up[1]}")
+                rewards.append(
+                    self.outbox.send(player, f"{level_up[0]}\n{level_up[1]}", count=g.requests)
+                )
             if rur:
-                await player.send(embed=rur)
+                rewards.append(self.outbox.send(player, embed=rur, count=g.requests))
             if trr:
-                await player.send(embed=trr)
+                rewards.append(self.outbox.send(player, embed=trr, count=g.requests))
 
         await self.save_battle_log(log_data)
 
+        # the players' rewards are sent concurrently
+        await asyncio.gather(*rewards, return_exceptions=True)
+        self.match_requests.add(g.requests)
+        self.counted_matches += 1
+
     @commands.command(name="tutorial", aliases=["tut"])
     @commands.guild_only()
     @maintenance()
@@ -253,7 +374,7 @@ class GameplayMixin(MixinMeta):
 
         owned = True if brawler in owned_brawlers else False
 
-        b: Brawler = brawlers_map[brawler](self.BRAWLERS, brawler)
+        b: Brawler = self.brawler_registry[brawler]
 
         if owned:
             brawler_data = await self.get_player_stat(
@@ -300,9 +421,7 @@ class GameplayMixin(MixinMeta):
                     "Super Rare", "Epic", "Mythic", "Legendary"]
         for rarity in rarities:
             rarity_str = ""
-            for brawler in self.BRAWLERS:
-                if rarity != self.BRAWLERS[brawler]["rarity"]:
-                    continue
+            for brawler in self.brawler_registry.by_rarity.get(rarity, ()):
                 rarity_str += f"\n{brawler_emojis[brawler]} {brawler}"
                 if brawler in owned:
                     rarity_str += " [Owned]"
@@ -357,6 +476,7 @@ class GameplayMixin(MixinMeta):
 
     @commands.command(name="upgrade", aliases=['up'])
     @maintenance()
+    @locked()
     async def upgrade_brawlers(self, ctx: Context, *, brawler: str):
         """Upgrade a Brawler"""
 
@@ -410,7 +530,10 @@ class GameplayMixin(MixinMeta):
         start_adding_reactions(msg, ReactionPredicate.YES_OR_NO_EMOJIS)
 
         pred = ReactionPredicate.yes_or_no(msg, user)
-        await ctx.bot.wait_for("reaction_add", check=pred)
+        try:
+            await ctx.bot.wait_for("reaction_add", check=pred, timeout=CONFIRM_TIMEOUT)
+        except asyncio.TimeoutError:
+            return await ctx.send("Upgrade cancelled.")
         if pred.result:
             # User responded with tick
             pass
@@ -586,26 +709,25 @@ class GameplayMixin(MixinMeta):
 
     @_shop.command(name="buy")
     @maintenance()
+    @locked()
     async def _shop_buy(self, ctx: Context, item_number: str):
         """Buy items from the daily shop"""
 
-        data = await self.config.user(ctx.author).shop()
-
-        shop = Shop.from_json(data)
+        shop = await self.get_shop(ctx.author)
 
         try:
             item_number = int(item_number)
             new_data = await shop.buy_item(
-                ctx, ctx.author, self.config, self.BRAWLERS, item_number
+                ctx, ctx.author, self.user_cache, self.brawler_registry, item_number
             )
         except ValueError:
             new_data = await shop.buy_skin(
-                ctx, ctx.author, self.config,
+                ctx, ctx.author, self.user_cache,
                 self.BRAWLERS, item_number.upper()
             )
 
         if new_data:
-            await self.config.user(ctx.author).shop.set(new_data)
+            await self.user_cache.user(ctx.author).shop.set(new_data)
 
     @_shop.command(name="view")
     @maintenance()
@@ -616,24 +738,34 @@ class GameplayMixin(MixinMeta):
 
     @commands.command(aliases=["log"])
     @maintenance()
-    async def battlelog(self, ctx: Context):
-        """Show the battle log with last 10 (or fewer) entries"""
+    async def battlelog(self, ctx: Context, page: int = 1):
+        """Show your battle log, 10 entries per page
+
+        Page 1 has the 10 most recent battles, page 2 the 10 before them and so on.
+        """
 
-        battle_log = await self.config.user(ctx.author).battle_log()
-        battle_log.reverse()
+        if page < 1:
+            return await ctx.send("Page number must be at least 1.")
 
-        # Only show 10 (or fewer) most recent logs.
-        battle_log = battle_log[-10:]
-        total_pages = len(battle_log)
+        total_entries = await self.battle_history.count(ctx.author.id)
 
-        if total_pages < 1:
+        if total_entries < 1:
             return await ctx.send(
                 "You don't have any battles logged. Use the `-brawl` command to brawl!"
             )
 
+        total_pages = (total_entries - 1) // 10 + 1
+        if page > total_pages:
+            return await ctx.send(
+                f"You only have {total_pages} page(s) of battles logged."
+            )
+
+        battle_log = await self.battle_history.fetch(ctx.author.id, page - 1, 10)
+
         embeds = []
 
-        for page_num, entry_json in enumerate(battle_log, start=1):
+        start = (page - 1) * 10 + 1
+        for entry_num, entry_json in enumerate(battle_log, start=start):
             entry: BattleLogEntry = await BattleLogEntry.from_json(entry_json, self.bot)
 
             embed = discord.Embed(
@@ -667,7 +799,9 @@ class GameplayMixin(MixinMeta):
             )
             embed.add_field(name="Opponent's Stats", value=opponent_value)
 
-            embed.set_footer(text=f"Log {page_num} of {total_pages}")
+            embed.set_footer(
+                text=f"Log {entry_num} of {total_entries} | Page {page} of {total_pages}"
+            )
 
             embeds.append(embed)
 
@@ -714,11 +848,11 @@ class GameplayMixin(MixinMeta):
     async def _create_club(self, ctx: Context):
         """Create a club"""
 
-        if await self.config.user(ctx.author).club() is not None:
+        if await self.user_cache.user(ctx.author).club() is not None:
             return await ctx.send("You are already in a club!")
 
         try:
-            club: Club = await Club.create_club(self.config, ctx)
+            club: Club = await Club.create_club(self.config, self.user_cache, ctx)
         except ValueError:
             return await ctx.send("Error! Input must be a valid number.")
         except asyncio.TimeoutError:
@@ -726,7 +860,9 @@ class GameplayMixin(MixinMeta):
         except NameError:
             return await ctx.send("Error! Club type must be one of `open`, `closed`, or `invite`.")
 
-        embeds = await club.show_club(club.to_json(), self.bot, self.config, self.get_league_data)
+        embeds = await club.show_club(
+            club.to_json(), self.bot, self.user_cache, self.get_league_data
+        )
 
         await menu(ctx, embeds, DEFAULT_CONTROLS)
 
@@ -736,7 +872,7 @@ class GameplayMixin(MixinMeta):
         """Show your club details, if in any club"""
 
         club = None
-        club_id = await self.config.user(ctx.author).club()
+        club_id = await self.user_cache.user(ctx.author).club()
         clubs = await self.config.clubs()
         for club_ in clubs:
             if club_["id"] == club_id:
@@ -746,7 +882,7 @@ class GameplayMixin(MixinMeta):
         if club is None:
             return await ctx.send("You are not in any club!")
 
-        embeds = await Club.show_club(club, self.bot, self.config, self.get_league_data)
+        embeds = await Club.show_club(club, self.bot, self.user_cache, self.get_league_data)
 
         try:
             await menu(ctx, embeds, DEFAULT_CONTROLS)
@@ -761,7 +897,7 @@ class GameplayMixin(MixinMeta):
     async def _leave_club(self, ctx: Context):
         """Leave your current club"""
 
-        club_id = await self.config.user(ctx.author).club()
+        club_id = await self.user_cache.user(ctx.author).club()
         if club_id is not None:
             msg = await ctx.send("Are you sure you want to leave your club?")
             start_adding_reactions(msg, ReactionPredicate.YES_OR_NO_EMOJIS)
@@ -772,7 +908,7 @@ class GameplayMixin(MixinMeta):
             if pred.result is True:
                 club = await Club.club_from_id(club_id, self.config, self.bot)
                 await club.remove_user(ctx.author, self.config)
-                await self.config.user(ctx.author).club.set(None)
+                await self.user_cache.user(ctx.author).club.set(None)
                 await ctx.send("Left the club!")
             else:
                 await ctx.send("Cancelled leaving club.")
@@ -796,7 +932,7 @@ class GameplayMixin(MixinMeta):
                     clubs_txt += (
                         f"\n`{total+1:02d}.` {club_icons[f'club{club.icon_num}']} **{club.name}**"
                         f" (ID: `{club.id}`) - `{len(club.all_members)}/100` {emojis['friends']} |"
-                        f" {emojis['trophies']} `{await club.total_trophies(self.config):,}`"
+                        f" {emojis['trophies']} `{await club.total_trophies(self.user_cache):,}`"
                     )
                     total += 1
 
@@ -814,7 +950,7 @@ class GameplayMixin(MixinMeta):
     async def _join_club(self, ctx: Context, *, club_id: str):
         """Join a club from it's ID"""
 
-        if await self.config.user(ctx.author).club() is not None:
+        if await self.user_cache.user(ctx.author).club() is not None:
             return await ctx.send(
                 "You are already in a club! You can leave it by using `club leave` command."
             )
@@ -832,7 +968,7 @@ class GameplayMixin(MixinMeta):
         except ValueError as e:
             return await ctx.send(e)
 
-        await self.config.user(ctx.author).club.set(club_id)
+        await self.user_cache.user(ctx.author).club.set(club_id)
         await ctx.send("Joined the club!")
 
     @_club.command(name="info")
@@ -844,7 +980,7 @@ class GameplayMixin(MixinMeta):
         if club is None:
             return await ctx.send(f"Club with ID `{club_id}` doesn't exist.")
 
-        embeds = await club.show_club(club, self.bot, self.config, self.get_league_data)
+        embeds = await club.show_club(club, self.bot, self.user_cache, self.get_league_data)
         await menu(ctx, embeds, DEFAULT_CONTROLS)
 
     @_club.command(name="promote")
@@ -852,7 +988,7 @@ class GameplayMixin(MixinMeta):
     async def _club_promote(self, ctx: Context, *, user: discord.User):
         """Promote specified user"""
 
-        club_id = await self.config.user(ctx.author).club()
+        club_id = await self.user_cache.user(ctx.author).club()
         club: Club = await Club.club_from_id(club_id, self.config, self.bot)
 
         if not (
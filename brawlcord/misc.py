@@ -317,7 +317,8 @@ class MiscMixin(MixinMeta):
                 return await ctx.send("You took too long to respond. Data deletion cancelled.")
 
             if inner_pred.content.strip() == "CONFIRM":
-                await self.config.user(ctx.author).clear()
+                await self.user_cache.user(ctx.author).clear()
+                await self.battle_history.delete_user(ctx.author.id)
             else:
                 return await ctx.send("Cancelled data deletion.")
 
@@ -337,7 +338,8 @@ class MiscMixin(MixinMeta):
         You can request data once every 6 hours.
         """
 
-        data = await self.config.user(ctx.author).all()
+        data = await self.user_cache.user(ctx.author).all()
+        data["battle_log"] = await self.battle_history.fetch_all(ctx.author.id)
 
         data_json = json.dumps(data)
 
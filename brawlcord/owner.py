@@ -1,10 +1,25 @@
+import functools
+import io
 import logging
+import time
 
 import discord
 from redbot.core import checks, commands
 from redbot.core.commands import Context
+from redbot.core.utils.chat_formatting import box, humanize_timedelta, pagify
 
 from .abc import MixinMeta
+from .utils.constants import EMBED_COLOR
+from .utils.replay import Replay
+from .utils.shop_batch import (
+    BATCH_SIZE, ShopBatchGenerator, benchmark as shop_benchmark, shop_seeds
+)
+from .utils.simulator import (
+    benchmark as sim_benchmark,
+    memory_benchmark,
+    parity as sim_parity,
+    simulate,
+)
 
 log = logging.getLogger("red.brawlcord.owner")
 
@@ -18,16 +33,491 @@ class OwnerMixin(MixinMeta):
         """Display bot statistics"""
 
         total_guilds = len(self.bot.guilds)
-        total_users = len(await self.config.all_users())
+        total_users = len(await self.user_cache.all_users())
 
         await ctx.send(f"Total Guilds: {total_guilds}\nTotal Users: {total_users}")
 
+    @commands.group(name="usercache", invoke_without_command=True)
+    @checks.is_owner()
+    async def _user_cache(self, ctx: Context):
+        """Display user cache statistics"""
+
+        cache = self.user_cache
+        lookups = cache.hits + cache.misses
+        hit_rate = cache.hits / lookups * 100 if lookups else 0
+
+        await ctx.send(
+            f"**Cached Users:** {len(cache)}/{cache.max_size}"
+            f"\n**Hits:** {cache.hits}\n**Misses:** {cache.misses}"
+            f"\n**Hit Rate:** {hit_rate:.2f}%\n**Evictions:** {cache.evictions}"
+            f"\n**Pending Writes:** {cache.dirty_count} users"
+            f"\n**Keys Written:** {cache.flushes}"
+        )
+
+    @_user_cache.command(name="size")
+    async def _user_cache_size(self, ctx: Context, size: int):
+        """Set the maximum number of cached users"""
+
+        if size < 1:
+            return await ctx.send("Size must be at least 1.")
+
+        await self.config.user_cache_size.set(size)
+        self.user_cache.max_size = size
+
+        await ctx.send(f"User cache size set to {size}.")
+
+    @_user_cache.command(name="interval")
+    async def _user_cache_interval(self, ctx: Context, seconds: int):
+        """Set the interval (in seconds) between writes to storage"""
+
+        if seconds < 1:
+            return await ctx.send("Interval must be at least 1 second.")
+
+        await self.config.user_cache_flush_interval.set(seconds)
+
+        await ctx.send(f"User cache changes will be written every {seconds} seconds.")
+
+    @_user_cache.command(name="flush")
+    async def _user_cache_flush(self, ctx: Context):
+        """Write all pending user changes to storage now"""
+
+        await self.user_cache.flush()
+
+        await ctx.send("Written all pending changes.")
+
+    @commands.command(name="dispatcherstats")
+    @checks.is_owner()
+    async def _dispatcher_stats(self, ctx: Context):
+        """Display reaction dispatcher statistics"""
+
+        dispatcher = self.reaction_dispatcher
+
+        await ctx.send(
+            f"**Pending Waiters:** {dispatcher.pending}"
+            f" on {dispatcher.pending_messages} messages"
+            f"\n**Reaction Events:** {dispatcher.events}"
+            f"\n**Matched:** {dispatcher.matched}\n**Timeouts:** {dispatcher.timeouts}"
+        )
+
+    @commands.command(name="outboxstats")
+    @checks.is_owner()
+    async def _outbox_stats(self, ctx: Context):
+        """Display direct message outbox statistics"""
+
+        outbox = self.outbox
+        matches = self.counted_matches
+
+        msg = (
+            f"**Messages Queued:** {outbox.count.messages}"
+            f"\n**Requests Made:** {outbox.count.requests}"
+            f"\n**Pending:** {outbox.pending}"
+            f"\n**Rate Limited:** {outbox.rate_limited}\n**Failed:** {outbox.failed}"
+        )
+        if matches:
+            msg += (
+                f"\n\n**Brawls:** {matches}"
+                "\n**Requests per Brawl:**"
+                f" {self.match_requests.requests / matches:.1f}"
+                f" (one per message: {self.match_requests.messages / matches:.1f})"
+            )
+
+        await ctx.send(msg)
+
+    @commands.command(name="lockstats")
+    @checks.is_owner()
+    async def _lock_stats(self, ctx: Context):
+        """Display user lock statistics"""
+
+        locks = self.user_locks
+
+        if locks.contended:
+            avg_wait = locks.wait_time / locks.contended * 1000
+        else:
+            avg_wait = 0
+
+        await ctx.send(
+            f"**Active Locks:** {len(locks)}"
+            f"\n**Acquired:** {locks.acquired}\n**Contended:** {locks.contended}"
+            f"\n**Average Wait:** {avg_wait:.1f} ms"
+            f"\n**Longest Wait:** {locks.max_wait_time * 1000:.1f} ms"
+        )
+
+    @commands.group(name="brawls", invoke_without_command=True)
+    @checks.is_owner()
+    async def _brawls(self, ctx: Context):
+        """List running brawls"""
+
+        sessions = self.sessions
+
+        lines = []
+        for session in sessions:
+            players = ", ".join(
+                str(self.bot.get_user(user_id) or user_id) for user_id in session.user_ids
+            )
+            latency = session.turn_latency
+            latency_str = f"{latency:.1f}s/move" if latency is not None else "no moves"
+            lines.append(
+                f"{players} | {session.mode or 'Waiting'}{' (auto)' if session.auto else ''}"
+                f" | {humanize_timedelta(seconds=session.age) or '0 seconds'}"
+                f" | turn {session.turn} | {latency_str}"
+            )
+
+        admission = self.admission
+        header = (
+            f"Running brawls: {len(sessions)}/{sessions.max_sessions}"
+            f"\nPlayed: {admission.active}/{admission.budget}, queued: {admission.depth}"
+            f"\nLooking for opponents: {len(self.matchmaking)}"
+            f" (matched: {self.matchmaking.matched}, timed out: {self.matchmaking.timeouts})"
+        )
+        if not lines:
+            return await ctx.send(header)
+
+        for page in pagify(header + "\n\n" + "\n".join(lines), page_length=1900):
+            await ctx.send(box(page))
+
+    @_brawls.command(name="limit")
+    async def _brawls_limit(self, ctx: Context, limit: int):
+        """Set the highest number of brawls which can run at once"""
+
+        if limit < 1:
+            return await ctx.send("Limit must be at least 1.")
+
+        await self.config.max_brawls.set(limit)
+        self.sessions.max_sessions = limit
+
+        await ctx.send(f"Up to {limit} brawls can run at once.")
+
+    @_brawls.command(name="budget")
+    async def _brawls_budget(self, ctx: Context, budget: int):
+        """Set the number of brawls played at once before new brawls are queued"""
+
+        if budget < 1:
+            return await ctx.send("Budget must be at least 1.")
+
+        await self.config.brawl_budget.set(budget)
+        self.admission.set_budget(budget)
+
+        await ctx.send(f"Up to {budget} brawls will be played at once.")
+
+    @_brawls.command(name="deadline")
+    async def _brawls_deadline(self, ctx: Context, seconds: int):
+        """Set the seconds a brawl can wait in the queue"""
+
+        if seconds < 1:
+            return await ctx.send("Deadline must be at least 1 second.")
+
+        await self.config.brawl_queue_deadline.set(seconds)
+        self.admission.deadline = seconds
+
+        await ctx.send(f"Brawls will wait in the queue for up to {seconds} seconds.")
+
+    @_brawls.command(name="queue")
+    async def _brawls_queue(self, ctx: Context):
+        """Display brawl queue statistics"""
+
+        admission = self.admission
+        waited = admission.queued - admission.shed - admission.depth
+        avg_wait = admission.wait_time / waited if waited > 0 else 0
+
+        await ctx.send(
+            f"**Played:** {admission.active}/{admission.budget}"
+            f"\n**Queue Depth:** {admission.depth} (highest: {admission.max_depth})"
+            f"\n**Admitted:** {admission.admitted}\n**Queued:** {admission.queued}"
+            f"\n**Shed:** {admission.shed} (deadline: {admission.deadline}s)"
+            f"\n**Average Wait:** {avg_wait:.1f}s"
+            f"\n**Longest Wait:** {admission.max_wait_time:.1f}s"
+        )
+
+    @commands.command(name="battleloglimit")
+    @checks.is_owner()
+    async def _battle_log_limit(self, ctx: Context, limit: int = None):
+        """Display or set the number of partial battle log entries kept per user"""
+
+        if limit is None:
+            return await ctx.send(f"Battle log limit: {self.battle_log_limit}")
+
+        if limit < 1:
+            return await ctx.send("Limit must be at least 1.")
+
+        await self.config.battle_log_limit.set(limit)
+        self.battle_log_limit = limit
+
+        await ctx.trigger_typing()
+        await self.compact_battle_logs()
+
+        await ctx.send(f"Battle log limit set to {limit}. Existing logs have been trimmed.")
+
+    @commands.command(name="leaderboardsnapshot", aliases=["lbsnapshot"])
+    @checks.is_owner()
+    async def _leaderboard_snapshot(self, ctx: Context, enabled: bool = None):
+        """Display or toggle saving leaderboards on unload for a faster startup"""
+
+        if enabled is None:
+            return await ctx.send(f"Leaderboard snapshot: {self.leaderboard_snapshot}")
+
+        await self.config.leaderboard_snapshot.set(enabled)
+        self.leaderboard_snapshot = enabled
+
+        if enabled:
+            await ctx.send(
+                "Leaderboards will be saved on unload and loaded on the next startup."
+            )
+        else:
+            await ctx.send("Leaderboards will be rebuilt from user data on every startup.")
+
+    @commands.command(name="livematches")
+    @checks.is_owner()
+    async def _live_matches(self, ctx: Context, enabled: bool = None):
+        """Display or toggle editing a single message per player during brawls"""
+
+        if enabled is None:
+            return await ctx.send(f"Live match messages: {self.live_matches}")
+
+        await self.config.live_match_messages.set(enabled)
+        self.live_matches = enabled
+
+        if enabled:
+            await ctx.send(
+                "Each player will get one match message which is updated every turn."
+            )
+        else:
+            await ctx.send("Brawls will send a new message every turn.")
+
+    @commands.command(name="pregenshops")
+    @checks.is_owner()
+    async def _pregen_shops(self, ctx: Context):
+        """Generate today's shop for every user who has none yet (requires NumPy)"""
+
+        try:
+            generator = ShopBatchGenerator(self.BRAWLERS)
+        except RuntimeError as exc:
+            return await ctx.send(str(exc))
+
+        await ctx.trigger_typing()
+
+        start = time.perf_counter()
+
+        shop_epoch = await self.config.shop_epoch()
+        all_users = await self.user_cache.all_users()
+        user_ids = [
+            user_id for user_id, data in all_users.items()
+            if not data["shop"] or data["shop_epoch"] != shop_epoch
+        ]
+
+        generated = 0
+        for offset in range(0, len(user_ids), BATCH_SIZE):
+            batch = user_ids[offset:offset + BATCH_SIZE]
+            shops = await self.bot.loop.run_in_executor(
+                None,
+                functools.partial(
+                    generator.generate,
+                    [all_users[user_id]["brawlers"] for user_id in batch],
+                    shop_seeds(batch, shop_epoch)
+                )
+            )
+
+            for user_id, shop in zip(batch, shops):
+                keys = ("shop", "shop_epoch")
+                async with self.user_cache.transaction(user_id, keys) as data:
+                    # the user opened their shop while the batch was generated
+                    if data["shop"] and data["shop_epoch"] == shop_epoch:
+                        continue
+                    data["shop"] = shop
+                    data["shop_epoch"] = shop_epoch
+                generated += 1
+
+            # write the batch so that its records can be evicted again
+            await self.user_cache.flush()
+
+        await ctx.send(
+            f"Generated shops for {generated:,} users in {time.perf_counter() - start:.2f}s."
+        )
+
+    @commands.command(name="shopbenchmark")
+    @checks.is_owner()
+    async def _shop_benchmark(self, ctx: Context, users: int = 100_000):
+        """Compare per-user and batch shop generation speed (requires NumPy)"""
+
+        await ctx.trigger_typing()
+
+        try:
+            result = await self.bot.loop.run_in_executor(
+                None, functools.partial(shop_benchmark, self.BRAWLERS, users)
+            )
+        except RuntimeError as exc:
+            return await ctx.send(str(exc))
+
+        batch = result["encode"] + result["generate"]
+        await ctx.send(
+            f"**Users:** {users:,}"
+            f"\n**Per-user:** {result['per_user']:.2f}s"
+            f"\n**Batch:** {batch:.2f}s (encoding {result['encode']:.2f}s,"
+            f" generation {result['generate']:.2f}s)"
+        )
+
+    @commands.command(name="balancesim")
+    @checks.is_owner()
+    async def _balance_sim(
+        self, ctx: Context, matches: int = 200, level: int = 10, vectorized: bool = False
+    ):
+        """Simulate bot matches between all brawlers and report win rates
+
+        Set `vectorized` to play the matches with the NumPy engine.
+        """
+
+        if matches < 1:
+            return await ctx.send("Matches must be at least 1.")
+
+        if not 1 <= level <= 10:
+            return await ctx.send("Level must be between 1 and 10.")
+
+        await ctx.trigger_typing()
+
+        start = time.perf_counter()
+        try:
+            report = await self.bot.loop.run_in_executor(
+                None,
+                functools.partial(
+                    simulate, self.BRAWLERS, matches, levels=(level,), vectorized=vectorized
+                )
+            )
+        except RuntimeError as exc:
+            return await ctx.send(str(exc))
+        elapsed = time.perf_counter() - start
+
+        total = 0
+        embed = discord.Embed(color=EMBED_COLOR, title="Balance Simulation")
+        for mode in report.results:
+            summary = report.summary(mode)
+            total += summary.matches
+            overall = sorted(report.overall(mode).items(), key=lambda x: x[1], reverse=True)
+            best = ", ".join(f"{brawler} ({rate:.0%})" for brawler, rate in overall[:3])
+            worst = ", ".join(f"{brawler} ({rate:.0%})" for brawler, rate in overall[-3:])
+            embed.add_field(
+                name=mode,
+                value=(
+                    f"**Average Length:** {summary.avg_rounds:.1f} rounds"
+                    f"\n**Timeouts:** {summary.timeout_rate:.2%}"
+                    f"\n**Best:** {best}\n**Worst:** {worst}"
+                ),
+                inline=False
+            )
+        embed.set_footer(
+            text=f"{total:,} matches at level {level} in {elapsed:.1f}s"
+        )
+
+        fp = io.StringIO()
+        report.to_csv(fp)
+        file = discord.File(io.BytesIO(fp.getvalue().encode()), filename="balance.csv")
+
+        await ctx.send(embed=embed, file=file)
+
+    @commands.command(name="simbenchmark")
+    @checks.is_owner()
+    async def _sim_benchmark(self, ctx: Context, matches: int = 20_000):
+        """Compare the speed and results of the object and NumPy match engines"""
+
+        if matches < 1:
+            return await ctx.send("Matches must be at least 1.")
+
+        await ctx.trigger_typing()
+
+        def run():
+            rates = sim_benchmark(self.BRAWLERS, matches)
+            return rates, {mode: sim_parity(self.BRAWLERS, mode) for mode in rates}
+
+        try:
+            rates, parities = await self.bot.loop.run_in_executor(None, run)
+        except RuntimeError as exc:
+            return await ctx.send(str(exc))
+
+        embed = discord.Embed(color=EMBED_COLOR, title="Match Engine Benchmark")
+        for mode, rate in rates.items():
+            result = parities[mode]
+            embed.add_field(
+                name=mode,
+                value=(
+                    f"**Object:** {rate['object']:,.0f} matches/s"
+                    f"\n**Vectorized:** {rate['vector']:,.0f} matches/s"
+                    f" ({rate['vector'] / rate['object']:.1f}x)"
+                    f"\n**Average Length:** {result['avg_rounds'][0]:.1f}"
+                    f" / {result['avg_rounds'][1]:.1f} rounds"
+                    f"\n**Timeouts:** {result['timeout_rate'][0]:.2%}"
+                    f" / {result['timeout_rate'][1]:.2%}"
+                    f"\n**Largest Win Rate Z-Score:** {result['max_z']:.2f}"
+                ),
+                inline=False
+            )
+        embed.set_footer(text="Parity: 1000 matches per brawler with each engine")
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name="matchmemory")
+    @checks.is_owner()
+    async def _match_memory(self, ctx: Context, matches: int = 5000):
+        """Display the memory used by concurrent matches of each game mode"""
+
+        if matches < 1:
+            return await ctx.send("Matches must be at least 1.")
+
+        await ctx.trigger_typing()
+
+        sizes = await self.bot.loop.run_in_executor(
+            None, functools.partial(memory_benchmark, self.BRAWLERS, matches)
+        )
+
+        await ctx.send(
+            f"**Concurrent Matches:** {matches:,}\n"
+            + "\n".join(
+                f"**{mode}:** {size['per_match']:,.0f} bytes per match"
+                f" ({size['total'] / 1024 ** 2:.2f} MiB)"
+                for mode, size in sizes.items()
+            )
+        )
+
+    @commands.command(name="replay")
+    @checks.is_owner()
+    async def _replay(self, ctx: Context, user: discord.User, entry: int = 1):
+        """Play a brawl from a user's battle log again and compare the result
+
+        `entry` is the position of the brawl in the battle log, newest first.
+        """
+
+        if entry < 1:
+            return await ctx.send("Entry must be at least 1.")
+
+        entries = await self.battle_history.fetch(user.id, entry - 1, 1)
+        if not entries:
+            return await ctx.send(f"{user} does not have that many battle log entries.")
+
+        data = entries[0].get("replay")
+        if data is None:
+            return await ctx.send("That brawl does not have a replay.")
+
+        replay = Replay.from_json(data)
+        state = replay.play(self.brawler_registry)
+
+        if state.winner is None:
+            result = "Draw"
+        elif state.winner.user_id == user.id:
+            result = "Victory"
+        else:
+            result = "Loss"
+
+        matches = "matches" if result == entries[0]["result"] else "**does not match**"
+
+        await ctx.send(
+            f"**Game Mode:** {replay.mode}\n**Seed:** {replay.seed}"
+            f"\n**Moves:** {len(replay.moves)}"
+            f"\n**Result:** {result} ({matches} the battle log)"
+        )
+
     @commands.command()
     @checks.is_owner()
     async def clear_cooldown(self, ctx: Context, user: discord.User = None):
         if not user:
             user = ctx.author
-        async with self.config.user(user).cooldown() as cooldown:
+        async with self.user_cache.user(user).cooldown() as cooldown:
             cooldown.clear()
 
     @commands.command()
@@ -35,12 +525,12 @@ class OwnerMixin(MixinMeta):
     async def add_mega(self, ctx: Context, quantity=1):
         """Add a mega box to each user who has used the bot at least once."""
 
-        users_data = await self.config.all_users()
+        users_data = await self.user_cache.all_users()
         user_ids = users_data.keys()
 
         for user_id in user_ids:
             try:
-                user_group = self.config.user_from_id(user_id)
+                user_group = self.user_cache.user_from_id(user_id)
             except Exception:
                 log.exception(f"Couldn't fetch user group of {user_id}.")
                 continue
@@ -93,7 +583,7 @@ class OwnerMixin(MixinMeta):
     async def fixskins(self, ctx: Context):
         """Removes empty lists from the skins list."""
 
-        data = await self.config.all_users()
+        data = await self.user_cache.all_users()
 
         await ctx.trigger_typing()
         for user in data:
@@ -103,7 +593,7 @@ class OwnerMixin(MixinMeta):
                 skins = [skin for skin in skins if skin]
                 user_obj = discord.Object(user)
                 try:
-                    await self.config.user(user_obj).set_raw(
+                    await self.user_cache.user(user_obj).set_raw(
                         "brawlers", brawler, "skins", value=skins
                     )
                 except Exception:
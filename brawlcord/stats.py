@@ -37,7 +37,7 @@ class StatisticsMixin(MixinMeta):
         embed.add_field(name="Highest Trophies",
                         value=f"{emojis['pb']} {pb:,}")
 
-        user_data = await self.config.user(user).all()
+        user_data = await self.user_cache.user(user).all()
 
         xp = user_data['xp']
         lvl = user_data['lvl']
@@ -52,7 +52,7 @@ class StatisticsMixin(MixinMeta):
         tokens = user_data['tokens']
         embed.add_field(name="Tokens", value=f"{emojis['token']} {tokens}")
 
-        token_bank = user_data['tokens_in_bank']
+        token_bank = await self.get_token_bank(user)
         embed.add_field(
             name="Tokens In Bank", value=f"{emojis['token']} {token_bank}"
         )
@@ -88,7 +88,7 @@ class StatisticsMixin(MixinMeta):
         if not user:
             user = ctx.author
 
-        user_data = await self.config.user(user).all()
+        user_data = await self.user_cache.user(user).all()
 
         embed = discord.Embed(color=EMBED_COLOR)
         embed.set_author(name=f"{user.name}'s Profile",
@@ -433,9 +433,9 @@ class StatisticsMixin(MixinMeta):
     async def _star_tokens(self, ctx: Context):
         """Show details of today's star tokens"""
 
-        todays_st = await self.config.user(ctx.author).todays_st()
+        todays_st = await self.get_todays_st(ctx.author)
 
-        user_gamemodes = await self.config.user(ctx.author).gamemodes()
+        user_gamemodes = await self.user_cache.user(ctx.author).gamemodes()
 
         collected = ""
         not_collected = ""
@@ -527,7 +527,7 @@ class StatisticsMixin(MixinMeta):
             ctx.author, "brawlers", is_iter=True
         )
 
-        box = Box(self.BRAWLERS, brawler_data)
+        box = Box(self.brawler_registry, brawler_data)
 
         embed = discord.Embed(color=EMBED_COLOR)
         embed.set_author(name="Drop Rates", icon_url=ctx.author.avatar_url)
@@ -0,0 +1,137 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional
+
+
+class AdmissionControl:
+    """Limit the number of brawls which are played at once.
+
+    Brawls wait for a free slot in a FIFO queue when `budget` brawls are
+    being played. Waiting brawls are dropped from the queue after `deadline`
+    seconds.
+
+    Parameters
+    -------------
+    budget: `int`
+        Highest number of brawls which can be played at once.
+    deadline: `float`
+        Seconds a brawl can wait in the queue.
+
+    Attributes
+    -------------
+    active: `int`
+        Number of brawls being played.
+    admitted: `int`
+        Number of brawls which were given a slot.
+    queued: `int`
+        Number of brawls which had to wait in the queue.
+    shed: `int`
+        Number of brawls dropped from the queue after the deadline.
+    max_depth: `int`
+        Highest number of brawls waiting in the queue at once.
+    wait_time: `float`
+        Total seconds waited in the queue by brawls which were given a slot.
+    max_wait_time: `float`
+        Longest wait in the queue of a brawl which was given a slot.
+    """
+
+    def __init__(self, budget: int, deadline: float):
+        self.budget = budget
+        self.deadline = deadline
+
+        self._queue: Deque[asyncio.Future] = deque()
+
+        self.active = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.max_depth = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Number of brawls waiting in the queue."""
+
+        return len(self._queue)
+
+    def set_budget(self, budget: int):
+        """Change the budget and give the new free slots to waiting brawls."""
+
+        self.budget = budget
+        self._admit()
+
+    async def acquire(self, queued: Optional[Callable[[int], Awaitable]] = None) -> float:
+        """Wait for a slot and return the seconds waited.
+
+        Raises `asyncio.TimeoutError` if no slot is free before the deadline.
+        The slot must be given back with `release`.
+
+        Parameters
+        -------------
+        queued: `Optional[Callable[[int], Awaitable]]`
+            Called with the position in the queue if the brawl has to wait,
+            for example to tell the player about it.
+        """
+
+        if self.active < self.budget and not self._queue:
+            self.active += 1
+            self.admitted += 1
+            return 0.0
+
+        loop = asyncio.get_event_loop()
+        waiter = loop.create_future()
+        self._queue.append(waiter)
+        self.queued += 1
+        self.max_depth = max(self.max_depth, len(self._queue))
+
+        start = loop.time()
+        handle = loop.call_later(self.deadline, self._shed, waiter)
+        try:
+            if queued is not None:
+                await queued(len(self._queue))
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # the slot was given while the caller stopped waiting
+                self.release()
+            else:
+                waiter.cancel()
+                try:
+                    self._queue.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+        finally:
+            handle.cancel()
+
+        waited = loop.time() - start
+        self.wait_time += waited
+        self.max_wait_time = max(self.max_wait_time, waited)
+
+        return waited
+
+    def release(self):
+        """Give back a slot acquired with `acquire`."""
+
+        self.active -= 1
+        self._admit()
+
+    def _admit(self):
+        while self._queue and self.active < self.budget:
+            waiter = self._queue.popleft()
+            if waiter.done():
+                continue
+            waiter.set_result(None)
+            self.active += 1
+            self.admitted += 1
+
+    def _shed(self, waiter: asyncio.Future):
+        if waiter.done():
+            return
+        try:
+            self._queue.remove(waiter)
+        except ValueError:
+            pass
+        self.shed += 1
+        waiter.set_exception(asyncio.TimeoutError())
@@ -5,6 +5,31 @@ from redbot.core.bot import Red
 
 from .core import utc_timestamp
 
+# Default number of entries kept in a user's partial battle log.
+DEFAULT_LOG_LIMIT = 10
+
+
+def push_log_entry(log: list, entry: dict, limit: int = DEFAULT_LOG_LIMIT):
+    """Append an entry to a fixed-capacity battle log.
+
+    The log behaves like a ring buffer: once it holds `limit` entries,
+    the oldest entries are dropped to make room for new ones. `log` is
+    modified in place.
+
+    Parameters
+    -------------
+    log: `list`
+        The battle log to append to.
+    entry: `dict`
+        JSON representation of the log entry.
+    limit: `int`
+        Maximum number of entries to keep.
+    """
+
+    log.append(entry)
+    if len(log) > limit:
+        del log[:len(log) - limit]
+
 
 class PartialBattleLogEntry:
     """Represents a partial battle log.
@@ -22,16 +47,18 @@ class PartialBattleLogEntry:
         Name of the game mode.
     result: `bool`
         Result of the brawl. True if player won, False if lost and None if draw.
+    replay: `Optional[dict]`
+        JSON representation of the brawl's `Replay`.
 
     Attributes
     -------------
-    player: `discord.User`
+    player: `discord.abc.Snowflake`
         The player the log is saved for.
     player_brawler_name: `str`
         Name of player's brawler.
     player_brawler_level: `int`
         Level of player's brawler.
-    opponent: `discord.User`
+    opponent: `discord.abc.Snowflake`
         The opponent in the brawl.
     opponent_brawler_name: `str`
         Name of opponent's brawler.
@@ -41,15 +68,24 @@ class PartialBattleLogEntry:
         Name of the game mode.
     result: `str`
         Result of the brawl for player.
+    replay: `Optional[dict]`
+        JSON representation of the brawl's `Replay`, if it was recorded.
     """
 
-    def __init__(self, player=None, opponent=None, game_mode: str = None, result: bool = None):
+    def __init__(
+        self,
+        player=None,
+        opponent=None,
+        game_mode: str = None,
+        result: bool = None,
+        replay: dict = None
+    ):
         if player and opponent and game_mode:
-            self.player: discord.User = player.player
+            self.player: discord.abc.Snowflake = discord.Object(player.user_id)
             self.player_brawler_name: str = player.brawler_name
             self.player_brawler_level: int = player.brawler_level
 
-            self.opponent: discord.User = opponent.player
+            self.opponent: discord.abc.Snowflake = discord.Object(opponent.user_id)
             self.opponent_brawler_name: str = opponent.brawler_name
             self.opponent_brawler_level: int = opponent.brawler_level
 
@@ -62,6 +98,8 @@ class PartialBattleLogEntry:
             else:
                 self.result = "Draw"
 
+            self.replay = replay
+
     def to_json(self) -> dict:
         """Return a dictionary representing the `PartialBattleLogEntry` object."""
 
@@ -74,6 +112,7 @@ class PartialBattleLogEntry:
             "opponent_brawler_level": self.opponent_brawler_level,
             "game_mode": self.game_mode,
             "result": self.result,
+            "replay": self.replay,
         }
 
     @classmethod
@@ -100,6 +139,7 @@ class PartialBattleLogEntry:
 
         self.game_mode = data["game_mode"]
         self.result = data["result"]
+        self.replay = data.get("replay")
 
         return self
 
@@ -148,6 +188,8 @@ class BattleLogEntry:
         Name of the game mode.
     result: `str`
         Result of the brawl for player.
+    replay: `Optional[dict]`
+        JSON representation of the brawl's `Replay`, if it was recorded.
     """
 
     def __init__(
@@ -168,6 +210,7 @@ class BattleLogEntry:
 
             self.game_mode = partial_log.game_mode
             self.result = partial_log.result
+            self.replay = partial_log.replay
 
             # New data.
             self.timestamp = utc_timestamp(datetime.utcnow())
@@ -194,7 +237,8 @@ class BattleLogEntry:
             "player_brawler_trophies": self.player_brawler_trophies,
             "player_reward_trophies": self.player_reward_trophies,
             "opponent_brawler_trophies": self.opponent_brawler_trophies,
-            "opponent_reward_trophies": self.opponent_reward_trophies
+            "opponent_reward_trophies": self.opponent_reward_trophies,
+            "replay": self.replay
         }
 
     @classmethod
@@ -221,6 +265,7 @@ class BattleLogEntry:
 
         self.game_mode = data["game_mode"]
         self.result = data["result"]
+        self.replay = data.get("replay")
 
         self.timestamp = data["timestamp"]
 
@@ -1,3 +1,4 @@
+import copy
 import random
 
 import discord
@@ -55,11 +56,11 @@ class Box:
 
         self.BRAWLERS = all_brawlers
 
-        for brawler in all_brawlers:
-            rarity = all_brawlers[brawler]["rarity"]
+        for rarity, brawlers in all_brawlers.by_rarity.items():
             if rarity != "Trophy Road":
-                if brawler not in brawler_data:
-                    self.can_unlock[rarity].append(brawler)
+                self.can_unlock[rarity].extend(
+                    brawler for brawler in brawlers if brawler not in brawler_data
+                )
 
         for brawler in brawler_data:
             # self.owned.append(brawler)
@@ -450,13 +451,15 @@ class Box:
     async def unlock_brawler(self, rarity, conf, embed):
         brawler = random.choice(self.can_unlock[rarity])
         free_skins = [
-            skin for skin in self.BRAWLERS[brawler]["skins"] if skin[0] == 0
+            skin for skin in self.BRAWLERS[brawler].skins if skin[0] == 0
         ]
 
+        stats = copy.deepcopy(default_stats)
+        if free_skins:
+            stats["skins"].extend(free_skins)
+
         async with conf.brawlers() as brawlers:
-            if free_skins:
-                default_stats["skins"].extend(free_skins)
-            brawlers[brawler] = default_stats
+            brawlers[brawler] = stats
         embed.add_field(
             name=f"New {rarity} Brawler :tada:",
             value=f"{brawler_emojis[brawler]} {brawler}",
@@ -499,8 +502,9 @@ class Box:
 
         self.can_get_sp[sp_brawler].remove(sp)
 
-        sp_name = self.BRAWLERS[sp_brawler][sp]["name"]
-        sp_desc = self.BRAWLERS[sp_brawler][sp]["desc"]
+        sp_data = getattr(self.BRAWLERS[sp_brawler], sp)
+        sp_name = sp_data["name"]
+        sp_desc = sp_data["desc"]
         sp_index = int(sp[2]) - 1
 
         sp_str = (
@@ -1,4 +1,6 @@
 import random
+from collections.abc import Mapping
+from types import MappingProxyType
 
 import discord
 
@@ -9,6 +11,9 @@ from .emojis import brawler_emojis, emojis, rank_emojis, sp_icons
 brawler_url = "https://www.starlist.pro/brawlers/detail/{}"
 brawler_thumb = "https://www.starlist.pro/assets/brawler/{}.png"
 
+# highest power level, stats are precomputed for levels 1 to MAX_LEVEL
+MAX_LEVEL = 10
+
 
 rarity_colors = {
     "Trophy Road": 0x6db2ba,
@@ -21,7 +26,13 @@ rarity_colors = {
 
 
 class Brawler:
-    """Base class to represent a Brawler."""
+    """Base class to represent a Brawler.
+
+    Instances are read-only once created so that a single instance
+    per Brawler can be shared by all matches (see `BrawlerRegistry`).
+    """
+
+    _frozen = False
 
     def __init__(self, raw_data: dict, brawler: str):
 
@@ -37,8 +48,22 @@ class Brawler:
         self.ult = data["ult"]
         self.sp1 = data["sp1"]
         self.sp2 = data["sp2"]
+        self.skins = data["skins"]
 
         self.init()
+        self.build_tables()
+
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if self._frozen:
+            raise AttributeError(f"{type(self).__name__} instances are read-only.")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        if self._frozen:
+            raise AttributeError(f"{type(self).__name__} instances are read-only.")
+        super().__delattr__(name)
 
     def init(self):
         # These are the stats that are "buffed", unless overridden in specific classes.
@@ -48,6 +73,27 @@ class Brawler:
             "ult_damage": self.ult["damage"]
         }
 
+    def raw_values(self, stats: dict) -> dict:
+        """Get the values ability rolls are based on from buffed stats."""
+
+        return {
+            "attack": stats['att_damage'] * self.attack["projectiles"] * 0.8,
+            "ult": stats['ult_damage'] * self.ult["projectiles"] * 0.8
+        }
+
+    def build_tables(self):
+        """Precompute buffed stats and raw ability values for all power levels.
+
+        The tables are read-only. Ability rolls only need a lookup and a random draw.
+        """
+
+        self._stat_table = tuple(
+            MappingProxyType(self._buff_stats(level)) for level in range(1, MAX_LEVEL + 1)
+        )
+        self._raw_table = tuple(
+            MappingProxyType(self.raw_values(stats)) for stats in self._stat_table
+        )
+
     def get_stat(self, stat, substat: str = None):
         """Get specific Brawler stat."""
 
@@ -75,38 +121,18 @@ class Brawler:
     def _health(self, level) -> int:
         """Get the health of the Brawler at specified power level."""
 
-        return self.buff_stat(self.health, level)
+        return self.buff_stats(level)['health']
 
-    def _attack(self, level):
+    def _attack(self, level: int, rng: random.Random):
         """Represents the attack ability of the Brawler."""
 
-        # getting all values
-        # att_range = self.attack["range"]
-        # att_reload = self.attack["reload"]
-        projectiles = self.attack["projectiles"]
-
-        stats = self.buff_stats(level)
+        return self.chance_calculation(self.raw_stats(level)['attack'], rng)
 
-        damage = stats['att_damage']
-
-        raw = damage * projectiles * 0.8
-
-        return self.chance_calculation(raw)
-
-    def _ult(self, level):
+    def _ult(self, level: int, rng: random.Random):
         """Represents the Super ability of the Brawler."""
 
-        # getting all values
-        # # ult_range = self.ult["range"]
-        projectiles = self.ult["projectiles"]
-
-        stats = self.buff_stats(level)
-
-        damage = stats['ult_damage']
-
-        raw = damage * projectiles * 0.8
-
-        return self.chance_calculation(raw), None  # None is the spawn health
+        # None is the spawn health
+        return self.chance_calculation(self.raw_stats(level)['ult'], rng), None
 
     def _sp1(self):
         """Represents the first SP of the Brawler."""
@@ -116,12 +142,26 @@ class Brawler:
         """Represents the second SP of the Brawler."""
         pass
 
-    def _spawn(self, level):
+    def _spawn(self, level: int, rng: random.Random):
         """Represents the move of the spawned character of the Brawler."""
 
     def buff_stats(self, level: int):
         """Get all Brawler stats buffed by specified level."""
 
+        if 1 <= level <= MAX_LEVEL:
+            return self._stat_table[level - 1]
+
+        return MappingProxyType(self._buff_stats(level))
+
+    def raw_stats(self, level: int):
+        """Get the raw ability values of the Brawler at specified level."""
+
+        if 1 <= level <= MAX_LEVEL:
+            return self._raw_table[level - 1]
+
+        return MappingProxyType(self.raw_values(self._buff_stats(level)))
+
+    def _buff_stats(self, level: int):
         if level == 10:
             level = 9
 
@@ -248,8 +288,8 @@ class Brawler:
 
         return info
 
-    def chance_calculation(self, raw: int):
-        chance = random.randint(0, 10)
+    def chance_calculation(self, raw: int, rng: random.Random):
+        chance = rng.randint(0, 10)
 
         if chance >= 9:
             raw *= 1
@@ -275,19 +315,16 @@ class Healer(Brawler):
             "ult_heal": self.ult["heal"]
         }
 
-    def _ult(self, level):
-        """Represents the Super ability of Poco."""
-
-        # getting all values
-        # ult_range = self.ult["range"]
-
-        stats = self.buff_stats(level)
-
-        heal = stats['ult_heal']
+    def raw_values(self, stats: dict) -> dict:
+        return {
+            "attack": stats['att_damage'] * self.attack["projectiles"] * 0.8,
+            "ult": stats['ult_heal'] * 0.8
+        }
 
-        raw = heal * 0.8
+    def _ult(self, level: int, rng: random.Random):
+        """Represents the Super ability of Poco."""
 
-        return [self.chance_calculation(raw)], None
+        return [self.chance_calculation(self.raw_stats(level)['ult'], rng)], None
 
     def super_info(self, stats: dict):
         try:
@@ -312,30 +349,24 @@ class Spawner(Brawler):
             "spawn_health": self.ult["spawn"]["health"]
         }
 
-    def _ult(self, level):
-        """Represents the Super ability of Nita."""
-
-        # getting all values
-
-        stats = self.buff_stats(level)
+    def raw_values(self, stats: dict) -> dict:
+        return {
+            "attack": stats['att_damage'] * self.attack["projectiles"] * 0.8,
+            "ult": stats["spawn_damage"] * 0.8,
+            "spawn": stats["spawn_damage"] * 0.8
+        }
 
-        damage = stats["spawn_damage"]
-        health = stats["spawn_health"]
+    def _ult(self, level: int, rng: random.Random):
+        """Represents the Super ability of Nita."""
 
-        raw = damage * 0.8
+        health = self.buff_stats(level)["spawn_health"]
 
-        return self.chance_calculation(raw), health
+        return self.chance_calculation(self.raw_stats(level)["ult"], rng), health
 
-    def _spawn(self, level):
+    def _spawn(self, level: int, rng: random.Random):
         """Represents the move of the spawned character of the Brawler."""
 
-        stats = self.buff_stats(level)
-
-        damage = stats["spawn_damage"]
-
-        raw = damage * 0.8
-
-        return self.chance_calculation(raw)
+        return self.chance_calculation(self.raw_stats(level)["spawn"], rng)
 
     def super_info(self, stats):
         try:
@@ -375,28 +406,24 @@ class HealSpawner(Brawler):
             "spawn_health": self.ult["spawn"]["health"]
         }
 
-    def _ult(self, level):
-        """Represents the Super ability of Nita."""
-
-        # getting all values
-
-        stats = self.buff_stats(level)
+    def raw_values(self, stats: dict) -> dict:
+        return {
+            "attack": stats['att_damage'] * self.attack["projectiles"] * 0.8,
+            "ult": stats["spawn_heal"] * 0.8,
+            "spawn": stats["spawn_heal"] * 0.8
+        }
 
-        heal = stats["spawn_heal"]
-        health = stats["spawn_health"]
+    def _ult(self, level: int, rng: random.Random):
+        """Represents the Super ability of Nita."""
 
-        raw = heal * 0.8
+        health = self.buff_stats(level)["spawn_health"]
 
-        return self.chance_calculation(raw), health
+        return self.chance_calculation(self.raw_stats(level)["ult"], rng), health
 
-    def _spawn(self, level):
+    def _spawn(self, level: int, rng: random.Random):
         """Represents the move of the spawned character of Pam."""
 
-        heal = self.buff_stat(self.ult["spawn"]["heal"], level)
-
-        raw = heal * 0.8
-
-        return [self.chance_calculation(raw)]
+        return [self.chance_calculation(self.raw_stats(level)["spawn"], rng)]
 
     def super_info(self, stats):
         try:
@@ -425,74 +452,50 @@ class HealSpawner(Brawler):
 # SPECIAL BRAWLER CLASSES
 # These override at least one base method. They also inherit from the base `Brawler` class.
 
-# Overrides `_ult` method to factor in damage over time.
+# Overrides `raw_values` method to factor in damage over time.
 class Barley(Brawler):
     """Class to represent Barley."""
 
-    def _ult(self, level):
-        """Represent the Super ability of Barley."""
-
-        # getting all values
-        # ult_range = self.ult["range"]
-        projectiles = self.ult["projectiles"]
-
+    def raw_values(self, stats: dict) -> dict:
         # Barley special -- damage over time
         duration = 0.3
 
-        stats = self.buff_stats(level)
-
         damage = stats['ult_damage']
         # Damage over time
         damage += damage * duration
 
-        raw = damage * projectiles * 0.8
-
-        return self.chance_calculation(raw), None
+        return {
+            "attack": stats['att_damage'] * self.attack["projectiles"] * 0.8,
+            "ult": damage * self.ult["projectiles"] * 0.8
+        }
 
 
-# Overrides `_ult` method to factor in spin duration.
+# Overrides `raw_values` method to factor in spin duration.
 class Carl(Brawler):
     """Class to represent Carl."""
 
-    def _ult(self, level):
-        """Represent the Super ability of Carl."""
-
-        # getting all values
-        duration = self.ult["duration"]
-
-        stats = self.buff_stats(level)
-
-        damage = stats['ult_damage']
-
-        raw = damage * 0.8 * duration
-
-        return self.chance_calculation(raw), None
+    def raw_values(self, stats: dict) -> dict:
+        return {
+            "attack": stats['att_damage'] * self.attack["projectiles"] * 0.8,
+            "ult": stats['ult_damage'] * 0.8 * self.ult["duration"]
+        }
 
 
 # Overrides `_attack` method to factor in range scaling.
 class Piper(Brawler):
     """Class to represent Piper."""
 
-    def _attack(self, level):
+    def _attack(self, level: int, rng: random.Random):
         """Represents the attack ability of Piper."""
 
-        # getting all values
         range_ = self.attack["range"]
-        # att_reload = self.attack["reload"]
-        projectiles = self.attack["projectiles"]
-
-        stats = self.buff_stats(level)
-
-        damage = stats['att_damage']
-
-        range_scaling = random.randint(range_ - 4, range_) * 0.1
-
-        raw = damage * projectiles * 0.8 * range_scaling
+        range_scaling = rng.randint(range_ - 4, range_) * 0.1
 
-        return self.chance_calculation(raw)
+        return self.chance_calculation(self.raw_stats(level)['attack'] * range_scaling, rng)
 
 
-# Overrides `init`, `_attack`, `_ult` and `attack_info` methods to factor in poison damage.
+# Overrides `init`, `raw_values`, `_attack`, `_ult` and `attack_info` methods
+# to factor in poison damage.
 class Crow(Brawler):
     """Class to represent Crow."""
 
@@ -504,7 +507,14 @@ class Crow(Brawler):
             "ult_damage": self.ult["damage"]
         }
 
-    def _attack(self, level):
+    def raw_values(self, stats: dict) -> dict:
+        values = super().raw_values(stats)
+        # poison hits between one and three times per attack or Super
+        values["attack_poison"] = stats['poison_damage'] * self.attack["projectiles"] * 0.8
+        values["ult_poison"] = stats['poison_damage'] * self.ult["projectiles"] * 0.8
+        return values
+
+    def _attack(self, level: int, rng: random.Random):
         """Represents the attack ability of Crow."""
 
         # getting all values
@@ -516,14 +526,14 @@ class Crow(Brawler):
 
         damage = (
             stats['att_damage']
-            + stats['poison_damage'] * random.randint(1, 3)
+            + stats['poison_damage'] * rng.randint(1, 3)
         )
 
         raw = damage * projectiles * 0.8
 
-        return self.chance_calculation(raw)
+        return self.chance_calculation(raw, rng)
 
-    def _ult(self, level):
+    def _ult(self, level: int, rng: random.Random):
         """Represents the Super ability of Crow."""
 
         # getting all values
@@ -534,12 +544,12 @@ class Crow(Brawler):
 
         damage = (
             stats['ult_damage']
-            + stats['poison_damage'] * random.randint(1, 3)
+            + stats['poison_damage'] * rng.randint(1, 3)
         )
 
         raw = damage * projectiles * 0.8
 
-        return self.chance_calculation(raw), None
+        return self.chance_calculation(raw, rng), None
 
     def attack_info(self, stats):
         try:
@@ -689,3 +699,39 @@ brawlers_map = {
     "Gene": Gene,
     "Tick": Tick,
 }
+
+
+class BrawlerRegistry(Mapping):
+    """Read-only mapping of Brawler names to shared `Brawler` instances.
+
+    Every Brawler is created once, when the data is loaded, and reused by
+    matches, `brawler_info` and box/shop lookups instead of being rebuilt
+    on each use.
+
+    Parameters
+    -------------
+    raw_data: `dict`
+        Data of all brawlers, as loaded from `brawlers.json`.
+    """
+
+    def __init__(self, raw_data: dict):
+        self._brawlers = {
+            name: brawlers_map[name](raw_data, name) for name in raw_data
+        }
+
+        by_rarity = {}
+        for name, brawler in self._brawlers.items():
+            by_rarity.setdefault(brawler.rarity, []).append(name)
+        # names of brawlers of each rarity, in the order of `brawlers.json`
+        self.by_rarity = MappingProxyType(
+            {rarity: tuple(names) for rarity, names in by_rarity.items()}
+        )
+
+    def __getitem__(self, name: str) -> Brawler:
+        return self._brawlers[name]
+
+    def __iter__(self):
+        return iter(self._brawlers)
+
+    def __len__(self):
+        return len(self._brawlers)
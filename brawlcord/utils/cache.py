@@ -0,0 +1,392 @@
+import asyncio
+import copy
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Iterable, List, Set
+
+import discord
+from redbot.core import Config
+
+log = logging.getLogger("red.brawlcord.cache")
+
+
+class _CachedValueContext:
+    """Awaitable and async context manager returned by calling a `_CachedValue`.
+
+    Mirrors Red's `_ValueCtxManager`: awaiting it returns a copy of the value while
+    `async with` yields the cached object itself and marks it dirty on exit.
+    """
+
+    def __init__(self, value: "_CachedValue"):
+        self.value = value
+
+    def __await__(self):
+        return self.value.cache.get(self.value.user_id, self.value.key).__await__()
+
+    async def __aenter__(self):
+        record = await self.value.cache.get_record(self.value.user_id)
+        raw_value = record[self.value.key]
+        if not isinstance(raw_value, (list, dict)):
+            raise TypeError(
+                "Type of retrieved value must be mutable (i.e. list or dict)"
+                " in order to use a cached value as a context manager."
+            )
+        # The block can await, so keep the record in memory until it is marked dirty.
+        self.value.cache.pin(self.value.user_id)
+        return raw_value
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.value.cache.mark_dirty(self.value.user_id, self.value.key)
+        self.value.cache.unpin(self.value.user_id)
+
+
+class _CachedValue:
+    """Represents a single key of a cached user record."""
+
+    def __init__(self, cache: "UserCache", user_id: int, key: str):
+        self.cache = cache
+        self.user_id = user_id
+        self.key = key
+
+    def __call__(self) -> _CachedValueContext:
+        return _CachedValueContext(self)
+
+    async def set(self, value):
+        await self.cache.set(self.user_id, self.key, value)
+
+
+class CachedUserGroup:
+    """Drop-in replacement for `Config.user(user)` backed by `UserCache`.
+
+    Only the parts of Red's `Group` API used by Brawlcord are implemented.
+    """
+
+    def __init__(self, cache: "UserCache", user_id: int):
+        self.cache = cache
+        self.user_id = user_id
+
+    def __getattr__(self, key: str) -> _CachedValue:
+        if key.startswith("_"):
+            raise AttributeError(key)
+        return _CachedValue(self.cache, self.user_id, key)
+
+    async def all(self) -> dict:
+        record = await self.cache.get_record(self.user_id)
+        return copy.deepcopy(record)
+
+    async def get_raw(self, *nested_path):
+        record = await self.cache.get_record(self.user_id)
+        value = record
+        for key in nested_path:
+            value = value[key]
+        return copy.deepcopy(value)
+
+    async def set_raw(self, *nested_path, value):
+        record = await self.cache.get_record(self.user_id)
+        parent = record
+        for key in nested_path[:-1]:
+            parent = parent[key]
+        parent[nested_path[-1]] = value
+        self.cache.mark_dirty(self.user_id, nested_path[0])
+
+    async def clear(self):
+        await self.cache.clear_user(self.user_id)
+
+
+class UserCache:
+    """Write-behind, size-limited cache of user records.
+
+    Each user record is loaded from `Config` once and kept in memory. Writes are
+    applied to the cached record immediately and the changed keys are written to
+    `Config` in batches by `flush`. The least recently used clean records are
+    evicted once the cache grows beyond `max_size`.
+
+    Parameters
+    -------------
+    config: `Config`
+        The cog's `Config` instance.
+    max_size: `int`
+        Maximum number of user records to keep in memory.
+
+    Attributes
+    -------------
+    hits: `int`
+        Number of record lookups served from memory.
+    misses: `int`
+        Number of record lookups which had to load from `Config`.
+    evictions: `int`
+        Number of records evicted from memory.
+    flushes: `int`
+        Number of keys written to `Config`.
+    """
+
+    def __init__(self, config: Config, max_size: int = 1000):
+        self.config = config
+        self.max_size = max_size
+
+        self._records: "OrderedDict[int, dict]" = OrderedDict()
+        self._dirty: Dict[int, Set[str]] = {}
+        # number of open `async with` blocks on each user's record
+        self._pinned: Dict[int, int] = {}
+        # IDs of the clean, unpinned records, least recently used first
+        self._evictable: "OrderedDict[int, None]" = OrderedDict()
+        self._loading: Dict[int, asyncio.Future] = {}
+        self._listeners: Dict[str, List[Callable[[int, dict], None]]] = {}
+        self._flush_lock = asyncio.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flushes = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, user_id: int):
+        return user_id in self._records
+
+    def user(self, user: discord.abc.User) -> CachedUserGroup:
+        """Return a `CachedUserGroup` for the given user."""
+
+        return CachedUserGroup(self, user.id)
+
+    def user_from_id(self, user_id: int) -> CachedUserGroup:
+        """Return a `CachedUserGroup` for the given user id."""
+
+        return CachedUserGroup(self, int(user_id))
+
+    @property
+    def dirty_count(self) -> int:
+        """Number of users with changes not yet written to `Config`."""
+
+        return len(self._dirty)
+
+    async def get_record(self, user_id: int) -> dict:
+        """Return the cached record of a user, loading it if required.
+
+        The returned dict is the cached object itself. Callers that modify it
+        must call `mark_dirty` for every top level key they change.
+        """
+
+        try:
+            record = self._records[user_id]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            self._used(user_id)
+            return record
+
+        # Make concurrent misses for the same user share one load.
+        future = self._loading.get(user_id)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(self._load(user_id))
+            self._loading[user_id] = future
+            future.add_done_callback(lambda _: self._loading.pop(user_id, None))
+
+        record = await asyncio.shield(future)
+
+        if user_id in self._records:
+            record = self._records[user_id]
+            self._used(user_id)
+        else:
+            # Another load evicted the record before this caller resumed.
+            self._records[user_id] = record
+            self._release(user_id)
+        return record
+
+    async def _load(self, user_id: int) -> dict:
+        record = await self.config.user_from_id(user_id).all()
+        self._records[user_id] = record
+        self._release(user_id)
+        self._evict()
+        return record
+
+    def _used(self, user_id: int):
+        """Move a record to the most recently used end of the eviction order."""
+
+        self._records.move_to_end(user_id)
+        if user_id in self._evictable:
+            self._evictable.move_to_end(user_id)
+
+    def _release(self, user_id: int):
+        """Make a record evictable again if it is cached, clean and unpinned."""
+
+        if (
+            user_id in self._records
+            and user_id not in self._dirty
+            and user_id not in self._pinned
+        ):
+            self._evictable[user_id] = None
+
+    def _evict(self):
+        """Evict least recently used clean records until within `max_size`.
+
+        Dirty and pinned records are never evicted, nor is the most recently
+        used clean one, which is usually the record a caller of `get_record` is
+        about to change. The cache may temporarily hold more than `max_size`
+        records when all the old ones are dirty or pinned; they become
+        evictable after the next flush or once unpinned.
+        """
+
+        while len(self._records) > self.max_size and len(self._evictable) > 1:
+            user_id, _ = self._evictable.popitem(last=False)
+            del self._records[user_id]
+            self.evictions += 1
+
+    async def get(self, user_id: int, key: str):
+        """Return a copy of a top level value from a user's record."""
+
+        record = await self.get_record(user_id)
+        return copy.deepcopy(record[key])
+
+    async def set(self, user_id: int, key: str, value):
+        """Set a top level value of a user's record."""
+
+        record = await self.get_record(user_id)
+        record[key] = value
+        self.mark_dirty(user_id, key)
+
+    def add_listener(self, key: str, callback: Callable[[int, dict], None]):
+        """Register a function to call whenever a top level key of a record changes.
+
+        The callback is called with the user ID and the cached record, or with
+        `None` as the record when the user's data is cleared. It must not modify
+        the record.
+        """
+
+        self._listeners.setdefault(key, []).append(callback)
+
+    def _notify(self, user_id: int, key: str, record: dict):
+        for callback in self._listeners.get(key, ()):
+            try:
+                callback(user_id, record)
+            except Exception:
+                log.exception(f"Error in listener for {key} of user {user_id}.")
+
+    def pin(self, user_id: int):
+        """Keep a user's record in memory until `unpin` is called as many times."""
+
+        self._pinned[user_id] = self._pinned.get(user_id, 0) + 1
+        self._evictable.pop(user_id, None)
+
+    def unpin(self, user_id: int):
+        """Allow a record pinned with `pin` to be evicted again."""
+
+        count = self._pinned.get(user_id, 0) - 1
+        if count > 0:
+            self._pinned[user_id] = count
+        else:
+            self._pinned.pop(user_id, None)
+            self._release(user_id)
+
+    def mark_dirty(self, user_id: int, key: str):
+        """Mark a top level key of a cached record as changed."""
+
+        record = self._records.get(user_id)
+        if record is None:
+            return
+        self._dirty.setdefault(user_id, set()).add(key)
+        self._evictable.pop(user_id, None)
+        self._notify(user_id, key, record)
+
+    @asynccontextmanager
+    async def transaction(self, user_id: int, keys: Iterable[str] = None):
+        """Context manager yielding a working copy of a user's record.
+
+        All the changes made to the working copy are committed to the cached
+        record at once when the block exits without an exception, and are
+        discarded otherwise. The block should not await so that other tasks
+        never see a half-applied change.
+
+        Parameters
+        -------------
+        user_id: `int`
+            ID of the user.
+        keys: `Optional[Iterable[str]]`
+            Top level keys to include in the working copy. All keys are
+            included if not specified.
+        """
+
+        record = await self.get_record(user_id)
+        if keys is None:
+            keys = record.keys()
+        working = {key: copy.deepcopy(record[key]) for key in keys}
+
+        # Keep the record in memory so the changes are committed to it.
+        self.pin(user_id)
+        try:
+            yield working
+        finally:
+            self.unpin(user_id)
+
+        for key, value in working.items():
+            if record.get(key) != value:
+                record[key] = value
+                self.mark_dirty(user_id, key)
+
+    async def clear_user(self, user_id: int):
+        """Remove a user's record from memory and from `Config`."""
+
+        self._records.pop(user_id, None)
+        self._dirty.pop(user_id, None)
+        self._evictable.pop(user_id, None)
+        await self.config.user_from_id(user_id).clear()
+
+        for key in self._listeners:
+            self._notify(user_id, key, None)
+
+    async def flush(self):
+        """Write all the changed keys to `Config`."""
+
+        async with self._flush_lock:
+            dirty, self._dirty = self._dirty, {}
+
+            # The records are no longer marked dirty, so they are pinned until
+            # their keys are written. Otherwise loads of other users during the
+            # writes could evict them and their changes would be lost.
+            pinned = set(dirty)
+            for user_id in pinned:
+                self.pin(user_id)
+
+            try:
+                for user_id, keys in dirty.items():
+                    record = self._records.get(user_id)
+                    if record is not None:
+                        await self._write(user_id, record, keys)
+                    # else the user's data was cleared in the meantime
+                    pinned.discard(user_id)
+                    self.unpin(user_id)
+            finally:
+                # the flush was interrupted, keep the unwritten keys for the next one
+                for user_id in pinned:
+                    if dirty[user_id] and user_id in self._records:
+                        self._dirty.setdefault(user_id, set()).update(dirty[user_id])
+                    self.unpin(user_id)
+
+            self._evict()
+
+    async def _write(self, user_id: int, record: dict, keys: Set[str]):
+        """Write `keys` of a record to `Config`, removing them from `keys` once done.
+
+        Keys which couldn't be written are marked dirty again.
+        """
+
+        group = self.config.user_from_id(user_id)
+        for key in list(keys):
+            try:
+                await group.set_raw(key, value=copy.deepcopy(record[key]))
+            except Exception:
+                log.exception(f"Couldn't write {key} of user {user_id}.")
+                self._dirty.setdefault(user_id, set()).add(key)
+            else:
+                self.flushes += 1
+            keys.discard(key)
+
+    async def all_users(self) -> dict:
+        """Flush pending changes and return the data of all users from `Config`."""
+
+        await self.flush()
+        return await self.config.all_users()
@@ -10,6 +10,7 @@ from redbot.core.utils.menus import start_adding_reactions
 from redbot.core.utils.predicates import MessagePredicate, ReactionPredicate
 # from redbot.core.utils.chat_formatting import text_to_file
 
+from .cache import UserCache
 from .constants import EMBED_COLOR
 from .emojis import emojis
 from .errors import CancellationError
@@ -38,7 +39,7 @@ class Club:
         self.all_members = [self.president] + self.vice_presidents + self.seniors + self.members
 
     @classmethod
-    async def create_club(cls, config: Config, ctx: Context):
+    async def create_club(cls, config: Config, user_cache: UserCache, ctx: Context):
         """Interactive club creation process.
 
         This function creates the club, adds it to both user and global database
@@ -111,7 +112,7 @@ class Club:
             club = cls(data)
             clubs.append(club.to_json())
 
-        await config.user(ctx.author).club.set(club.id)
+        await user_cache.user(ctx.author).club.set(club.id)
 
         if default_length != new_length:
             await config.club_id_length.set(new_length)
@@ -186,7 +187,7 @@ class Club:
 
     @staticmethod
     async def show_club(
-        data: dict, bot: Red, config: Config, get_league: Callable
+        data: dict, bot: Red, user_cache: UserCache, get_league: Callable
     ) -> (discord.Embed, discord.File):
         """Returns a tuple of length two.
 
@@ -201,9 +202,9 @@ class Club:
             club: Club = await Club.from_json(data, bot)
 
         embeds = []
-        pages = await club.members_list(config, get_league)
+        pages = await club.members_list(user_cache, get_league)
         total_pages = len(pages)
-        total_trophies = await club.total_trophies(config)
+        total_trophies = await club.total_trophies(user_cache)
         if club.icon_num not in range(1, 31):
             icon_url = "https://www.starlist.pro/assets/icon/Club.png"
         else:
@@ -241,14 +242,14 @@ class Club:
 
         return embeds
 
-    async def total_trophies(self, config: Config) -> int:
+    async def total_trophies(self, user_cache: UserCache) -> int:
         """Returns total club trophies."""
 
         total = 0
 
         for member in self.all_members:
             try:
-                brawlers = await config.user(member).brawlers()
+                brawlers = await user_cache.user(member).brawlers()
                 total += self.get_user_trophies(brawlers)
             except Exception:
                 continue
@@ -261,7 +262,7 @@ class Club:
 
         return sum([brawlers[brawler]["trophies"] for brawler in brawlers])
 
-    async def members_list(self, config: Config, get_league: Callable) -> (str, str):
+    async def members_list(self, user_cache: UserCache, get_league: Callable) -> (str, str):
         """Returns a tuple of two strings.
 
         First string is for top ten club members (in terms of trophies).
@@ -273,7 +274,7 @@ class Club:
 
         for member in self.all_members:
             try:
-                brawlers = await config.user(member).brawlers()
+                brawlers = await user_cache.user(member).brawlers()
                 mapping[member] = self.get_user_trophies(brawlers)
             except Exception:
                 pass
@@ -16,6 +16,11 @@ BRAWLCORD_CODE_URL = (
 REDDIT_LINK = "https://www.reddit.com/user/Snowsee"
 SOURCE_LINK = "https://github.com/brawlcord/brawlcord"
 
+# token bank refills
+TOKEN_BANK_MAX = 200
+TOKEN_BANK_REFILL = 20
+TOKEN_BANK_INTERVAL = 80 * 60  # seconds
+
 default_stats = {
     "trophies": 0,
     "pb": 0,
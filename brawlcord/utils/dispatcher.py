@@ -0,0 +1,177 @@
+import asyncio
+from typing import Callable, Dict, List, Sequence
+
+import discord
+
+# Reaction events routed by the dispatcher.
+REACTION_EVENTS = ("reaction_add", "reaction_remove")
+
+
+class _Waiter:
+    __slots__ = ("message_id", "events", "check", "future", "rounds")
+
+    def __init__(
+        self,
+        message_id: int,
+        events: Sequence[str],
+        check: Callable,
+        future: asyncio.Future,
+        rounds: int
+    ):
+        self.message_id = message_id
+        self.events = events
+        self.check = check
+        self.future = future
+        # full turns of the timer wheel left before the waiter times out
+        self.rounds = rounds
+
+
+class ReactionDispatcher:
+    """Route reaction events to the waiter of the reacted message.
+
+    `bot.wait_for` runs every registered check on every event, so its cost
+    grows with the number of running brawls. The dispatcher looks waiters up
+    by message ID instead and only runs the checks of that message.
+
+    Timeouts are kept in a single timer wheel with `slots` slots of `resolution`
+    seconds each, which `tick` advances. Waiters time out on the first tick
+    after their timeout has passed.
+
+    Parameters
+    -------------
+    slots: `int`
+        Number of slots in the timer wheel.
+    resolution: `float`
+        Seconds between two ticks of the timer wheel.
+
+    Attributes
+    -------------
+    pending: `int`
+        Number of waiters which haven't been resolved yet.
+    events: `int`
+        Number of reaction events received.
+    matched: `int`
+        Number of events which resolved a waiter.
+    timeouts: `int`
+        Number of waiters which timed out.
+    """
+
+    def __init__(self, slots: int = 64, resolution: float = 1.0):
+        self.resolution = resolution
+
+        self._waiters: Dict[int, List[_Waiter]] = {}
+        self._wheel: List[List[_Waiter]] = [[] for _ in range(slots)]
+        self._cursor = 0
+
+        self.pending = 0
+        self.events = 0
+        self.matched = 0
+        self.timeouts = 0
+
+    @property
+    def pending_messages(self) -> int:
+        """Number of messages with at least one waiter."""
+
+        return len(self._waiters)
+
+    def wait(
+        self,
+        message: discord.Message,
+        check: Callable,
+        timeout: float = None,
+        events: Sequence[str] = ("reaction_add",)
+    ) -> asyncio.Future:
+        """Wait for a reaction event on `message` which passes `check`.
+
+        Works like `bot.wait_for` for a single message. The returned future
+        resolves to a `(reaction, user)` tuple or raises `asyncio.TimeoutError`
+        after `timeout` seconds.
+
+        Parameters
+        -------------
+        message: `discord.Message`
+            Message to wait for reactions on.
+        check: `Callable`
+            Called with the reaction and the user.
+        timeout: `float`
+            Seconds to wait. Waits forever if `None`.
+        events: `Sequence[str]`
+            Names of the events to wait for, from `REACTION_EVENTS`.
+        """
+
+        future = asyncio.get_event_loop().create_future()
+
+        rounds = offset = 0
+        if timeout is not None:
+            # The slot `offset` ahead of the cursor is expired by the `offset + 1`th tick,
+            # so a waiter never times out early.
+            ticks = int(-(-timeout // self.resolution))
+            rounds, offset = divmod(ticks, len(self._wheel))
+
+        waiter = _Waiter(message.id, events, check, future, rounds)
+        self._waiters.setdefault(message.id, []).append(waiter)
+        self.pending += 1
+        future.add_done_callback(lambda _: self._remove(waiter))
+
+        if timeout is not None:
+            self._wheel[(self._cursor + offset) % len(self._wheel)].append(waiter)
+
+        return future
+
+    def _remove(self, waiter: _Waiter):
+        waiters = self._waiters.get(waiter.message_id)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(waiter)
+        except ValueError:
+            return
+        self.pending -= 1
+        if not waiters:
+            del self._waiters[waiter.message_id]
+
+    def dispatch(self, event: str, reaction: discord.Reaction, user: discord.abc.User):
+        """Resolve the waiters of the reacted message whose check passes."""
+
+        self.events += 1
+
+        waiters = self._waiters.get(reaction.message.id)
+        if not waiters:
+            return
+
+        for waiter in list(waiters):
+            if waiter.future.done() or event not in waiter.events:
+                continue
+            try:
+                passed = waiter.check(reaction, user)
+            except Exception as exc:
+                waiter.future.set_exception(exc)
+                continue
+            if passed:
+                self.matched += 1
+                waiter.future.set_result((reaction, user))
+
+    def tick(self):
+        """Advance the timer wheel by one slot and time out expired waiters."""
+
+        slot = self._wheel[self._cursor]
+        self._wheel[self._cursor] = kept = []
+        self._cursor = (self._cursor + 1) % len(self._wheel)
+
+        for waiter in slot:
+            if waiter.future.done():
+                continue
+            if waiter.rounds > 0:
+                waiter.rounds -= 1
+                kept.append(waiter)
+            else:
+                self.timeouts += 1
+                waiter.future.set_exception(asyncio.TimeoutError())
+
+    def cancel_all(self):
+        """Cancel all waiters."""
+
+        for waiters in list(self._waiters.values()):
+            for waiter in list(waiters):
+                waiter.future.cancel()
+        self._wheel = [[] for _ in self._wheel]
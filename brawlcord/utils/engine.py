@@ -0,0 +1,746 @@
+import random
+from collections import namedtuple
+from math import ceil
+from typing import List, Optional, Tuple
+
+from .brawlers import Brawler
+
+spawn_text = {
+    "Nita": "Bear",
+    "Penny": "Cannon",
+    "Jessie": "Turrent",
+    "Pam": "Healing Station",
+    "8-Bit": "Turret"
+}
+
+healing_over_time = 100
+healing_time = 3
+
+# Event kinds returned by the engines.
+RESPAWNING = "respawning"
+STUNNED = "stunned"
+DEFEATED = "defeated"
+TIME_UP = "time_up"
+
+Event = namedtuple("Event", ["kind", "player", "other"])
+Event.__doc__ = """Something that happened during a match.
+
+`player` is the player the event is about and `other` is their opponent.
+"""
+
+
+class Player:
+    """A class for Player data and stats.
+
+    Players are identified by `user_id`, the ID of the user playing, so that
+    a match doesn't keep a reference to the user object. Game mode specific
+    stats are added by the subclasses set as `Engine.player_class`.
+    """
+
+    __slots__ = (
+        "user_id",
+        "attacks",
+        "invincibility",
+        "respawning",
+        "is_respawning",
+        "spawn",
+        "brawler",
+        "brawler_name",
+        "brawler_level",
+        "static_health",
+        "health",
+        "can_super",
+        "last_attack",
+        "stunned",
+        "spawn_str",
+    )
+
+    def __init__(self, user_id: int, brawler: Brawler, level: int):
+        self.user_id = user_id
+
+        self.attacks = 0
+
+        self.invincibility = False
+
+        self.respawning = None
+        self.is_respawning = False
+
+        self.spawn = None
+
+        self.brawler = brawler
+        self.brawler_name = brawler.name
+        self.brawler_level = level
+
+        self.static_health = self.brawler._health(self.brawler_level)
+        self.health = self.static_health
+
+        self.can_super = False
+
+        # round number when last attacked opponent
+        # or got attacked by the opponent
+        self.last_attack = -1
+
+        self.stunned = False
+
+        self.spawn_str: str = spawn_text.get(self.brawler_name, "")
+
+    def _to_json(self) -> dict:
+        """Return a dict with player data"""
+
+        return {
+            "user_id": self.user_id,
+            "brawler": self.brawler,
+            "brawler_name": self.brawler_name,
+            "brawler_level": self.brawler_level,
+            "attacks": self.attacks,
+            "invincibility": self.invincibility,
+            "respawning": self.respawning,
+            "spawn": self.spawn,
+            "static_health": self.static_health,
+            "health": self.health,
+            "spawn_str": self.spawn_str
+        }
+
+
+class GemGrabPlayer(Player):
+    """Player with Gem Grab stats."""
+
+    __slots__ = ("gems", "dropped")
+
+    def __init__(self, user_id: int, brawler: Brawler, level: int):
+        super().__init__(user_id, brawler, level)
+
+        self.gems = 0
+        self.dropped = 0
+
+
+class ShowdownPlayer(Player):
+    """Player with Solo Showdown stats."""
+
+    __slots__ = ("powerups",)
+
+    def __init__(self, user_id: int, brawler: Brawler, level: int):
+        super().__init__(user_id, brawler, level)
+
+        self.powerups = 1
+
+
+class BrawlBallPlayer(Player):
+    """Player with Brawl Ball stats."""
+
+    __slots__ = ("goals", "progress")
+
+    def __init__(self, user_id: int, brawler: Brawler, level: int):
+        super().__init__(user_id, brawler, level)
+
+        self.goals = 0
+        self.progress = 0
+
+
+class MatchState:
+    """State of a match between two players.
+
+    Attributes
+    -------------
+    first: `Player`
+        Player who moves on even turns.
+    second: `Player`
+        Player who moves on odd turns.
+    turn: `int`
+        Current turn. Each round consists of two turns, one per player.
+    awaiting: `Optional[int]`
+        Number of moves available to the player whose turn it is, or `None`
+        if no move is expected.
+    finished: `bool`
+        Whether the match has ended.
+    winner: `Optional[Player]`
+        Winner of the match. `None` while the match is running or in case of a draw.
+    loser: `Optional[Player]`
+        Loser of the match. `None` while the match is running or in case of a draw.
+    poison_started: `bool`
+        Whether the Showdown poison has started dealing damage.
+    seed: `int`
+        Seed of `rng`.
+    rng: `random.Random`
+        Source of every random decision of the match.
+    moves: `List[int]`
+        Moves played so far, in order.
+    forfeited: `Optional[Player]`
+        Player who forfeited the match, if any.
+    """
+
+    __slots__ = (
+        "first", "second", "turn", "awaiting", "finished", "winner", "loser", "poison_started",
+        "seed", "rng", "moves", "forfeited"
+    )
+
+    def __init__(self, first: Player, second: Player, seed: int):
+        self.first = first
+        self.second = second
+
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.moves: List[int] = []
+        self.forfeited: Optional[Player] = None
+
+        self.turn = 0
+        self.awaiting: Optional[int] = None
+
+        self.finished = False
+        self.winner: Optional[Player] = None
+        self.loser: Optional[Player] = None
+
+        self.poison_started = False
+
+    def players(self) -> Tuple[Player, Player]:
+        """Return the player whose turn it is and their opponent."""
+
+        if self.turn % 2 == 0:
+            return self.first, self.second
+        return self.second, self.first
+
+
+class Engine:
+    """Base class for the rules of a game mode.
+
+    Engines don't know anything about Discord. They take a `MatchState` and
+    the move picked by the player whose turn it is, update the state and
+    return the events that happened so a front-end can display them.
+
+    A match is played like this::
+
+        first = engine.new_player(first_id, first_brawler, first_level)
+        second = engine.new_player(second_id, second_brawler, second_level)
+        state, events = engine.start(engine.new_state(first, second, seed))
+        while not state.finished:
+            # show `events`, then pick a move between 1 and `state.awaiting`
+            state, events = engine.step(state, move)
+    """
+
+    # name of the game mode
+    name = ""
+    # key of the game type in users' `brawl_stats`
+    game_type = "3v3"
+    # number of turns after which the match ends in a draw
+    max_turns = 150
+    # whether defeated players respawn
+    respawns = True
+    # class holding the stats of a player in this game mode
+    player_class = Player
+
+    def new_player(self, user_id: int, brawler: Brawler, level: int) -> Player:
+        """Return a player of this game mode."""
+
+        return self.player_class(user_id, brawler, level)
+
+    def new_state(self, first: Player, second: Player, seed: int = None) -> MatchState:
+        """Return the initial state of a match between two players.
+
+        The players must be created with `new_player`. All random decisions
+        of the match are drawn from an RNG seeded with `seed`, so the match
+        can be replayed from the seed and its moves. A random seed is used
+        if it isn't given.
+        """
+
+        if seed is None:
+            seed = random.getrandbits(64)
+
+        return MatchState(first, second, seed)
+
+    def start(self, state: MatchState) -> Tuple[MatchState, List[Event]]:
+        """Advance the match until the first move is required."""
+
+        events = []
+        self._advance(state, events)
+        return state, events
+
+    def step(self, state: MatchState, move: int) -> Tuple[MatchState, List[Event]]:
+        """Play a move for the player whose turn it is.
+
+        Raises `ValueError` if no move is expected or the move isn't available.
+        """
+
+        if state.finished or state.awaiting is None:
+            raise ValueError("No move is expected.")
+        if not 1 <= move <= state.awaiting:
+            raise ValueError(f"Move must be between 1 and {state.awaiting}.")
+
+        state.awaiting = None
+        state.moves.append(move)
+        first, second = state.players()
+        events = []
+
+        self.move_handler(move, first, second, state.turn, state.rng)
+
+        if self.after_move(state, first, second, events):
+            if self._finish_if_won(state, first, second):
+                return state, events
+
+        state.turn += 1
+        self._advance(state, events)
+
+        return state, events
+
+    def forfeit(self, state: MatchState, player: Player):
+        """End the match with the opponent of `player` as the winner."""
+
+        state.awaiting = None
+        state.finished = True
+        state.forfeited = player
+        if player is state.first:
+            state.winner, state.loser = state.second, state.first
+        else:
+            state.winner, state.loser = state.first, state.second
+
+    def random_move(self, state: MatchState, rng: random.Random) -> int:
+        """Return a random available move. Used for bot players.
+
+        `rng` must not be the match's RNG, as the moves of a replay aren't drawn again.
+        """
+
+        return rng.randint(1, state.awaiting)
+
+    def _advance(self, state: MatchState, events: List[Event]):
+        while state.turn < self.max_turns:
+            first, second = state.players()
+
+            if self.respawns and first.is_respawning:
+                events.append(Event(RESPAWNING, first, second))
+                if self._finish_if_won(state, first, second):
+                    return
+                state.turn += 1
+                continue
+
+            self.healing(state.turn, first)
+
+            if first.stunned:
+                events.append(Event(STUNNED, first, second))
+                first.stunned = False
+                state.turn += 1
+                continue
+
+            state.awaiting = self.available_moves(first, second)
+            return
+
+        state.finished = True
+        events.append(Event(TIME_UP, state.first, state.second))
+
+    def _finish_if_won(self, state: MatchState, first: Player, second: Player) -> bool:
+        result = self.check_if_win(first, second)
+        if result is False:
+            return False
+
+        state.finished = True
+        if result is not None:
+            state.winner, state.loser = result
+        return True
+
+    def check_if_win(self, first: Player, second: Player):
+        """Needs to be implemented in inherited classes.
+
+        Return a `(winner, loser)` tuple of players if the match has been won,
+        `None` in case of draws and `False` if the match hasn't ended.
+        """
+
+        return False
+
+    def available_moves(self, first: Player, second: Player) -> int:
+        """Return the number of moves `first` can choose from."""
+
+        if first.attacks >= 6:
+            first.can_super = True
+            end = 4
+        else:
+            first.can_super = False
+            end = 3
+
+        return self._spawn_move(second, end)
+
+    def _spawn_move(self, second: Player, end: int) -> int:
+        if second.spawn:
+            if second.spawn > 0:
+                end += 1
+            else:
+                second.spawn = None
+
+        return end
+
+    def after_move(
+        self, state: MatchState, first: Player, second: Player, events: List[Event]
+    ) -> bool:
+        """Apply the effects of the end of a turn.
+
+        Returns `False` if the turn ends without checking for a win.
+        """
+
+        if self.respawns and second.health <= 0:
+            self.respawning(second)
+            events.append(Event(DEFEATED, second, first))
+            return False
+
+        return True
+
+    def move_handler(
+        self, choice: int, first: Player, second: Player, round_num: int, rng: random.Random
+    ):
+        """Needs to be implemented in inherited classes."""
+
+    def _move_attack(self, first: Player, second: Player, round_num: int, rng: random.Random):
+        first.last_attack = round_num
+
+        damage = self.apply_powerups(first, first.brawler._attack(first.brawler_level, rng))
+        if not second.invincibility:
+            second.health -= damage
+            second.last_attack = round_num
+            first.attacks += 1
+        else:
+            second.invincibility = False
+
+    def _move_invinc(self, first: Player, second: Player):
+        first.invincibility = True
+        if second.invincibility:
+            second.invincibility = False
+
+    def _move_super(self, first: Player, second: Player, round_num: int, rng: random.Random):
+        first.last_attack = round_num
+
+        # Hardcoding for Leon's invisibility.
+        if first.brawler.name == "Leon":
+            first.invincibility = True
+            return
+
+        vals, first.spawn = first.brawler._ult(first.brawler_level, rng)
+        first.attacks = 0
+        if isinstance(vals, list):
+            # heal
+            first.health += self.apply_powerups(first, vals[0])
+            if first.health > first.static_health:
+                first.health = first.static_health
+
+            # hardcoding for Mortis to both
+            # deal damage and heal
+            vals = vals[0]
+            if first.brawler_name != "Mortis":
+                return
+
+        if not second.invincibility:
+            second.health -= self.apply_powerups(first, vals)
+        else:
+            second.health -= (self.apply_powerups(first, vals) * 0.5)
+            second.invincibility = False
+
+        second.last_attack = round_num
+
+        # hardcoding for Frank's stun
+        if first.brawler_name == "Frank":
+            second.stunned = True
+
+    def _move_attack_spawn(self, first: Player, second: Player, rng: random.Random):
+        second.spawn -= self.apply_powerups(first, first.brawler._attack(first.brawler_level, rng))
+
+    def _move_spawn_attack(
+        self, first: Player, second: Player, round_num: int, rng: random.Random
+    ):
+        # spawns have 50% chance of attacking/healing
+        if not rng.randint(0, 1):
+            return
+        if first.spawn:
+            vals = first.brawler._spawn(first.brawler_level, rng)
+            if isinstance(vals, list):
+                # heal
+                first.health += self.apply_powerups(first, vals[0])
+                if first.health > first.static_health:
+                    first.health = first.static_health
+            else:
+                if not second.invincibility:
+                    second.health -= self.apply_powerups(first, vals)
+                    second.last_attack = round_num
+                    first.attacks += 1
+                else:
+                    second.invincibility = False
+
+    def respawning(self, player: Player):
+        player.is_respawning = True
+        player.health = player.static_health
+
+    def healing(self, round_num: int, player: Player):
+        """Heal Player over time."""
+
+        if player.last_attack + healing_time < round_num:
+            player.health += healing_over_time
+            if player.health > player.static_health:
+                player.health = player.static_health
+
+    def apply_powerups(self, player: Player, value: int):
+        return value
+
+
+class GemGrabEngine(Engine):
+    """Rules of Gem Grab."""
+
+    name = "Gem Grab"
+    player_class = GemGrabPlayer
+
+    def check_if_win(self, first: Player, second: Player):
+        if first.gems >= 10 and second.gems < 10:
+            return first, second
+        elif second.gems >= 10 and first.gems < 10:
+            return second, first
+        elif second.gems >= 10 and first.gems >= 10:
+            return None
+        else:
+            return False
+
+    def available_moves(self, first: Player, second: Player) -> int:
+        if not second.is_respawning:
+            return super().available_moves(first, second)
+
+        return self._spawn_move(second, 3)
+
+    def after_move(
+        self, state: MatchState, first: Player, second: Player, events: List[Event]
+    ) -> bool:
+        if second.health <= 0:
+            second.dropped = ceil(second.gems * 0.5)
+            second.gems -= second.dropped
+
+        return super().after_move(state, first, second, events)
+
+    def move_handler(
+        self, choice: int, first: Player, second: Player, round_num: int, rng: random.Random
+    ):
+
+        if not second.is_respawning:
+            if choice == 1:
+                # attack
+                self._move_attack(first, second, round_num, rng)
+            elif choice == 2:
+                # collect gem
+                self._move_gem(first, second, rng)
+            elif choice == 3:
+                # invincibility
+                self._move_invinc(first, second)
+            elif choice == 4:
+                if first.can_super:
+                    # super
+                    self._move_super(first, second, round_num, rng)
+                else:
+                    # attack spawn
+                    self._move_attack_spawn(first, second, rng)
+            elif choice == 5:
+                # attack spawn
+                self._move_attack_spawn(first, second, rng)
+
+            # spawn's attack
+            self._move_spawn_attack(first, second, round_num, rng)
+
+        else:
+            second.is_respawning = False
+            if choice == 1:
+                # collect gem
+                self._move_gem(first, second, rng)
+            elif choice == 2:
+                # invincibility
+                self._move_invinc(first, second)
+            elif choice == 3:
+                # collect dropped gems
+                self._move_dropped_gems(first, second, rng)
+            elif choice == 4:
+                # attack spawn
+                self._move_attack_spawn(first, second, rng)
+
+            # spawn's attack
+            self._move_spawn_attack(first, second, round_num, rng)
+
+    def _move_gem(self, first: Player, second: Player, rng: random.Random):
+        # 0.75 of collecting one gem
+        collected_gem = rng.choice([0, 1, 1, 1])
+        first.gems += collected_gem
+        if second.invincibility:
+            second.invincibility = False
+
+    def _move_dropped_gems(self, first: Player, second: Player, rng: random.Random):
+        collected = rng.randint(0, second.dropped)
+        second.dropped = 0
+        first.gems += collected
+        if second.invincibility:
+            second.invincibility = False
+
+
+class ShowdownEngine(Engine):
+    """Rules of Solo Showdown."""
+
+    name = "Solo Showdown"
+    game_type = "solo"
+    max_turns = 100
+    respawns = False
+
+    # Poison effect starts at the 20th round.
+    # We set this variable to 40 so we can directly compare
+    # it with the turn number.
+    poison_starting = 40
+
+    # The poison damage actually appears as 200 to the user.
+    # This is because the poison_effect method is called twice
+    # before a user sees his stats again.
+    poison_damage = 100
+
+    player_class = ShowdownPlayer
+
+    def check_if_win(self, first: Player, second: Player):
+        if first.health > 0 and second.health <= 0:
+            return first, second
+        elif second.health > 0 and first.health <= 0:
+            return second, first
+        elif second.health <= 0 and first.health <= 0:
+            # draw
+            return None
+        else:
+            # continues game
+            return False
+
+    def after_move(
+        self, state: MatchState, first: Player, second: Player, events: List[Event]
+    ) -> bool:
+        # poison damage
+        self.poison_effect(state)
+        return True
+
+    def move_handler(
+        self, choice: int, first: Player, second: Player, round_num: int, rng: random.Random
+    ):
+        if choice == 1:
+            # attack
+            self._move_attack(first, second, round_num, rng)
+        elif choice == 2:
+            # collect powerup
+            self._move_powerup(first, second, round_num, rng)
+        elif choice == 3:
+            # invincibility
+            self._move_invinc(first, second)
+        elif choice == 4:
+            if first.can_super:
+                # super
+                self._move_super(first, second, round_num, rng)
+            else:
+                # attack spawn
+                self._move_attack_spawn(first, second, rng)
+        elif choice == 5:
+            # attack spawn
+            self._move_attack_spawn(first, second, rng)
+
+        # spawn's attack
+        self._move_spawn_attack(first, second, round_num, rng)
+
+    def _move_powerup(self, first: Player, second: Player, round_num: int, rng: random.Random):
+        first.last_attack = round_num
+
+        # 0.5 of collecting powerup
+        collected_powerup = rng.choice([0, 1])
+        first.powerups += collected_powerup
+        if collected_powerup:
+            self.buff_health(first)
+        if second.invincibility:
+            second.invincibility = False
+
+    def buff_health(self, player: Player):
+        player.static_health += 400
+        player.health += 400
+
+    def apply_powerups(self, player: Player, value: int):
+        # 10% increase per powerup
+        for _ in range(1, player.powerups):
+            value += round(value * 0.1)
+
+        return value
+
+    def poison_effect(self, state: MatchState):
+        if state.turn >= self.poison_starting:
+            state.poison_started = True
+            state.first.health -= self.poison_damage
+            state.second.health -= self.poison_damage
+
+
+class BrawlBallEngine(Engine):
+    """Rules of Brawl Ball."""
+
+    name = "Brawl Ball"
+    player_class = BrawlBallPlayer
+
+    def check_if_win(self, first: Player, second: Player):
+        if first.goals == 2:
+            return first, second
+        elif second.goals == 2:
+            return second, first
+        else:
+            return False
+
+    def available_moves(self, first: Player, second: Player) -> int:
+        if not second.is_respawning:
+            return super().available_moves(first, second)
+
+        return self._spawn_move(second, 2)
+
+    def move_handler(
+        self, choice: int, first: Player, second: Player, round_num: int, rng: random.Random
+    ):
+
+        if not second.is_respawning:
+            if choice == 1:
+                # attack
+                self._move_attack(first, second, round_num, rng)
+            elif choice == 2:
+                # kick ball
+                self._move_kick(first, second, rng)
+            elif choice == 3:
+                # invincibility
+                self._move_invinc(first, second)
+            elif choice == 4:
+                if first.can_super:
+                    # super
+                    self._move_super(first, second, round_num, rng)
+                else:
+                    # attack spawn
+                    self._move_attack_spawn(first, second, rng)
+            elif choice == 5:
+                # attack spawn
+                self._move_attack_spawn(first, second, rng)
+
+            # spawn's attack
+            self._move_spawn_attack(first, second, round_num, rng)
+
+        else:
+            second.is_respawning = False
+            if choice == 1:
+                # kick ball
+                self._move_kick(first, second, rng)
+            elif choice == 2:
+                # invincibility
+                self._move_invinc(first, second)
+            elif choice == 3:
+                # attack spawn
+                self._move_attack_spawn(first, second, rng)
+
+            # spawn's attack
+            self._move_spawn_attack(first, second, round_num, rng)
+
+    def _move_kick(self, first: Player, second: Player, rng: random.Random):
+        if second.is_respawning:
+            # 0.50 chance of scoring a goal
+            goal = rng.choice([0, 1])
+        else:
+            # 0.10 chance of scoring a goal
+            goal = rng.choices([0, 1], [0.9, 0.1], k=1)[0]
+        if first.can_super and not goal:
+            # 0.40 chance of scoring
+            goal = rng.choices([0, 1], [0.6, 0.4], k=1)[0]
+        first.goals += goal
+        if second.invincibility:
+            second.invincibility = False
+
+
+engines_map = {
+    "Gem Grab": GemGrabEngine,
+    "Solo Showdown": ShowdownEngine,
+    "Brawl Ball": BrawlBallEngine
+}
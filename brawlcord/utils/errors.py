@@ -15,3 +15,7 @@ class AmbiguityError(Exception):
 
 class CancellationError(Exception):
     """Raised when user cancels creation of something."""
+
+
+class SessionLimitReached(Exception):
+    """Raised when the highest number of concurrent brawls is reached."""
@@ -1,7 +1,6 @@
 import asyncio
 import random
-from math import ceil
-from typing import Union
+from typing import Dict, List, Union
 
 import discord
 from redbot.core import Config
@@ -9,97 +8,45 @@ from redbot.core.commands.context import Context
 from redbot.core.utils.menus import start_adding_reactions
 from redbot.core.utils.predicates import ReactionPredicate
 
-from .battlelog import PartialBattleLogEntry
-from .brawlers import Brawler, brawlers_map
+from .battlelog import DEFAULT_LOG_LIMIT, PartialBattleLogEntry, push_log_entry
+from .brawlers import Brawler, BrawlerRegistry
+from .dispatcher import REACTION_EVENTS, ReactionDispatcher
 from .emojis import brawler_emojis, emojis, gamemode_emotes
+from .engine import (
+    DEFEATED,
+    RESPAWNING,
+    STUNNED,
+    TIME_UP,
+    BrawlBallEngine,
+    Engine,
+    Event,
+    GemGrabEngine,
+    Player,
+    ShowdownEngine,
+)
 from .errors import UserRejected
-
-spawn_text = {
-    "Nita": "Bear",
-    "Penny": "Cannon",
-    "Jessie": "Turrent",
-    "Pam": "Healing Station",
-    "8-Bit": "Turret"
-}
-
-healing_over_time = 100
-healing_time = 3
+from .live import LiveMessage
+from .outbox import Outbox, RequestCount
+from .replay import Replay
 
 DEFAULT_COLOR = 0xADFF74
 RESPAWN_COLOR = 0xFF7474
 SUPER_COLOR = 0xFFA232
 POISON_COLOR = 0x659146
 
+# highest number of moves a player can choose from
+MAX_MOVES = 5
 
-class Player:
-    """A class for Player data and stats."""
-
-    def __init__(self, user: discord.User, brawler: Brawler, level: int):
-        self.player = user
-
-        self.attacks = 0
-
-        self.invincibility = False
-
-        self.respawning = None
-        self.is_respawning = False
-
-        self.spawn = None
-
-        self.brawler = brawler
-        self.brawler_name = brawler.name
-        self.brawler_level = level
-
-        self.static_health = self.brawler._health(self.brawler_level)
-        self.health = self.static_health
 
-        self.can_super = False
-
-        # round number when last attacked opponent
-        # or got attacked by the opponent
-        self.last_attack = -1
-
-        self.stunned = False
-
-        try:
-            self.spawn_str: str = spawn_text[self.brawler_name]
-        except KeyError:
-            self.spawn_str = ""
-
-    # We have these functions here because of type hinting.
-    # There is no other reason for them to exist here instead of
-    # in the game mode classes.
-    def gemgrab(self):
-        self.gems = 0
-        self.dropped = 0
-
-    def showdown(self):
-        self.powerups = 1
-
-    def brawlball(self):
-        self.goals = 0
-        self.progress = 0
-
-    def _to_json(self) -> dict:
-        """Return a dict with player data"""
-
-        return {
-            "player": self.player,
-            "brawler": self.brawler,
-            "brawler_name": self.brawler_name,
-            "brawler_level": self.brawler_level,
-            "attacks": self.attacks,
-            "invincibility": self.invincibility,
-            "respawning": self.respawning,
-            "spawn": self.spawn,
-            "static_health": self.static_health,
-            "health": self.health,
-            "spawn_str": self.spawn_str
-        }
+class GameMode:
+    """Base class for game modes.
 
+    The rules of the game are implemented by the `Engine` set as `engine_class`.
+    Game mode classes only handle the challenge, ask players for their moves
+    and send the events returned by the engine to the players.
+    """
 
-class GameMode:
-    """Base class for game modes."""
+    engine_class = Engine
 
     def __init__(
         self,
@@ -107,7 +54,13 @@ class GameMode:
         user: discord.User,
         opponent: discord.User,
         conf: Config,
-        brawlers: dict
+        brawlers: BrawlerRegistry,
+        dispatcher: ReactionDispatcher,
+        outbox: Outbox,
+        log_limit: int = DEFAULT_LOG_LIMIT,
+        seed: int = None,
+        live: bool = False,
+        challenge: bool = True
     ):
         # defining class variables
 
@@ -118,6 +71,47 @@ class GameMode:
         self.conf = conf
         self.guild = ctx.guild
         self.BRAWLERS = brawlers
+        # routes reactions on the brawl's messages
+        self.dispatcher = dispatcher
+        # queues the brawl's direct messages
+        self.outbox = outbox
+        # direct messages of the brawl and the requests made to send them
+        self.requests = RequestCount()
+
+        # maximum number of entries kept in partial battle logs
+        self.log_limit = log_limit
+
+        # source of the random decisions made outside of the engine,
+        # the match itself uses the RNG of its state
+        self.rng = random.Random(seed)
+
+        self.engine: Engine = self.engine_class()
+        self.state = None
+        # users playing the match, by ID
+        self.users: Dict[int, discord.User] = {}
+
+        # whether the opponent has to accept the brawl, players paired by
+        # matchmaking already agreed to play
+        self.challenge = challenge
+
+        # whether each player gets a single message which is edited every turn
+        self.live = live
+        self.live_messages: Dict[int, LiveMessage] = {}
+        # notes about the events since a player's message was last updated
+        self.notes: Dict[int, List[str]] = {}
+
+    @property
+    def first(self) -> Player:
+        return self.state.first
+
+    @property
+    def second(self) -> Player:
+        return self.state.second
+
+    def user_of(self, player: Player) -> discord.User:
+        """Get the user playing as `player`."""
+
+        return self.users[player.user_id]
 
     async def initialize(self, ctx: Context):
         user = self.user
@@ -132,14 +126,14 @@ class GameMode:
         gamemode = await self.get_player_stat(
             user, "selected", is_iter=True, substat="gamemode")
 
-        ub: Brawler = brawlers_map[user_brawler](self.BRAWLERS, user_brawler)
+        ub: Brawler = self.BRAWLERS[user_brawler]
 
         if opponent:
             opp_brawler = await self.get_player_stat(
                 opponent, "selected", is_iter=True, substat="brawler")
-            # opp_data = await self.get_player_stat(
-            #     opponent, "brawlers", is_iter=True, substat=opp_brawler)
-            opp_brawler_level = brawler_data['level']
+            opp_data = await self.get_player_stat(
+                opponent, "brawlers", is_iter=True, substat=opp_brawler)
+            opp_brawler_level = opp_data['level']
 
         else:
             opponent = self.guild.me
@@ -149,13 +143,16 @@ class GameMode:
                 opp_brawler_sp
             ) = self.matchmaking(user_brawler_level)
 
-        ob: Brawler = brawlers_map[opp_brawler](self.BRAWLERS, opp_brawler)
+        ob: Brawler = self.BRAWLERS[opp_brawler]
 
-        if opponent != self.guild.me:
+        if opponent != self.guild.me and self.challenge:
             if user != self.guild.me:
                 try:
-                    msg = await user.send(
-                        f"Waiting for {opponent} to accept the challenge."
+                    msg = await self.outbox.send(
+                        user,
+                        f"Waiting for {opponent} to accept the challenge.",
+                        count=self.requests,
+                        immediate=True
                     )
                 except discord.Forbidden:
                     await ctx.send(
@@ -165,9 +162,12 @@ class GameMode:
                     )
                     raise
             try:
-                msg = await opponent.send(
+                msg = await self.outbox.send(
+                    opponent,
                     f"{user} has challenged you for a brawl."
-                    f" Game Mode: **{gamemode}**. Accept?"
+                    f" Game Mode: **{gamemode}**. Accept?",
+                    count=self.requests,
+                    immediate=True
                 )
             except discord.Forbidden:
                 await ctx.send(
@@ -178,10 +178,11 @@ class GameMode:
                 raise
 
             start_adding_reactions(msg, ReactionPredicate.YES_OR_NO_EMOJIS)
+            self.count_reactions(len(ReactionPredicate.YES_OR_NO_EMOJIS))
 
             pred = ReactionPredicate.yes_or_no(msg, opponent)
             try:
-                await ctx.bot.wait_for("reaction_add", check=pred, timeout=30)
+                await self.dispatcher.wait(msg, pred, timeout=30)
             except asyncio.TimeoutError:
                 await ctx.send(
                     f"{user.mention} {opponent.mention} Brawl cancelled."
@@ -200,20 +201,153 @@ class GameMode:
                 )
                 raise UserRejected
 
-        first_move_chance = random.randint(1, 2)
+        first_move_chance = self.rng.randint(1, 2)
+
+        self.users = {user.id: user, opponent.id: opponent}
 
+        new_player = self.engine.new_player
         if first_move_chance == 1:
-            self.first = Player(user, ub, user_brawler_level)
-            self.second = Player(opponent, ob, opp_brawler_level)
+            first = new_player(user.id, ub, user_brawler_level)
+            second = new_player(opponent.id, ob, opp_brawler_level)
         else:
-            self.first = Player(opponent, ob, opp_brawler_level)
-            self.second = Player(user, ub, user_brawler_level)
+            first = new_player(opponent.id, ob, opp_brawler_level)
+            second = new_player(user.id, ub, user_brawler_level)
 
-        return self.first.player, self.second.player
+        self.state = self.engine.new_state(first, second, self.rng.getrandbits(64))
+
+        return self.user_of(self.first), self.user_of(self.second)
 
     async def play(self, ctx: Context) -> (discord.User, discord.User):
         """Begins the game"""
-        pass
+
+        state, events = self.engine.start(self.state)
+        while True:
+            await self.send_events(events)
+            if state.finished:
+                break
+
+            first, second = state.players()
+            user, opponent = self.user_of(first), self.user_of(second)
+
+            if self.live:
+                if second.user_id != self.guild.me.id:
+                    await self.update_live_message(ctx, second, first, waiting=True)
+            else:
+                await self.send_waiting_message(ctx, user, opponent)
+
+            if first.user_id != self.guild.me.id:
+                try:
+                    if self.live:
+                        choice = await self.get_live_choice(ctx, state.awaiting, first, second)
+                    else:
+                        embed = await self.set_embed(ctx, first, second)
+                        choice = await self.get_user_choice(
+                            ctx, embed, state.awaiting, user, opponent)
+                except asyncio.TimeoutError:
+                    self.engine.forfeit(state, first)
+                    break
+            else:
+                # develop bot logic
+                choice = self.engine.random_move(state, self.rng)
+
+            state, events = self.engine.step(state, choice)
+
+        if self.live:
+            await self.finish_live_messages(ctx)
+            for live in self.live_messages.values():
+                self.requests.messages += live.updates
+                self.requests.requests += live.requests
+
+        return await self.end_match()
+
+    async def auto_play(self, ctx: Context) -> (discord.User, discord.User):
+        """Play the whole match at once against the bot.
+
+        Both players pick their moves like the bot does and nothing is sent
+        to the players during the match.
+        """
+
+        if self.guild.me.id not in self.users:
+            raise ValueError("Only matches against the bot can be auto played.")
+
+        state, _ = self.engine.start(self.state)
+        while not state.finished:
+            state, _ = self.engine.step(state, self.engine.random_move(state, self.rng))
+
+        return await self.end_match()
+
+    async def end_match(self) -> (discord.User, discord.User):
+        """Update the stats and battle logs of the players once the match has finished."""
+
+        state = self.state
+        if state.winner:
+            winner, loser = self.user_of(state.winner), self.user_of(state.loser)
+        else:
+            # winner and loser are "None" when draw
+            winner, loser = None, None
+
+        await self.update_stats(winner, loser, game_type=self.engine.game_type)
+        await self.save_partial_log(winner, loser, self.engine.name)
+
+        return winner, loser
+
+    async def summary_embed(self, ctx: Context, user: discord.User) -> discord.Embed:
+        """Get an embed showing the final state of the match from the side of `user`."""
+
+        if self.first.user_id == user.id:
+            player, opponent = self.first, self.second
+        else:
+            player, opponent = self.second, self.first
+
+        embed = await self.set_embed(ctx, player, opponent)
+        # remove the available moves
+        embed.remove_field(len(embed.fields) - 1)
+
+        if self.state.winner is None:
+            result = "Draw"
+        elif self.state.winner is player:
+            result = "Victory"
+        else:
+            result = "Loss"
+        embed.set_footer(text=f"{result} in {len(self.state.moves)} moves.")
+
+        return embed
+
+    async def send_events(self, events: List[Event]):
+        """Send the events of the last turns to the players."""
+
+        for event in events:
+            if event.kind == RESPAWNING:
+                await self.notify(event.player, "You are respawning!")
+            elif event.kind == STUNNED:
+                await self.handle_stun(event.player, event.other)
+            elif event.kind == DEFEATED:
+                await self.notify(event.other, "Opponent defeated! Respawning next round.")
+                await self.notify(event.player, "You are defeated! Respawning next round.")
+            elif event.kind == TIME_UP:
+                await self.time_up()
+
+    async def notify(self, player: Player, text: str):
+        """Tell a player about an event of the match.
+
+        In live mode, the text is shown on the player's next message update
+        instead of being sent in a new message. Otherwise, it is queued in the
+        outbox and merged with the player's next messages.
+        """
+
+        if player.user_id == self.guild.me.id:
+            return
+
+        if self.live:
+            self.notes.setdefault(player.user_id, []).append(text)
+        else:
+            self.outbox.send(self.user_of(player), text, count=self.requests)
+
+    def count_reactions(self, reactions: int):
+        """Count reactions added to the brawl's messages as requests."""
+
+        self.requests.messages += reactions
+        self.requests.requests += reactions
 
     async def get_player_stat(
         self,
@@ -224,26 +358,24 @@ class GameMode:
     ):
         """Get stats of a player."""
 
-        if not is_iter:
-            return await getattr(self.conf(user), stat)()
+        value = await getattr(self.conf(user), stat)()
 
-        async with getattr(self.conf(user), stat)() as stat:
-            if not substat:
-                return stat
-            else:
-                return stat[substat]
+        if is_iter and substat:
+            value = value[substat]
+
+        return value
 
     def matchmaking(self, brawler_level: int):
         """Get an opponent!"""
 
-        opp_brawler = random.choice(list(self.BRAWLERS))
+        opp_brawler = self.rng.choice(list(self.BRAWLERS))
 
-        opp_brawler_level = random.randint(brawler_level-1, brawler_level+1)
+        opp_brawler_level = self.rng.randint(brawler_level-1, brawler_level+1)
         opp_brawler_sp = None
 
         if opp_brawler_level > 10:
             opp_brawler_level = 10
-            opp_brawler_sp = random.randint(1, 2)
+            opp_brawler_sp = self.rng.randint(1, 2)
 
         if opp_brawler_level < 1:
             opp_brawler_level = 1
@@ -251,20 +383,92 @@ class GameMode:
         return opp_brawler, opp_brawler_level, opp_brawler_sp
 
     async def send_waiting_message(self, ctx, first_player, second_player):
-        """Send the waiting message to the second player."""
+        """Queue the waiting message to the second player.
+
+        The message isn't waited for. If the player can't be DMed, the brawl
+        is cancelled when their moves are sent to them. Nothing is sent while
+        the bot picks its move, as it doesn't keep anyone waiting.
+        """
+
+        if self.guild.me not in (first_player, second_player):
+            self.outbox.send(
+                second_player, "Waiting for opponent to pick a move...", count=self.requests
+            )
+
+    async def update_live_message(
+        self, ctx: Context, player: Player, opponent: Player, waiting=False, ended=False
+    ) -> LiveMessage:
+        """Schedule an update of the live message of `player`.
+
+        The message shows the match from the player's side, with the available
+        moves or a waiting notice, and the events since the last update.
+        """
+
+        embed = await self.set_embed(ctx, player, opponent)
+        if waiting or ended:
+            # remove the available moves
+            embed.remove_field(len(embed.fields) - 1)
+            if ended:
+                embed.set_footer(text="The match has ended.")
+            else:
+                embed.set_footer(text="Waiting for opponent to pick a move...")
+
+        notes = self.notes.pop(player.user_id, [])
+
+        try:
+            live = self.live_messages[player.user_id]
+        except KeyError:
+            live = self.live_messages[player.user_id] = LiveMessage(self.user_of(player))
+        live.update(content="\n".join(notes) or None, embed=embed)
+
+        return live
+
+    async def get_live_choice(self, ctx: Context, end: int, first: Player, second: Player):
+        """Get the move of `first` from reactions on their live message.
 
-        if second_player != self.guild.me:
+        Reactions are only added once. As the bot can't remove the reactions
+        of users in DMs, both adding and removing a reaction pick a move.
+        """
+
+        user = self.user_of(first)
+        live = await self.update_live_message(ctx, first, second)
+        try:
+            await live.wait()
+        except discord.Forbidden:
+            opponent = self.user_of(second)
+            await ctx.send(
+                f"{user.mention} {opponent.mention}"
+                f" Reason: Unable to DM {user.name}."
+                " DMs are required to brawl!"
+            )
+            raise
+
+        if not live.reactions:
+            live.add_reactions(ReactionPredicate.NUMBER_EMOJIS[1:MAX_MOVES+1])
+
+        react_emojis = ReactionPredicate.NUMBER_EMOJIS[1:end+1]
+        pred = ReactionPredicate.with_emojis(react_emojis, live.message, user)
+        try:
+            await self.dispatcher.wait(live.message, pred, timeout=30, events=REACTION_EVENTS)
+        except asyncio.TimeoutError:
+            await ctx.send(f"{user.name} took too long to respond.")
+            raise
+
+        # pred.result is the index of the number in `emojis`
+        return pred.result + 1
+
+    async def finish_live_messages(self, ctx: Context):
+        """Show the final state of the match on the live messages."""
+
+        for player, opponent in ((self.first, self.second), (self.second, self.first)):
+            if player.user_id != self.guild.me.id:
+                await self.update_live_message(ctx, player, opponent, ended=True)
+
+        for live in self.live_messages.values():
             try:
-                await second_player.send(
-                    "Waiting for opponent to pick a move..."
-                )
-            except discord.Forbidden:
-                await ctx.send(
-                    f"{first_player.mention} {second_player.mention} Brawl"
-                    f" cancelled. Reason: Unable to DM {second_player.name}."
-                    " DMs are required to brawl!"
-                )
-                raise
+                await live.wait()
+            except discord.HTTPException:
+                pass
 
     async def update_stats(
         self, winner: discord.User, loser: discord.User, game_type="3v3"
@@ -280,12 +484,6 @@ class GameMode:
         async with self.conf(loser).brawl_stats() as brawl_stats:
             brawl_stats[game_type][1] += 1
 
-    def check_if_win(self, first: Player, second: Player):
-        """Needs to be implemented in inherited classes.
-
-        `None` is expected in case of draws. `False` if game hasn't ended.
-        """
-
     async def set_embed(self, ctx: Context, first: Player, second: Player):
         if first.can_super:
             self_super_emote = emojis['superready']
@@ -306,11 +504,10 @@ class GameMode:
 
         embed = discord.Embed(
             color=color,
-            title=f"Brawl against {second.player.name}"
-        )
-        embed.set_author(
-            name=first.player.name, icon_url=first.player.avatar_url
+            title=f"Brawl against {self.user_of(second).name}"
         )
+        user = self.user_of(first)
+        embed.set_author(name=user.name, icon_url=user.avatar_url)
 
         embed = self.set_embed_fields(embed, first, self_super_emote, False)
 
@@ -329,13 +526,14 @@ class GameMode:
         self, ctx: Context, embed, end, first_player, second_player
     ):
         try:
-            msg = await first_player.send(embed=embed)
+            msg = await self.outbox.send(first_player, embed=embed, count=self.requests)
 
             react_emojis = ReactionPredicate.NUMBER_EMOJIS[1:end+1]
             start_adding_reactions(msg, react_emojis)
+            self.count_reactions(len(react_emojis))
 
             pred = ReactionPredicate.with_emojis(react_emojis, msg)
-            await ctx.bot.wait_for("reaction_add", check=pred, timeout=30)
+            await self.dispatcher.wait(msg, pred, timeout=30)
 
             # pred.result is  the index of the number in `emojis`
             return pred.result + 1
@@ -350,89 +548,6 @@ class GameMode:
             )
             raise
 
-    def move_handler(
-        self, choice: int, first: Player, second: Player, round_num: int
-    ):
-        """Needs to be implemented in inherited classes."""
-
-    def _move_attack(self, first: Player, second: Player, round_num: int):
-        first.last_attack = round_num
-
-        damage = self.apply_powerups(first, first.brawler._attack(first.brawler_level))
-        if not second.invincibility:
-            second.health -= damage
-            second.last_attack = round_num
-            first.attacks += 1
-        else:
-            second.invincibility = False
-
-    def _move_invinc(self, first: Player, second: Player):
-        first.invincibility = True
-        if second.invincibility:
-            second.invincibility = False
-
-    def _move_super(self, first: Player, second: Player, round_num: int):
-        first.last_attack = round_num
-
-        # Hardcoding for Leon's invisibility.
-        if first.brawler.name == "Leon":
-            first.invincibility = True
-            return
-
-        vals, first.spawn = first.brawler._ult(first.brawler_level)
-        first.attacks = 0
-        if isinstance(vals, list):
-            # heal
-            first.health += self.apply_powerups(first, vals[0])
-            if first.health > first.static_health:
-                first.health = first.static_health
-
-            # hardcoding for Mortis to both
-            # deal damage and heal
-            vals = vals[0]
-            if first.brawler_name != "Mortis":
-                return
-
-        if not second.invincibility:
-            second.health -= self.apply_powerups(first, vals)
-        else:
-            second.health -= (self.apply_powerups(first, vals) * 0.5)
-            second.invincibility = False
-
-        second.last_attack = round_num
-
-        # hardcoding for Frank's stun
-        if first.brawler_name == "Frank":
-            second.stunned = True
-
-    def _move_attack_spawn(self, first: Player, second: Player):
-        second.spawn -= self.apply_powerups(first, first.brawler._attack(first.brawler_level))
-
-    def _move_spawn_attack(
-        self, first: Player, second: Player, round_num: int
-    ):
-        # spawns have 50% chance of attacking/healing
-        if not random.randint(0, 1):
-            return
-        if first.spawn:
-            vals = first.brawler._spawn(first.brawler_level)
-            if isinstance(vals, list):
-                # heal
-                first.health += self.apply_powerups(first, vals[0])
-                if first.health > first.static_health:
-                    first.health = first.static_health
-            else:
-                if not second.invincibility:
-                    second.health -= self.apply_powerups(first, vals)
-                    second.last_attack = round_num
-                    first.attacks += 1
-                else:
-                    second.invincibility = False
-
-    def respawning(self, player: Player):
-        player.is_respawning = True
-        player.health = player.static_health
-
     def initial_fields(
         self,
         embed: discord.Embed,
@@ -482,50 +597,15 @@ class GameMode:
 
         return embed
 
-    async def time_up(self, winner, loser):
-        if winner is False:
-            # winner and loser are "None" when draw
-            winner = None
-            loser = None
-
-            try:
-                await self.first.player.send(
-                    f"Time's up. Match ended in a draw."
-                )
-            except AttributeError:
-                pass  # bot user
-            try:
-                await self.second.player.send(
-                    f"Time's up. Match ended in a draw."
-                )
-            except AttributeError:
-                pass  # bot user
-
-        return winner, loser
-
-    def healing(self, round_num: int, player: Player):
-        """Heal Player over time."""
-
-        if player.last_attack + healing_time < round_num:
-            player.health += healing_over_time
-            if player.health > player.static_health:
-                player.health = player.static_health
+    async def time_up(self):
+        await self.notify(self.first, "Time's up. Match ended in a draw.")
+        await self.notify(self.second, "Time's up. Match ended in a draw.")
 
     async def handle_stun(self, stunned: Player, other: Player):
-        """Send stun messages and set stun to False."""
-
-        if stunned.player != self.guild.me:
-            await stunned.player.send(
-                "**You are stunned!**"
-            )
-
-        if other.player != self.guild.me:
-            await other.player.send("**Opponent is stunned!**")
+        """Send stun messages."""
 
-        stunned.stunned = False
-
-    def apply_powerups(self, player: Player, value: int):
-        return value
+        await self.notify(stunned, "**You are stunned!**")
+        await self.notify(other, "**Opponent is stunned!**")
 
     async def save_partial_log(
         self, winner: Union[Player, bool], loser: Union[Player, bool], game_mode: str
@@ -537,7 +617,7 @@ class GameMode:
         second = None
         second_result = None
         if winner:
-            if winner == self.first.player:
+            if winner.id == self.first.user_id:
                 first = self.first
                 second = self.second
                 first_result = True
@@ -553,153 +633,29 @@ class GameMode:
             first_result = None
             second_result = None
 
-        if self.guild.me.id != first.player.id:
+        replay = Replay.from_state(game_mode, self.state).to_json()
+
+        if self.guild.me.id != first.user_id:
             partial_log_first = PartialBattleLogEntry(
-                first, second, game_mode, first_result
+                first, second, game_mode, first_result, replay
             ).to_json()
 
-            async with self.conf(first.player).partial_battle_log() as partial_battle_log:
-                partial_battle_log.append(partial_log_first)
+            async with self.conf(self.user_of(first)).partial_battle_log() as partial_battle_log:
+                push_log_entry(partial_battle_log, partial_log_first, self.log_limit)
 
-        if self.guild.me.id != second.player.id:
+        if self.guild.me.id != second.user_id:
             partial_log_second = PartialBattleLogEntry(
-                second, first, game_mode, second_result
+                second, first, game_mode, second_result, replay
             ).to_json()
 
-            async with self.conf(second.player).partial_battle_log() as partial_battle_log:
-                partial_battle_log.append(partial_log_second)
+            async with self.conf(self.user_of(second)).partial_battle_log() as partial_battle_log:
+                push_log_entry(partial_battle_log, partial_log_second, self.log_limit)
 
 
 class GemGrab(GameMode):
     """Class to represent Gem Grab."""
 
-    def __init__(self, ctx, user, opponent, conf, brawlers):
-        super().__init__(ctx, user, opponent, conf, brawlers)
-
-    async def initialize(self, ctx):
-        first, second = await super().initialize(ctx)
-
-        self.first.gemgrab()
-        self.second.gemgrab()
-
-        return first, second
-
-    async def play(self, ctx: Context) -> (discord.User, discord.User):
-        """Function to run the game"""
-
-        i = 0
-        while i < 150:
-            # game ends after 75th round
-            if i % 2 == 0:
-                first = self.first
-                second = self.second
-            else:
-                first = self.second
-                second = self.first
-
-            if first.is_respawning:
-                try:
-                    await first.player.send("You are respawning!")
-                except AttributeError:
-                    pass
-            else:
-                self.healing(i, first)
-                if first.stunned:
-                    await self.handle_stun(first, second)
-                    i += 1
-                    continue
-
-                try:
-                    await self.send_waiting_message(
-                        ctx, first.player, second.player
-                    )
-                except discord.Forbidden:
-                    raise
-
-                if not second.is_respawning:
-                    if first.attacks >= 6:
-                        first.can_super = True
-                        end = 4
-                    else:
-                        first.can_super = False
-                        end = 3
-                else:
-                    end = 3
-
-                if second.spawn:
-                    if second.spawn > 0:
-                        end += 1
-                    else:
-                        second.spawn = None
-
-                if first.player != self.guild.me:
-                    embed = await self.set_embed(ctx, first, second)
-                    try:
-                        choice = await self.get_user_choice(
-                            ctx, embed, end, first.player, second.player)
-                    except asyncio.TimeoutError:
-                        winner, loser = second.player, first.player
-                        break
-                else:
-                    # develop bot logic
-                    choice = random.randint(1, end)
-
-                self.move_handler(choice, first, second, i)
-
-                if second.health <= 0:
-                    self.respawning(second)
-                    second.dropped = ceil(second.gems * 0.5)
-                    second.gems -= second.dropped
-
-                    try:
-                        await first.player.send(
-                            f"Opponent defeated! Respawning next round."
-                        )
-                    except AttributeError:
-                        pass  # bot user
-                    try:
-                        await second.player.send(
-                            f"You are defeated! Respawning next round."
-                        )
-                    except AttributeError:
-                        pass  # bot user
-
-                    # go to next loop
-                    i += 1
-                    continue
-
-            winner, loser = self.check_if_win(first, second)
-
-            if winner is False:
-                pass
-            else:
-                break
-            # go to next loop
-            i += 1
-
-        # time up
-        winner, loser = await self.time_up(winner, loser)
-
-        await self.update_stats(winner, loser)
-        await self.save_partial_log(winner, loser, "Gem Grab")
-
-        return winner, loser
-
-    def check_if_win(self, first: Player, second: Player):
-        if first.gems >= 10 and second.gems < 10:
-            winner = first.player
-            loser = second.player
-        elif second.gems >= 10 and first.gems < 10:
-            winner = second.player
-            loser = first.player
-        elif second.gems >= 10 and first.gems >= 10:
-            winner = None
-            loser = None
-        else:
-            winner = False
-            loser = False
-
-        return winner, loser
+    engine_class = GemGrabEngine
 
     def moves_str(self, first: Player, second: Player):
         if not second.is_respawning:
@@ -766,66 +722,6 @@ class GemGrab(GameMode):
 
         return embed
 
-    def move_handler(
-        self, choice: int, first: Player, second: Player, round_num: int
-    ):
-
-        if not second.is_respawning:
-            if choice == 1:
-                # attack
-                self._move_attack(first, second, round_num)
-            elif choice == 2:
-                # collect gem
-                self._move_gem(first, second)
-            elif choice == 3:
-                # invincibility
-                self._move_invinc(first, second)
-            elif choice == 4:
-                if first.can_super:
-                    # super
-                    self._move_super(first, second, round_num)
-                else:
-                    # attack spawn
-                    self._move_attack_spawn(first, second)
-            elif choice == 5:
-                # attack spawn
-                self._move_attack_spawn(first, second)
-
-            # spawn's attack
-            self._move_spawn_attack(first, second, round_num)
-
-        else:
-            second.is_respawning = False
-            if choice == 1:
-                # collect gem
-                self._move_gem(first, second)
-            elif choice == 2:
-                # invincibility
-                self._move_invinc(first, second)
-            elif choice == 3:
-                # collect dropped gems
-                self._move_dropped_gems(first, second)
-            elif choice == 4:
-                # attack spawn
-                self._move_attack_spawn(first, second)
-
-            # spawn's attack
-            self._move_spawn_attack(first, second, round_num)
-
-    def _move_gem(self, first: Player, second: Player):
-        # 0.75 of collecting one gem
-        collected_gem = random.choice([0, 1, 1, 1])
-        first.gems += collected_gem
-        if second.invincibility:
-            second.invincibility = False
-
-    def _move_dropped_gems(self, first: Player, second: Player):
-        collected = random.randint(0, second.dropped)
-        second.dropped = 0
-        first.gems += collected
-        if second.invincibility:
-            second.invincibility = False
-
 
 class Showdown(GameMode):
     """Class to represent Solo Showdown.
@@ -833,124 +729,7 @@ class Showdown(GameMode):
     It will be changed in the future to serve as a base for both Solo and Duo.
     """
 
-    def __init__(self, ctx, user, opponent, conf, brawlers):
-        super().__init__(ctx, user, opponent, conf, brawlers)
-
-        # Poison effect starts at the 20th round.
-        # We set this variable to 40 so we can directly compare
-        # it with `i` (the loop variable using in Showdown.play).
-        self.poison_starting = 40
-
-        # The poison damage actually appears as 200 to the user.
-        # This is because the poison_effect method is called twice
-        # before a user sees his stats again.
-        self.poison_damage = 100
-
-        # This is useful when checking for poison in the embed setup method.
-        # Currently, it gets set to `True` each time the condition in `poison_effect`
-        # method evaluates to `True`.
-        self.poison_started = False
-
-    async def initialize(self, ctx):
-        first, second = await super().initialize(ctx)
-
-        self.first.showdown()
-        self.second.showdown()
-
-        return first, second
-
-    async def play(self, ctx: Context) -> (discord.User, discord.User):
-        """Function to run the game"""
-
-        i = 0
-        # Game ends after 50th round.
-        while i < 100:
-            if i % 2 == 0:
-                first = self.first
-                second = self.second
-            else:
-                first = self.second
-                second = self.first
-
-            self.healing(i, first)
-
-            # check for stun
-            if first.stunned:
-                await self.handle_stun(first, second)
-                i += 1
-                continue
-
-            try:
-                await self.send_waiting_message(
-                    ctx, first.player, second.player
-                )
-            except discord.Forbidden:
-                raise
-
-            if first.attacks >= 6:
-                first.can_super = True
-                end = 4
-            else:
-                first.can_super = False
-                end = 3
-
-            if second.spawn:
-                if second.spawn > 0:
-                    end += 1
-                else:
-                    second.spawn = None
-
-            if first.player != self.guild.me:
-                embed = await self.set_embed(ctx, first, second)
-                try:
-                    choice = await self.get_user_choice(
-                        ctx, embed, end, first.player, second.player)
-                except asyncio.TimeoutError:
-                    winner, loser = second.player, first.player
-                    break
-            else:
-                # develop bot logic
-                choice = random.randint(1, end)
-
-            self.move_handler(choice, first, second, i)
-
-            # poison damage
-            self.poison_effect(i)
-
-            winner, loser = self.check_if_win(first, second)
-
-            if winner is False:
-                pass
-            else:
-                break
-            # go to next loop
-            i += 1
-
-        # time up
-        winner, loser = await self.time_up(winner, loser)
-
-        await self.update_stats(winner, loser, game_type='solo')
-        await self.save_partial_log(winner, loser, "Solo Showdown")
-
-        return winner, loser
-
-    def check_if_win(self, first: Player, second: Player):
-        if first.health > 0 and second.health <= 0:
-            winner = first.player
-            loser = second.player
-        elif second.health > 0 and first.health <= 0:
-            winner = second.player
-            loser = first.player
-        elif second.health <= 0 and first.health <= 0:
-            # draw
-            winner = None
-            loser = None
-        else:
-            # continues game
-            winner = False
-            loser = False
-
-        return winner, loser
+    engine_class = ShowdownEngine
 
     async def set_embed(self, ctx: Context, first: Player, second: Player):
         """Sets embed for brawl messages."""
@@ -958,7 +737,7 @@ class Showdown(GameMode):
         color = DEFAULT_COLOR
 
         # Change embed color to a slightly darker shade of default when poison effect begins.
-        if self.poison_started:
+        if self.state.poison_started:
             color = POISON_COLOR
 
         if first.can_super:
@@ -974,11 +753,10 @@ class Showdown(GameMode):
 
         embed = discord.Embed(
             color=color,
-            title=f"Brawl against {second.player.name}"
-        )
-        embed.set_author(
-            name=first.player.name, icon_url=first.player.avatar_url
+            title=f"Brawl against {self.user_of(second).name}"
         )
+        user = self.user_of(first)
+        embed.set_author(name=user.name, icon_url=user.avatar_url)
 
         embed = self.set_embed_fields(embed, first, self_super_emote, False)
 
@@ -1044,188 +822,11 @@ class Showdown(GameMode):
 
         return embed
 
-    def move_handler(
-        self, choice: int, first: Player, second: Player, round_num: int
-    ):
-        if choice == 1:
-            # attack
-            self._move_attack(first, second, round_num)
-        elif choice == 2:
-            # collect powerup
-            self._move_powerup(first, second, round_num)
-        elif choice == 3:
-            # invincibility
-            self._move_invinc(first, second)
-        elif choice == 4:
-            if first.can_super:
-                # super
-                self._move_super(first, second, round_num)
-            else:
-                # attack spawn
-                self._move_attack_spawn(first, second)
-        elif choice == 5:
-            # attack spawn
-            self._move_attack_spawn(first, second)
-
-        # spawn's attack
-        self._move_spawn_attack(first, second, round_num)
-
-    def _move_powerup(self, first: Player, second: Player, round_num: int):
-        first.last_attack = round_num
-
-        # 0.5 of collecting powerup
-        collected_powerup = random.choice([0, 1])
-        first.powerups += collected_powerup
-        if collected_powerup:
-            self.buff_health(first)
-        if second.invincibility:
-            second.invincibility = False
-
-    def buff_health(self, player: Player):
-        player.static_health += 400
-        player.health += 400
-
-    def apply_powerups(self, player: Player, value: int):
-        # 10% increase per powerup
-        for _ in range(1, player.powerups):
-            value += round(value * 0.1)
-
-        return value
-
-    def poison_effect(self, round_num: int):
-        if round_num >= self.poison_starting:
-            self.poison_started = True
-            self.first.health -= self.poison_damage
-            self.second.health -= self.poison_damage
-
 
 class BrawlBall(GameMode):
     """Class to represent Brawl Ball."""
 
-    def __init__(self, ctx, user, opponent, conf, brawlers):
-        super().__init__(ctx, user, opponent, conf, brawlers)
-
-        self.ball_holder = None
-
-    async def initialize(self, ctx):
-        first, second = await super().initialize(ctx)
-
-        self.first.brawlball()
-        self.second.brawlball()
-
-        return first, second
-
-    async def play(self, ctx):
-        """Function to run the game"""
-
-        i = 0
-        # Game ends after 75th round.
-        while i < 150:
-            if i % 2 == 0:
-                first = self.first
-                second = self.second
-            else:
-                first = self.second
-                second = self.first
-
-            if first.is_respawning:
-                try:
-                    await first.player.send("You are respawning!")
-                except AttributeError:
-                    pass
-            else:
-                self.healing(i, first)
-                if first.stunned:
-                    await self.handle_stun(first, second)
-                    i += 1
-                    continue
-
-                try:
-                    await self.send_waiting_message(
-                        ctx, first.player, second.player
-                    )
-                except discord.Forbidden:
-                    raise
-
-                if not second.is_respawning:
-                    if first.attacks >= 6:
-                        first.can_super = True
-                        end = 4
-                    else:
-                        first.can_super = False
-                        end = 3
-                else:
-                    end = 2
-
-                if second.spawn:
-                    if second.spawn > 0:
-                        end += 1
-                    else:
-                        second.spawn = None
-
-                if first.player != self.guild.me:
-                    embed = await self.set_embed(ctx, first, second)
-                    try:
-                        choice = await self.get_user_choice(
-                            ctx, embed, end, first.player, second.player
-                        )
-                    except asyncio.TimeoutError:
-                        winner, loser = second.player, first.player
-                        break
-                else:
-                    choice = random.randint(1, end)
-
-                self.move_handler(choice, first, second, i)
-
-                if second.health <= 0:
-                    self.respawning(second)
-
-                    try:
-                        await first.player.send(
-                            f"Opponent defeated! Respawning next round."
-                        )
-                    except AttributeError:
-                        pass  # bot user
-                    try:
-                        await second.player.send(
-                            f"You are defeated! Respawning next round."
-                        )
-                    except AttributeError:
-                        pass  # bot user
-
-                    # go to next loop
-                    i += 1
-                    continue
-
-            winner, loser = self.check_if_win(first, second)
-
-            if winner is False:
-                pass
-            else:
-                break
-            # go to next loop
-            i += 1
-
-        # time up
-        winner, loser = await self.time_up(winner, loser)
-
-        await self.update_stats(winner, loser)
-        await self.save_partial_log(winner, loser, "Brawl Ball")
-
-        return winner, loser
-
-    def check_if_win(self, first: Player, second: Player):
-        if first.goals == 2:
-            winner = first.player
-            loser = second.player
-        elif second.goals == 2:
-            winner = second.player
-            loser = first.player
-        else:
-            winner = False
-            loser = False
-
-        return winner, loser
+    engine_class = BrawlBallEngine
 
     def moves_str(self, first: Player, second: Player):
         if not second.is_respawning:
@@ -1285,63 +886,6 @@ class BrawlBall(GameMode):
 
         return embed
 
-    def move_handler(
-        self, choice: int, first: Player, second: Player, round_num: int
-    ):
-
-        if not second.is_respawning:
-            if choice == 1:
-                # attack
-                self._move_attack(first, second, round_num)
-            elif choice == 2:
-                # kick ball
-                self._move_kick(first, second)
-            elif choice == 3:
-                # invincibility
-                self._move_invinc(first, second)
-            elif choice == 4:
-                if first.can_super:
-                    # super
-                    self._move_super(first, second, round_num)
-                else:
-                    # attack spawn
-                    self._move_attack_spawn(first, second)
-            elif choice == 5:
-                # attack spawn
-                self._move_attack_spawn(first, second)
-
-            # spawn's attack
-            self._move_spawn_attack(first, second, round_num)
-
-        else:
-            second.is_respawning = False
-            if choice == 1:
-                # kick ball
-                self._move_kick(first, second)
-            elif choice == 2:
-                # invincibility
-                self._move_invinc(first, second)
-            elif choice == 3:
-                # attack spawn
-                self._move_attack_spawn(first, second)
-
-            # spawn's attack
-            self._move_spawn_attack(first, second, round_num)
-
-    def _move_kick(self, first: Player, second: Player):
-        if second.is_respawning:
-            # 0.50 chance of scoring a goal
-            goal = random.choice([0, 1])
-        else:
-            # 0.10 chance of scoring a goal
-            goal = random.choices([0, 1], [0.9, 0.1], k=1)[0]
-        if first.can_super and not goal:
-            # 0.40 chance of scoring
-            goal = random.choices([0, 1], [0.6, 0.4], k=1)[0]
-        first.goals += goal
-        if second.invincibility:
-            second.invincibility = False
-
 
 gamemodes_map = {
     "Gem Grab": GemGrab,
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+
+class BattleHistory:
+    """Append-only store of battle log entries, kept outside the user `Config` data.
+
+    Entries are saved in a local SQLite database and keyed by user ID and
+    timestamp. All database access happens in a single worker thread so the
+    event loop is never blocked.
+
+    Parameters
+    -------------
+    path: `Path`
+        Path of the SQLite database file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="brawlcord_history")
+        self._conn: sqlite3.Connection = None
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self):
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS battle_log ("
+            " user_id INTEGER NOT NULL,"
+            " timestamp REAL NOT NULL,"
+            " entry TEXT NOT NULL"
+            ")"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_battle_log_user"
+            " ON battle_log (user_id, timestamp)"
+        )
+        self._conn.commit()
+
+    async def initialize(self):
+        """Open the database, creating it if it doesn't exist."""
+
+        await self._run(self._connect)
+
+    def _append(self, rows: list):
+        self._conn.executemany(
+            "INSERT INTO battle_log (user_id, timestamp, entry) VALUES (?, ?, ?)", rows
+        )
+        self._conn.commit()
+
+    async def append(self, user_id: int, entry: dict):
+        """Append a log entry to a user's battle history.
+
+        Parameters
+        -------------
+        user_id: `int`
+            ID of the user the entry is saved for.
+        entry: `dict`
+            JSON representation of a `BattleLogEntry`.
+        """
+
+        await self.append_many(user_id, [entry])
+
+    async def append_many(self, user_id: int, entries: List[dict]):
+        """Append multiple log entries to a user's battle history."""
+
+        rows = [(user_id, entry["timestamp"], json.dumps(entry)) for entry in entries]
+        if rows:
+            await self._run(self._append, rows)
+
+    def _fetch(self, user_id: int, limit: int, offset: int):
+        cursor = self._conn.execute(
+            "SELECT entry FROM battle_log WHERE user_id = ?"
+            " ORDER BY timestamp DESC, rowid DESC LIMIT ? OFFSET ?",
+            (user_id, limit, offset)
+        )
+        return [json.loads(row[0]) for row in cursor.fetchall()]
+
+    async def fetch(self, user_id: int, page: int = 0, per_page: int = 10) -> List[dict]:
+        """Return a page of a user's battle history, newest entries first.
+
+        Parameters
+        -------------
+        user_id: `int`
+            ID of the user.
+        page: `int`
+            Zero-based page number.
+        per_page: `int`
+            Number of entries per page.
+        """
+
+        return await self._run(self._fetch, user_id, per_page, page * per_page)
+
+    async def fetch_all(self, user_id: int) -> List[dict]:
+        """Return the complete battle history of a user, newest entries first."""
+
+        return await self._run(self._fetch, user_id, -1, 0)
+
+    def _count(self, user_id: int):
+        cursor = self._conn.execute(
+            "SELECT COUNT(*) FROM battle_log WHERE user_id = ?", (user_id,)
+        )
+        return cursor.fetchone()[0]
+
+    async def count(self, user_id: int) -> int:
+        """Return the number of entries in a user's battle history."""
+
+        return await self._run(self._count, user_id)
+
+    def _delete_user(self, user_id: int):
+        self._conn.execute("DELETE FROM battle_log WHERE user_id = ?", (user_id,))
+        self._conn.commit()
+
+    async def delete_user(self, user_id: int):
+        """Delete all entries of a user. Only used for data deletion requests."""
+
+        await self._run(self._delete_user, user_id)
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def close(self):
+        """Close the database."""
+
+        await self._run(self._close)
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,285 @@
+import json
+from bisect import bisect_left, insort
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class LeaderboardIndex:
+    """In-memory leaderboard kept sorted by score as users' scores change.
+
+    Entries are stored as `(-score, user_id)` keys in a list of sorted chunks,
+    so the highest score comes first and ties are broken by user ID. Updating a
+    user's score, looking up their position and reading the top entries only
+    touch one chunk plus a binary search over the chunk maxima.
+
+    Each entry can carry extra data, such as the rank shown next to the score,
+    which is stored with it but not used for ordering.
+
+    Parameters
+    -------------
+    load: `int`
+        Target chunk size. Chunks are split once they grow to twice this size.
+    """
+
+    def __init__(self, load: int = 500):
+        self.load = load
+
+        self._lists: List[List[Tuple[int, int]]] = []
+        self._maxes: List[Tuple[int, int]] = []
+        self._scores: Dict[int, int] = {}
+        self._data: Dict[int, Any] = {}
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, user_id: int):
+        return user_id in self._scores
+
+    def _insert(self, key: Tuple[int, int]):
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            return
+
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._lists[pos].append(key)
+        else:
+            insort(self._lists[pos], key)
+        self._maxes[pos] = self._lists[pos][-1]
+
+        chunk = self._lists[pos]
+        if len(chunk) >= self.load * 2:
+            half = chunk[self.load:]
+            del chunk[self.load:]
+            self._maxes[pos] = chunk[-1]
+            self._lists.insert(pos + 1, half)
+            self._maxes.insert(pos + 1, half[-1])
+
+    def _remove(self, key: Tuple[int, int]):
+        pos = bisect_left(self._maxes, key)
+        chunk = self._lists[pos]
+        del chunk[bisect_left(chunk, key)]
+
+        if chunk:
+            self._maxes[pos] = chunk[-1]
+        else:
+            del self._lists[pos]
+            del self._maxes[pos]
+
+    def update(self, user_id: int, score: int, data: Any = None):
+        """Set the score and extra data of a user, adding them to the index if required."""
+
+        if data is not None:
+            self._data[user_id] = data
+        else:
+            self._data.pop(user_id, None)
+
+        old_score = self._scores.get(user_id)
+        if old_score == score:
+            return
+        if old_score is not None:
+            self._remove((-old_score, user_id))
+
+        self._scores[user_id] = score
+        self._insert((-score, user_id))
+
+    def remove(self, user_id: int):
+        """Remove a user from the index."""
+
+        self._data.pop(user_id, None)
+        score = self._scores.pop(user_id, None)
+        if score is not None:
+            self._remove((-score, user_id))
+
+    def build(self, entries: Iterable[tuple]):
+        """Replace the contents of the index.
+
+        `entries` are `(user_id, score)` or `(user_id, score, data)` tuples.
+        """
+
+        self._scores = {}
+        self._data = {}
+        for user_id, score, *data in entries:
+            self._scores[user_id] = score
+            if data and data[0] is not None:
+                self._data[user_id] = data[0]
+
+        keys = sorted((-score, user_id) for user_id, score in self._scores.items())
+
+        self._lists = [keys[i:i + self.load] for i in range(0, len(keys), self.load)]
+        self._maxes = [chunk[-1] for chunk in self._lists]
+
+    def score(self, user_id: int) -> Optional[int]:
+        """Return the score of a user or `None` if they are not indexed."""
+
+        return self._scores.get(user_id)
+
+    def data(self, user_id: int) -> Any:
+        """Return the extra data stored for a user."""
+
+        return self._data.get(user_id)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """Return the zero-based position of a user or `None` if they are not indexed."""
+
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+
+        key = (-score, user_id)
+        pos = bisect_left(self._maxes, key)
+        before = sum(len(chunk) for chunk in self._lists[:pos])
+
+        return before + bisect_left(self._lists[pos], key)
+
+    def iter_top(self) -> Iterator[Tuple[int, int]]:
+        """Iterate over `(user_id, score)` pairs from the highest score down."""
+
+        for chunk in self._lists:
+            for neg_score, user_id in chunk:
+                yield user_id, -neg_score
+
+    def top(self, count: int) -> List[Tuple[int, int]]:
+        """Return the `count` highest `(user_id, score)` pairs."""
+
+        entries = []
+        for entry in self.iter_top():
+            if len(entries) >= count:
+                break
+            entries.append(entry)
+        return entries
+
+    def to_json(self) -> list:
+        """Return the entries as a JSON serializable list."""
+
+        return [
+            [user_id, score, self._data.get(user_id)] for user_id, score in self._scores.items()
+        ]
+
+    @classmethod
+    def from_json(cls, entries: list):
+        """Return an index built from the output of `to_json`."""
+
+        index = cls()
+        index.build((int(user_id), score, data) for user_id, score, data in entries)
+        return index
+
+
+class Leaderboards:
+    """All the leaderboard indexes, kept up to date from users' brawler data.
+
+    Parameters
+    -------------
+    get_rank: `Callable[[int], int]`
+        Function returning a brawler's rank from its personal best.
+
+    Attributes
+    -------------
+    trophies: `LeaderboardIndex`
+        Total trophies of the users.
+    pb: `LeaderboardIndex`
+        Sum of the personal bests of the users' brawlers.
+    brawlers: `Dict[str, LeaderboardIndex]`
+        Trophies of each brawler, with the brawler's rank stored as extra data.
+    """
+
+    def __init__(self, get_rank: Callable[[int], int]):
+        self.get_rank = get_rank
+
+        self.trophies = LeaderboardIndex()
+        self.pb = LeaderboardIndex()
+        self.brawlers: Dict[str, LeaderboardIndex] = {}
+
+    def brawler(self, brawler: str) -> LeaderboardIndex:
+        """Return the index of a brawler, creating it if nobody owns the brawler yet."""
+
+        try:
+            return self.brawlers[brawler]
+        except KeyError:
+            index = self.brawlers[brawler] = LeaderboardIndex()
+            return index
+
+    def update_user(self, user_id: int, brawlers: dict):
+        """Update all the indexes from a user's brawler data."""
+
+        self.trophies.update(user_id, total_trophies(brawlers))
+        self.pb.update(user_id, sum(stats["pb"] for stats in brawlers.values()))
+
+        for brawler, stats in brawlers.items():
+            self.brawler(brawler).update(
+                user_id, stats["trophies"], self.get_rank(stats["pb"])
+            )
+
+    def remove_user(self, user_id: int):
+        """Remove a user from all the indexes."""
+
+        self.trophies.remove(user_id)
+        self.pb.remove(user_id)
+        for index in self.brawlers.values():
+            index.remove(user_id)
+
+    def build(self, all_users: dict):
+        """Rebuild all the indexes from the data of all users."""
+
+        trophies = []
+        pb = []
+        brawler_entries: Dict[str, list] = {}
+
+        for user_id, data in all_users.items():
+            brawlers = data["brawlers"]
+            trophies.append((user_id, total_trophies(brawlers)))
+            pb.append((user_id, sum(stats["pb"] for stats in brawlers.values())))
+            for brawler, stats in brawlers.items():
+                brawler_entries.setdefault(brawler, []).append(
+                    (user_id, stats["trophies"], self.get_rank(stats["pb"]))
+                )
+
+        self.trophies.build(trophies)
+        self.pb.build(pb)
+        self.brawlers = {}
+        for brawler, entries in brawler_entries.items():
+            self.brawler(brawler).build(entries)
+
+    def save_snapshot(self, path: Path):
+        """Write all the indexes to a JSON file."""
+
+        data = {
+            "trophies": self.trophies.to_json(),
+            "pb": self.pb.to_json(),
+            "brawlers": {
+                brawler: index.to_json() for brawler, index in self.brawlers.items()
+            },
+        }
+        with path.open("w") as f:
+            json.dump(data, f)
+
+    def load_snapshot(self, path: Path) -> bool:
+        """Rebuild all the indexes from a JSON file written by `save_snapshot`.
+
+        Returns `False` if the file doesn't exist or can't be read.
+        """
+
+        try:
+            with path.open("r") as f:
+                data = json.load(f)
+            trophies = LeaderboardIndex.from_json(data["trophies"])
+            pb = LeaderboardIndex.from_json(data["pb"])
+            brawlers = {
+                brawler: LeaderboardIndex.from_json(entries)
+                for brawler, entries in data["brawlers"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        self.trophies = trophies
+        self.pb = pb
+        self.brawlers = brawlers
+        return True
+
+
+def total_trophies(brawlers: dict) -> int:
+    """Return the sum of trophies of all brawlers in a user's brawler data."""
+
+    return sum(brawler["trophies"] for brawler in brawlers.values())
@@ -0,0 +1,82 @@
+import asyncio
+from typing import List, Optional, Sequence
+
+import discord
+from redbot.core.utils.menus import start_adding_reactions
+
+
+class LiveMessage:
+    """A message which is edited in place instead of sending a new message every time.
+
+    Edits are coalesced: at most one request is in flight at a time and, while
+    it is, only the latest requested content is kept. Intermediate contents
+    are never sent.
+
+    Parameters
+    -------------
+    channel: `discord.abc.Messageable`
+        Channel to send the message to.
+
+    Attributes
+    -------------
+    message: `Optional[discord.Message]`
+        The message, once it has been sent.
+    updates: `int`
+        Number of updates scheduled and reactions added, which is the number
+        of requests needed without coalescing.
+    requests: `int`
+        Number of requests made, including reactions.
+    reactions: `List[str]`
+        Reactions added to the message.
+    """
+
+    def __init__(self, channel: discord.abc.Messageable):
+        self.channel = channel
+        self.message: Optional[discord.Message] = None
+        self.updates = 0
+        self.requests = 0
+        self.reactions: List[str] = []
+
+        self._pending: Optional[tuple] = None
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[Exception] = None
+
+    def update(self, content: str = None, embed: discord.Embed = None):
+        """Schedule an update of the message to `content` and `embed`.
+
+        The message is sent on the first update. Errors are raised by `wait`.
+        """
+
+        self._pending = (content, embed)
+        self.updates += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._flush())
+
+    async def _flush(self):
+        while self._pending is not None and self._error is None:
+            content, embed = self._pending
+            self._pending = None
+            try:
+                if self.message is None:
+                    self.message = await self.channel.send(content=content, embed=embed)
+                else:
+                    await self.message.edit(content=content, embed=embed)
+            except Exception as exc:
+                self._error = exc
+            self.requests += 1
+
+    async def wait(self):
+        """Wait until the latest update has been applied."""
+
+        if self._task is not None:
+            await self._task
+        if self._error is not None:
+            raise self._error
+
+    def add_reactions(self, emojis: Sequence[str]):
+        """Add reactions to the message in the background. Call after `wait`."""
+
+        start_adding_reactions(self.message, emojis)
+        self.reactions.extend(emojis)
+        self.updates += len(emojis)
+        self.requests += len(emojis)
@@ -0,0 +1,116 @@
+import asyncio
+import functools
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from redbot.core.commands import Context
+
+# seconds a command holding a user's lock waits for the user to confirm an action
+CONFIRM_TIMEOUT = 60
+
+
+class _UserLock:
+    """Lock of a single user which the task holding it can acquire again."""
+
+    __slots__ = ("lock", "owner", "__weakref__")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.owner: Optional[asyncio.Task] = None
+
+
+class UserLocks:
+    """Locks serializing changes to the data of each user.
+
+    Commands which read a user's data, await something and then write the
+    data back hold the user's lock, so that concurrent commands of the same
+    user can't overwrite each other's changes. Different users never wait
+    for each other.
+
+    Locks are kept in a `weakref.WeakValueDictionary`, so a user's lock is
+    dropped as soon as no task holds or waits for it.
+
+    Attributes
+    -------------
+    acquired: `int`
+        Number of times a lock was acquired.
+    contended: `int`
+        Number of times a lock was held by another task and had to be waited for.
+    wait_time: `float`
+        Total seconds spent waiting for locks.
+    max_wait_time: `float`
+        Longest wait for a lock, in seconds.
+    """
+
+    def __init__(self):
+        self._locks: "weakref.WeakValueDictionary[int, _UserLock]" = (
+            weakref.WeakValueDictionary()
+        )
+
+        self.acquired = 0
+        self.contended = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def __len__(self):
+        return len(self._locks)
+
+    def locked(self, user_id: int) -> bool:
+        """Whether the lock of a user is held."""
+
+        user_lock = self._locks.get(user_id)
+        return user_lock is not None and user_lock.lock.locked()
+
+    @asynccontextmanager
+    async def acquire(self, user_id: int):
+        """Context manager holding the lock of a user.
+
+        The lock can be acquired again by the task holding it, so helpers
+        which lock a user can be called from locked commands.
+        """
+
+        user_lock = self._locks.get(user_id)
+        if user_lock is None:
+            user_lock = self._locks[user_id] = _UserLock()
+
+        task = asyncio.current_task()
+        if user_lock.owner is task:
+            yield
+            return
+
+        if user_lock.lock.locked():
+            self.contended += 1
+            start = time.perf_counter()
+            await user_lock.lock.acquire()
+            waited = time.perf_counter() - start
+            self.wait_time += waited
+            self.max_wait_time = max(self.max_wait_time, waited)
+        else:
+            await user_lock.lock.acquire()
+        self.acquired += 1
+
+        user_lock.owner = task
+        try:
+            yield
+        finally:
+            user_lock.owner = None
+            user_lock.lock.release()
+
+
+def locked():
+    """A decorator which runs a command while holding the lock of its author.
+
+    The cog must have a `UserLocks` instance as `user_locks`.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(cog, ctx: Context, *args, **kwargs):
+            async with cog.user_locks.acquire(ctx.author.id):
+                return await func(cog, ctx, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
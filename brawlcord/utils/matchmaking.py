@@ -0,0 +1,175 @@
+import asyncio
+from typing import Dict, Optional
+
+import discord
+
+
+class _Ticket:
+    __slots__ = ("user", "mode", "bucket", "window", "future")
+
+    def __init__(self, user: discord.abc.User, mode: str, bucket: int, future: asyncio.Future):
+        self.user = user
+        self.mode = mode
+        self.bucket = bucket
+        # number of buckets searched on each side of the player's bucket
+        self.window = 0
+        self.future = future
+
+
+class Match:
+    """Two players paired by the matchmaking queue.
+
+    Attributes
+    -------------
+    host: `discord.abc.User`
+        The player whose search found the match, who starts the brawl.
+    guest: `discord.abc.User`
+        The player who was waiting in the queue.
+    """
+
+    __slots__ = ("host", "guest")
+
+    def __init__(self, host: discord.abc.User, guest: discord.abc.User):
+        self.host = host
+        self.guest = guest
+
+
+class MatchmakingQueue:
+    """Queue pairing players of the same game mode with similar trophies.
+
+    Waiting players are indexed by game mode and trophy bucket, so a search
+    only looks at the buckets within the player's window, however many
+    players are waiting. The window widens by one bucket on each side every
+    `widen_interval` seconds, up to `max_window` buckets.
+
+    Parameters
+    -------------
+    bucket_size: `int`
+        Trophies per bucket.
+    widen_interval: `float`
+        Seconds between two widenings of a player's window.
+    max_window: `int`
+        Highest number of buckets searched on each side of a player's bucket.
+    timeout: `float`
+        Seconds a player waits for an opponent.
+
+    Attributes
+    -------------
+    matched: `int`
+        Number of matches made.
+    timeouts: `int`
+        Number of players who found no opponent in time.
+    """
+
+    def __init__(
+        self,
+        bucket_size: int = 100,
+        widen_interval: float = 5.0,
+        max_window: int = 5,
+        timeout: float = 30.0
+    ):
+        self.bucket_size = bucket_size
+        self.widen_interval = widen_interval
+        self.max_window = max_window
+        self.timeout = timeout
+
+        # waiting players by game mode, bucket and user ID, oldest first
+        self._buckets: Dict[str, Dict[int, Dict[int, _Ticket]]] = {}
+        self._tickets: Dict[int, _Ticket] = {}
+
+        self.matched = 0
+        self.timeouts = 0
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def __contains__(self, user_id: int):
+        return user_id in self._tickets
+
+    async def find(self, user: discord.abc.User, mode: str, trophies: int) -> Optional[Match]:
+        """Wait for an opponent for `user` and return the match.
+
+        Returns `None` if no opponent is found within `timeout` seconds.
+        Raises `ValueError` if the user is already waiting.
+
+        Parameters
+        -------------
+        user: `discord.abc.User`
+            The player looking for an opponent.
+        mode: `str`
+            Selected game mode of the player.
+        trophies: `int`
+            Trophies of the player's selected brawler.
+        """
+
+        if user.id in self._tickets:
+            raise ValueError(f"User {user.id} is already waiting for an opponent.")
+
+        loop = asyncio.get_event_loop()
+        ticket = _Ticket(user, mode, trophies // self.bucket_size, loop.create_future())
+
+        match = self._search(ticket)
+        if match is not None:
+            return match
+
+        self._add(ticket)
+        try:
+            deadline = loop.time() + self.timeout
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    return None
+
+                await asyncio.wait({ticket.future}, timeout=min(self.widen_interval, remaining))
+                if ticket.future.done():
+                    return ticket.future.result()
+
+                if ticket.window < self.max_window:
+                    ticket.window += 1
+                    match = self._search(ticket)
+                    if match is not None:
+                        return match
+        finally:
+            self._remove(ticket)
+
+    def _search(self, ticket: _Ticket) -> Optional[Match]:
+        """Pair `ticket` with the oldest waiting player of the closest bucket."""
+
+        buckets = self._buckets.get(ticket.mode)
+        if not buckets:
+            return None
+
+        for distance in range(ticket.window + 1):
+            for bucket in {ticket.bucket - distance, ticket.bucket + distance}:
+                waiting = buckets.get(bucket)
+                if not waiting:
+                    continue
+                for other in waiting.values():
+                    if other is ticket:
+                        continue
+                    self._remove(other)
+                    match = Match(ticket.user, other.user)
+                    other.future.set_result(match)
+                    self.matched += 1
+                    return match
+
+        return None
+
+    def _add(self, ticket: _Ticket):
+        self._tickets[ticket.user.id] = ticket
+        buckets = self._buckets.setdefault(ticket.mode, {})
+        buckets.setdefault(ticket.bucket, {})[ticket.user.id] = ticket
+
+    def _remove(self, ticket: _Ticket):
+        if self._tickets.get(ticket.user.id) is not ticket:
+            return
+        del self._tickets[ticket.user.id]
+
+        buckets = self._buckets[ticket.mode]
+        waiting = buckets[ticket.bucket]
+        del waiting[ticket.user.id]
+        if not waiting:
+            del buckets[ticket.bucket]
+            if not buckets:
+                del self._buckets[ticket.mode]
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import discord
+
+# characters allowed in the content of a message
+MAX_CONTENT_LENGTH = 2000
+# times a rate limited message is retried before giving up
+MAX_RETRIES = 5
+
+log = logging.getLogger("red.brawlcord.outbox")
+
+
+class RequestCount:
+    """Messages passed to the outbox and the requests made to send them.
+
+    Attributes
+    -------------
+    messages: `int`
+        Number of messages passed to the outbox, which is the number of
+        requests needed to send them one by one.
+    requests: `int`
+        Number of requests made to send them.
+    """
+
+    __slots__ = ("messages", "requests")
+
+    def __init__(self):
+        self.messages = 0
+        self.requests = 0
+
+    def add(self, other: "RequestCount"):
+        """Add the counts of `other` to this count."""
+
+        self.messages += other.messages
+        self.requests += other.requests
+
+
+class _Item:
+    __slots__ = ("content", "embed", "future", "count")
+
+    def __init__(
+        self,
+        content: Optional[str],
+        embed: Optional[discord.Embed],
+        future: asyncio.Future,
+        count: Optional[RequestCount]
+    ):
+        self.content = content
+        self.embed = embed
+        self.future = future
+        self.count = count
+
+
+class _Recipient:
+    __slots__ = ("user", "items", "wake", "task")
+
+    def __init__(self, user: discord.abc.User):
+        self.user = user
+        self.items: Deque[_Item] = deque()
+        # set when a message which shouldn't wait for more text is queued
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class Outbox:
+    """Queue of direct messages with one queue per recipient.
+
+    Text messages queued for a recipient within `window` seconds of each other
+    are merged and sent as a single message. A message with an embed takes the
+    text queued before it as its content and is sent without waiting, as are
+    messages queued with `immediate`.
+
+    Each recipient's queue is sent by its own task, so recipients don't wait
+    for each other while the messages of a recipient keep their order. When a
+    request is rate limited, all queues wait until the rate limit is over.
+
+    Parameters
+    -------------
+    window: `float`
+        Seconds to wait for more text before sending a text message.
+
+    Attributes
+    -------------
+    count: `RequestCount`
+        Messages queued and requests made since the outbox was created.
+    rate_limited: `int`
+        Number of requests which were rate limited.
+    failed: `int`
+        Number of messages which couldn't be sent.
+    """
+
+    def __init__(self, window: float = 0.5):
+        self.window = window
+
+        self._recipients: Dict[int, _Recipient] = {}
+        # loop time until which no requests are made after a rate limit
+        self._resume_at = 0.0
+
+        self.count = RequestCount()
+        self.rate_limited = 0
+        self.failed = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of messages which haven't been sent yet."""
+
+        return sum(len(recipient.items) for recipient in self._recipients.values())
+
+    def send(
+        self,
+        user: discord.abc.User,
+        content: str = None,
+        embed: discord.Embed = None,
+        count: RequestCount = None,
+        immediate: bool = False
+    ) -> asyncio.Future:
+        """Queue a direct message to `user`.
+
+        The returned future resolves to the sent `discord.Message`, which can
+        contain other queued text too, or raises the error of the request.
+        Callers don't have to wait for the future, errors are logged.
+
+        Parameters
+        -------------
+        user: `discord.abc.User`
+            User to send the message to.
+        content: `str`
+            Text of the message.
+        embed: `discord.Embed`
+            Embed of the message.
+        count: `RequestCount`
+            Count to add the message and the request sending it to, such as
+            the count of a match.
+        immediate: `bool`
+            Whether to send the message without waiting for more text.
+        """
+
+        future = asyncio.get_event_loop().create_future()
+
+        try:
+            recipient = self._recipients[user.id]
+        except KeyError:
+            recipient = self._recipients[user.id] = _Recipient(user)
+
+        recipient.items.append(_Item(content, embed, future, count))
+        self.count.messages += 1
+        if count is not None:
+            count.messages += 1
+
+        if embed is not None or immediate:
+            recipient.wake.set()
+        if recipient.task is None:
+            recipient.task = asyncio.ensure_future(self._run(recipient))
+
+        return future
+
+    async def _run(self, recipient: _Recipient):
+        try:
+            while recipient.items:
+                if not recipient.wake.is_set():
+                    try:
+                        await asyncio.wait_for(recipient.wake.wait(), self.window)
+                    except asyncio.TimeoutError:
+                        pass
+                recipient.wake.clear()
+
+                batch = self._next_batch(recipient.items)
+                await self._send_batch(recipient.user, batch)
+        finally:
+            del self._recipients[recipient.user.id]
+
+    @staticmethod
+    def _next_batch(items: Deque[_Item]) -> List[_Item]:
+        """Take the queued items which fit in the next message."""
+
+        batch = [items.popleft()]
+        length = len(batch[0].content or "")
+
+        while items and batch[-1].embed is None:
+            item = items[0]
+            if item.content is not None:
+                length += len(item.content) + 1
+                if length > MAX_CONTENT_LENGTH:
+                    break
+            elif item.embed is None:
+                break
+            batch.append(items.popleft())
+
+        return batch
+
+    async def _send_batch(self, user: discord.abc.User, batch: List[_Item]):
+        content = "\n".join(item.content for item in batch if item.content is not None)
+        embed = batch[-1].embed
+
+        delay = 1.0
+        for retry in range(MAX_RETRIES + 1):
+            wait = self._resume_at - asyncio.get_event_loop().time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            self._add_request(batch)
+            try:
+                message = await user.send(content=content or None, embed=embed)
+            except discord.HTTPException as exc:
+                if exc.status == 429 and retry < MAX_RETRIES:
+                    self.rate_limited += 1
+                    retry_after = exc.response.headers.get("Retry-After")
+                    self._backoff(float(retry_after) if retry_after else delay)
+                    delay = min(delay * 2, 60)
+                    continue
+                self._fail(user, batch, exc)
+            except Exception as exc:
+                self._fail(user, batch, exc)
+            else:
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_result(message)
+            return
+
+    def _add_request(self, batch: List[_Item]):
+        self.count.requests += 1
+
+        counted = set()
+        for item in batch:
+            if item.count is not None and id(item.count) not in counted:
+                counted.add(id(item.count))
+                item.count.requests += 1
+
+    def _backoff(self, seconds: float):
+        resume_at = asyncio.get_event_loop().time() + seconds
+        if resume_at > self._resume_at:
+            log.warning("Direct messages are rate limited for %.2f seconds.", seconds)
+            self._resume_at = resume_at
+
+    def _fail(self, user: discord.abc.User, batch: List[_Item], exc: Exception):
+        self.failed += len(batch)
+        log.debug("Unable to send direct message to %s.", user, exc_info=exc)
+        for item in batch:
+            if not item.future.done():
+                item.future.set_exception(exc)
+                # mark as retrieved, the caller might not wait for the message
+                item.future.exception()
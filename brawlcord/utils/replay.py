@@ -0,0 +1,117 @@
+from typing import Mapping, Optional, Tuple
+
+from .brawlers import Brawler
+from .engine import MatchState, Player, engines_map
+
+
+class Replay:
+    """Compact record of a match which can be played again with `play`.
+
+    A match only depends on its seed, the players and the moves picked by
+    them, so that is all a replay stores.
+
+    Attributes
+    -------------
+    mode: `str`
+        Name of the game mode.
+    seed: `int`
+        Seed of the match's RNG.
+    first: `Tuple[int, str, int]`
+        User ID, brawler name and brawler level of the player who moved first.
+    second: `Tuple[int, str, int]`
+        User ID, brawler name and brawler level of the other player.
+    moves: `str`
+        Moves played during the match, one digit per move.
+    forfeited: `Optional[int]`
+        `0` if the first player forfeited the match, `1` if the second did
+        and `None` if the match wasn't forfeited.
+    """
+
+    __slots__ = ("mode", "seed", "first", "second", "moves", "forfeited")
+
+    def __init__(
+        self,
+        mode: str,
+        seed: int,
+        first: Tuple[int, str, int],
+        second: Tuple[int, str, int],
+        moves: str = "",
+        forfeited: Optional[int] = None
+    ):
+        self.mode = mode
+        self.seed = seed
+        self.first = tuple(first)
+        self.second = tuple(second)
+        self.moves = moves
+        self.forfeited = forfeited
+
+    @classmethod
+    def from_state(cls, mode: str, state: MatchState):
+        """Return the replay of a match from its `MatchState`."""
+
+        def roster(player: Player):
+            return player.user_id, player.brawler_name, player.brawler_level
+
+        if state.forfeited is None:
+            forfeited = None
+        else:
+            forfeited = 0 if state.forfeited is state.first else 1
+
+        return cls(
+            mode,
+            state.seed,
+            roster(state.first),
+            roster(state.second),
+            "".join(str(move) for move in state.moves),
+            forfeited
+        )
+
+    def to_json(self) -> dict:
+        """Return a dictionary representing the `Replay` object."""
+
+        return {
+            "mode": self.mode,
+            "seed": self.seed,
+            "first": list(self.first),
+            "second": list(self.second),
+            "moves": self.moves,
+            "forfeited": self.forfeited
+        }
+
+    @classmethod
+    def from_json(cls, data: dict):
+        """Return a `Replay` object from dictionary representation of the replay."""
+
+        return cls(
+            data["mode"],
+            data["seed"],
+            data["first"],
+            data["second"],
+            data["moves"],
+            data["forfeited"]
+        )
+
+    def play(self, brawlers: Mapping[str, Brawler]) -> MatchState:
+        """Play the match again with the headless engine and return its final state.
+
+        Parameters
+        -------------
+        brawlers: `Mapping[str, Brawler]`
+            `Brawler` instances by name, such as a `BrawlerRegistry`.
+        """
+
+        engine = engines_map[self.mode]()
+
+        players = [
+            engine.new_player(user_id, brawlers[brawler], level)
+            for user_id, brawler, level in (self.first, self.second)
+        ]
+        state, _ = engine.start(engine.new_state(*players, seed=self.seed))
+
+        for move in self.moves:
+            state, _ = engine.step(state, int(move))
+
+        if self.forfeited is not None:
+            engine.forfeit(state, players[self.forfeited])
+
+        return state
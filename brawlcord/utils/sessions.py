@@ -0,0 +1,149 @@
+import asyncio
+import time
+from typing import Dict, Iterator, Optional, Sequence
+
+from .errors import SessionLimitReached
+from .gamemodes import GameMode
+
+
+class Session:
+    """A running brawl.
+
+    Attributes
+    -------------
+    user_ids: `Tuple[int, ...]`
+        IDs of the users playing the brawl, the bot excluded.
+    channel_id: `int`
+        ID of the channel the brawl was started in.
+    started: `float`
+        `time.monotonic` value when the brawl was started.
+    game: `Optional[GameMode]`
+        The brawl's game mode, once it has been created.
+    auto: `bool`
+        Whether the brawl is an auto brawl.
+    task: `Optional[asyncio.Task]`
+        The task playing the brawl, cancelled when the registry is closed.
+    """
+
+    __slots__ = ("user_ids", "channel_id", "started", "game", "auto", "task")
+
+    def __init__(self, user_ids: Sequence[int], channel_id: int, auto: bool = False):
+        self.user_ids = tuple(user_ids)
+        self.channel_id = channel_id
+        self.started = time.monotonic()
+        self.game: Optional[GameMode] = None
+        self.auto = auto
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def mode(self) -> Optional[str]:
+        """Name of the game mode."""
+
+        return self.game.engine.name if self.game is not None else None
+
+    @property
+    def age(self) -> float:
+        """Seconds since the brawl was started."""
+
+        return time.monotonic() - self.started
+
+    @property
+    def turn(self) -> int:
+        """Current turn of the match, 0 until it has started."""
+
+        if self.game is None or self.game.state is None:
+            return 0
+        return self.game.state.turn
+
+    @property
+    def moves(self) -> int:
+        """Number of moves played."""
+
+        if self.game is None or self.game.state is None:
+            return 0
+        return len(self.game.state.moves)
+
+    @property
+    def turn_latency(self) -> Optional[float]:
+        """Average seconds per move, `None` before the first move."""
+
+        if not self.moves:
+            return None
+        return self.age / self.moves
+
+
+class SessionRegistry:
+    """Running brawls by the IDs of their users.
+
+    Parameters
+    -------------
+    max_sessions: `int`
+        Highest number of brawls which can run at once.
+
+    Attributes
+    -------------
+    closed: `bool`
+        Whether no more brawls can be started, once the cog is unloaded.
+    """
+
+    def __init__(self, max_sessions: int):
+        self.max_sessions = max_sessions
+        self.closed = False
+
+        self._users: Dict[int, Session] = {}
+        # insertion ordered, oldest brawl first
+        self._sessions: Dict[Session, None] = {}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __iter__(self) -> Iterator[Session]:
+        return iter(list(self._sessions))
+
+    def __contains__(self, user_id: int):
+        return user_id in self._users
+
+    def get(self, user_id: int) -> Optional[Session]:
+        """Get the brawl a user is playing."""
+
+        return self._users.get(user_id)
+
+    def start(self, user_ids: Sequence[int], channel_id: int, auto: bool = False) -> Session:
+        """Register a brawl of `user_ids`.
+
+        Raises `SessionLimitReached` if `max_sessions` brawls are running or
+        the registry is closed, and `ValueError` if one of the users is already
+        in a brawl.
+        """
+
+        if self.closed or len(self._sessions) >= self.max_sessions:
+            raise SessionLimitReached()
+
+        for user_id in user_ids:
+            if user_id in self._users:
+                raise ValueError(f"User {user_id} is already in a brawl.")
+
+        session = Session(user_ids, channel_id, auto)
+        self._sessions[session] = None
+        for user_id in session.user_ids:
+            self._users[user_id] = session
+
+        return session
+
+    def close(self):
+        """Stop new brawls from starting and cancel the running ones."""
+
+        self.closed = True
+        for session in self:
+            if session.task is not None:
+                session.task.cancel()
+
+    def end(self, session: Session):
+        """Remove a brawl from the registry."""
+
+        if session not in self._sessions:
+            return
+
+        del self._sessions[session]
+        for user_id in session.user_ids:
+            del self._users[user_id]
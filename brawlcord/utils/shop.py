@@ -1,3 +1,4 @@
+import asyncio
 import random
 from datetime import datetime
 
@@ -9,6 +10,7 @@ from redbot.core.utils.predicates import ReactionPredicate
 
 from .box import Box
 from .emojis import emojis, brawler_emojis, sp_icons
+from .locks import CONFIRM_TIMEOUT
 
 EMBED_COLOR = 0x74FFBE
 
@@ -564,7 +566,11 @@ class Shop:
         start_adding_reactions(msg, ReactionPredicate.YES_OR_NO_EMOJIS)
 
         pred = ReactionPredicate.yes_or_no(msg, user)
-        await ctx.bot.wait_for("reaction_add", check=pred)
+        try:
+            await ctx.bot.wait_for("reaction_add", check=pred, timeout=CONFIRM_TIMEOUT)
+        except asyncio.TimeoutError:
+            await ctx.send("Purchase cancelled.")
+            return False
         if pred.result:
             # User responded with tick
             pass
@@ -610,7 +616,11 @@ class Shop:
         start_adding_reactions(msg, ReactionPredicate.YES_OR_NO_EMOJIS)
 
         pred = ReactionPredicate.yes_or_no(msg, user)
-        await ctx.bot.wait_for("reaction_add", check=pred)
+        try:
+            await ctx.bot.wait_for("reaction_add", check=pred, timeout=CONFIRM_TIMEOUT)
+        except asyncio.TimeoutError:
+            await ctx.send("Purchase cancelled.")
+            return False
         if pred.result:
             # User responded with tick
             pass
@@ -702,7 +712,11 @@ class Shop:
         start_adding_reactions(msg, ReactionPredicate.YES_OR_NO_EMOJIS)
 
         pred = ReactionPredicate.yes_or_no(msg, user)
-        await ctx.bot.wait_for("reaction_add", check=pred)
+        try:
+            await ctx.bot.wait_for("reaction_add", check=pred, timeout=CONFIRM_TIMEOUT)
+        except asyncio.TimeoutError:
+            await ctx.send("Purchase cancelled.")
+            return False
         if pred.result:
             # User responded with tick
             pass
@@ -746,7 +760,11 @@ class Shop:
         start_adding_reactions(msg, ReactionPredicate.YES_OR_NO_EMOJIS)
 
         pred = ReactionPredicate.yes_or_no(msg, user)
-        await ctx.bot.wait_for("reaction_add", check=pred)
+        try:
+            await ctx.bot.wait_for("reaction_add", check=pred, timeout=CONFIRM_TIMEOUT)
+        except asyncio.TimeoutError:
+            await ctx.send("Purchase cancelled.")
+            return False
         if pred.result:
             # User responded with tick
             pass
@@ -0,0 +1,479 @@
+"""Vectorized generation of daily shops for many users at once.
+
+Requires NumPy, which is an optional dependency. The generated shops follow
+the same rules as `Shop.generate_shop_items` and have the same `to_json`
+shape, but every roll is derived from a per (user, day) seed, so a user's
+shop doesn't depend on which other users are in the batch.
+"""
+
+import gc
+import random
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .shop import Shop
+
+# multiplier used to derive independent streams from a seed
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+# number of single rolls made per shop, before the per-brawler and per-skin rolls
+SCALAR_ROLLS = 9
+# number of users whose shops are generated at once
+BATCH_SIZE = 10_000
+
+
+def _check_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for batch shop generation.")
+
+
+def _splitmix64(x):
+    """Vectorized SplitMix64 finalizer on `uint64` arrays."""
+
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def shop_seeds(user_ids: Sequence[int], day: int):
+    """Return the seeds of the given users' shops for a day.
+
+    Parameters
+    -------------
+    user_ids: `Sequence[int]`
+        IDs of the users.
+    day: `int`
+        Day of the shop, such as the global shop epoch.
+    """
+
+    _check_numpy()
+
+    with np.errstate(over="ignore"):
+        ids = np.asarray(user_ids, dtype=np.uint64)
+        return _splitmix64(ids * np.uint64(GOLDEN_GAMMA) ^ _splitmix64(np.uint64(day)))
+
+
+def _uniforms(seeds, count: int):
+    """Return a `(len(seeds), count)` array of uniform floats in [0, 1)."""
+
+    with np.errstate(over="ignore"):
+        streams = np.arange(1, count + 1, dtype=np.uint64) * np.uint64(GOLDEN_GAMMA)
+        bits = _splitmix64(seeds[:, None] + streams[None, :])
+    return (bits >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def _nth_true(mask, nth):
+    """Return the column index of the `nth` (zero-based) true value of each row."""
+
+    return np.argmax(np.cumsum(mask, axis=1) > nth[:, None], axis=1)
+
+
+@contextmanager
+def _gc_paused():
+    """Pause the cyclic garbage collector while building many containers.
+
+    Each shop is made of several lists and dicts, which would otherwise trigger
+    full collections scanning the whole heap of the bot several times a batch.
+    """
+
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _first_sorted(keys, count: int):
+    """Return the column indexes of the `count` smallest keys of each row, in order.
+
+    Same as the first `count` columns of `argsort`, without sorting whole rows.
+    """
+
+    if count >= keys.shape[1]:
+        return np.argsort(keys, axis=1)
+
+    smallest = np.argpartition(keys, count - 1, axis=1)[:, :count]
+    order = np.argsort(np.take_along_axis(keys, smallest, axis=1), axis=1)
+    return np.take_along_axis(smallest, order, axis=1)
+
+
+class ShopBatchGenerator:
+    """Generate daily shops for a batch of users with NumPy.
+
+    Parameters
+    -------------
+    all_brawlers: `dict`
+        Data of all brawlers, as loaded from `brawlers.json`.
+    """
+
+    def __init__(self, all_brawlers: dict):
+        _check_numpy()
+
+        self.ALL_BRAWLERS = all_brawlers
+
+        shop = Shop()
+        self.max_slots = shop.max_slots
+        self.max_skins = shop.max_skins
+        self.items = shop.items
+        self.max_pp = shop.max_pp
+
+        self.brawler_names: List[str] = list(all_brawlers)
+        self.brawler_index: Dict[str, int] = {
+            name: idx for idx, name in enumerate(self.brawler_names)
+        }
+
+        skins = [
+            (self.brawler_index[brawler], skin, costs[0], costs[1])
+            for brawler in self.brawler_names
+            for skin, costs in all_brawlers[brawler]["skins"].items()
+        ]
+        self.skin_brawler = np.array([skin[0] for skin in skins], dtype=np.intp)
+        self.skin_names = [skin[1] for skin in skins]
+        self.skin_gem_cost = np.array([skin[2] for skin in skins], dtype=np.int64)
+        self.skin_sp_cost = np.array([skin[3] for skin in skins], dtype=np.int64)
+        # plain lists for building the output
+        self.skin_brawler_names = [self.brawler_names[skin[0]] for skin in skins]
+        self.skin_gem_costs = [skin[2] for skin in skins]
+        self.skin_sp_costs = [skin[3] for skin in skins]
+        self.skin_index = {
+            (self.brawler_names[skin[0]], skin[1]): idx for idx, skin in enumerate(skins)
+        }
+
+    def encode(self, brawlers_data: Sequence[dict]):
+        """Convert users' brawler data to the arrays used for generation.
+
+        Returns a tuple of `owned`, `pp_left` and `sp_available` arrays of shape
+        `(users, brawlers)`, `(users, brawlers)` and `(users, brawlers, 2)`,
+        and a `skin_owned` array of shape `(users, skins)`.
+        """
+
+        users = len(brawlers_data)
+        brawlers = len(self.brawler_names)
+
+        # Collect flat indexes and values in lists and assign them to the arrays at once.
+        cells, total_pp, sp_flags, skin_cells = [], [], [], []
+        brawler_index = self.brawler_index
+        skin_index = self.skin_index
+        skins = len(self.skin_names)
+
+        with _gc_paused():
+            for row, data in enumerate(brawlers_data):
+                offset = row * brawlers
+                skin_offset = row * skins
+                for brawler, stats in data.items():
+                    col = brawler_index.get(brawler)
+                    if col is None:
+                        continue
+                    cells.append(offset + col)
+                    total_pp.append(stats["total_powerpoints"])
+                    if stats["level"] >= 9:
+                        # bit 0 and 1 are set if the first and second star powers are available
+                        sp_flags.append((stats["sp1"] is False) | (stats["sp2"] is False) << 1)
+                    else:
+                        sp_flags.append(0)
+                    for skin in stats["skins"]:
+                        idx = skin_index.get((brawler, skin))
+                        if idx is not None:
+                            skin_cells.append(skin_offset + idx)
+
+        owned = np.zeros((users, brawlers), dtype=bool)
+        pp_left = np.zeros((users, brawlers), dtype=np.int64)
+        sp_available = np.zeros((users, brawlers, 2), dtype=bool)
+        skin_owned = np.zeros((users, skins), dtype=bool)
+
+        cells = np.array(cells, dtype=np.intp)
+        sp_flags = np.array(sp_flags, dtype=np.int64)
+        owned.ravel()[cells] = True
+        pp_left.ravel()[cells] = np.maximum(self.max_pp - np.array(total_pp, dtype=np.int64), 0)
+        sp_available.reshape(-1, 2)[cells, 0] = sp_flags & 1
+        sp_available.reshape(-1, 2)[cells, 1] = sp_flags & 2
+        skin_owned.ravel()[np.array(skin_cells, dtype=np.intp)] = True
+
+        return owned, pp_left, sp_available, skin_owned
+
+    def _pick_starpowers(self, sp_available, chosen, picks, which_rolls):
+        """Pick a random brawler and star power for the rows in `chosen`.
+
+        `sp_available` is updated in place to remove the picked star powers.
+        Returns the brawler and star power (0 or 1) columns for every row.
+        """
+
+        has_sp = sp_available.any(axis=2)
+        counts = has_sp.sum(axis=1)
+        nth = np.minimum((picks * counts).astype(np.intp), np.maximum(counts - 1, 0))
+        brawler = _nth_true(has_sp, nth)
+
+        rows = np.arange(len(chosen))
+        options = sp_available[rows, brawler]
+        both = options.all(axis=1)
+        sp = np.where(both, (which_rolls * 2).astype(np.intp), np.argmax(options, axis=1))
+
+        sp_available[rows[chosen], brawler[chosen], sp[chosen]] = False
+
+        return brawler, sp
+
+    def generate(self, brawlers_data: Sequence[dict], seeds) -> List[dict]:
+        """Generate shops for a batch of users from their brawler data.
+
+        Parameters
+        -------------
+        brawlers_data: `Sequence[dict]`
+            Brawler data of each user.
+        seeds: `numpy.ndarray`
+            Seed of each user's shop, as returned by `shop_seeds`.
+
+        Returns a list of dicts in the format of `Shop.to_json`.
+        """
+
+        return self.generate_arrays(*self.encode(brawlers_data), seeds)
+
+    def generate_arrays(self, owned, pp_left, sp_available, skin_owned, seeds) -> List[dict]:
+        """Generate shops for a batch of users from arrays returned by `encode`.
+
+        Returns a list of dicts in the format of `Shop.to_json`.
+        """
+
+        users, brawlers = owned.shape
+        skins = len(self.skin_names)
+
+        rolls = _uniforms(np.asarray(seeds, dtype=np.uint64), SCALAR_ROLLS + 2 * brawlers + skins)
+        pp_keys = rolls[:, SCALAR_ROLLS:SCALAR_ROLLS + brawlers]
+        pp_rolls = rolls[:, SCALAR_ROLLS + brawlers:SCALAR_ROLLS + 2 * brawlers]
+        skin_keys = rolls[:, SCALAR_ROLLS + 2 * brawlers:]
+
+        box_odds = self.items["brawlbox"][1] / 100
+        ticket_odds = self.items["tickets"][1] / 100
+
+        box = rolls[:, 0] < box_odds
+
+        # The star power chances use the brawl box odds, like `Shop` does.
+        sp1 = sp_available.any(axis=(1, 2)) & (rolls[:, 1] < box_odds)
+        sp1_brawler, sp1_sp = self._pick_starpowers(sp_available, sp1, rolls[:, 2], rolls[:, 3])
+
+        tickets = rolls[:, 4] < ticket_odds
+        ticket_quantity = 1 + (rolls[:, 5] * 5).astype(np.int64)
+
+        total = box.astype(np.int64) + sp1 + tickets
+
+        pp_eligible = pp_left > 0
+        pp_order = _first_sorted(np.where(pp_eligible, pp_keys, 2.0), self.max_slots)
+        pp_count = np.minimum(pp_eligible.sum(axis=1), self.max_slots - total)
+        pp_quantity = 1 + (pp_rolls * np.minimum(pp_left, 50)).astype(np.int64)
+
+        total_after_pp = total + pp_count
+
+        sp2 = (
+            (total_after_pp < self.max_slots)
+            & sp_available.any(axis=(1, 2))
+            & (rolls[:, 6] < box_odds)
+        )
+        sp2_brawler, sp2_sp = self._pick_starpowers(sp_available, sp2, rolls[:, 7], rolls[:, 8])
+
+        skin_eligible = owned[:, self.skin_brawler] & ~skin_owned
+        gem_ok = skin_eligible & (self.skin_gem_cost != -1)
+        sp_ok = skin_eligible & (self.skin_gem_cost == -1) & (self.skin_sp_cost != -1)
+        gem_order = _first_sorted(np.where(gem_ok, skin_keys, 2.0), self.max_skins[0])
+        sp_order = _first_sorted(np.where(sp_ok, skin_keys, 2.0), self.max_skins[1])
+        gem_count = np.minimum(gem_ok.sum(axis=1), self.max_skins[0])
+        sp_count = np.minimum(sp_ok.sum(axis=1), self.max_skins[1])
+
+        pp_quantity = np.take_along_axis(pp_quantity, pp_order, axis=1)
+
+        with _gc_paused():
+            # Indexing Python lists is much faster than indexing arrays element by element.
+            columns = zip(*(
+                array.tolist() for array in (
+                    box, sp1, sp1_brawler, sp1_sp, tickets, ticket_quantity,
+                    pp_order[:, :self.max_slots], pp_quantity[:, :self.max_slots], pp_count,
+                    total_after_pp, sp2, sp2_brawler, sp2_sp,
+                    gem_order[:, :self.max_skins[0]], gem_count,
+                    sp_order[:, :self.max_skins[1]], sp_count
+                )
+            ))
+
+            return self._assemble(columns)
+
+    def _assemble(self, columns) -> List[dict]:
+        """Build the `to_json` dict of each user's shop from their row of the batch.
+
+        Building the dicts takes most of the generation time, so everything
+        used per row is bound to a local name beforehand.
+        """
+
+        brawler_names = self.brawler_names
+        sp_keys = ("sp1", "sp2")
+        sp_names = [
+            (self.ALL_BRAWLERS[brawler]["sp1"]["name"], self.ALL_BRAWLERS[brawler]["sp2"]["name"])
+            for brawler in brawler_names
+        ]
+        box_cost = self.items["brawlbox"][0]
+        ticket_cost = self.items["tickets"][0]
+        pp_cost = self.items["powerpoints"][0]
+        skin_names = self.skin_names
+        skin_brawlers = self.skin_brawler_names
+        gem_costs = self.skin_gem_costs
+        sp_costs = self.skin_sp_costs
+        skin_numbers = ["S" + str(number) for number in range(1, sum(self.max_skins) + 1)]
+
+        shops = []
+        for (
+            box, sp1, sp1_brawler, sp1_sp, tickets, ticket_quantity,
+            pp_order, pp_quantity, pp_count, total_after_pp, sp2, sp2_brawler, sp2_sp,
+            gem_order, gem_count, sp_order, sp_count
+        ) in columns:
+            number = 0
+
+            if box:
+                number += 1
+                brawlbox = {"quantity": 1, "cost": box_cost, "number": number}
+            else:
+                brawlbox = {"quantity": 0, "cost": 0, "number": 0}
+
+            starpowers = []
+            if sp1:
+                number += 1
+                starpowers.append({
+                    "quantity": 1,
+                    "cost": 2000,
+                    "brawler": brawler_names[sp1_brawler],
+                    "sp": sp_keys[sp1_sp],
+                    "sp_name": sp_names[sp1_brawler][sp1_sp],
+                    "number": number
+                })
+
+            if tickets:
+                number += 1
+                ticket_item = {"quantity": ticket_quantity, "cost": ticket_cost, "number": number}
+            else:
+                ticket_item = {"quantity": 0, "cost": 0, "number": 0}
+
+            powerpoints = [
+                {
+                    "brawler": brawler_names[col],
+                    "quantity": quantity,
+                    "cost": quantity * pp_cost,
+                    "number": item_number
+                }
+                for item_number, col, quantity in zip(
+                    range(number + 1, number + pp_count + 1), pp_order, pp_quantity
+                )
+            ]
+
+            if sp2:
+                # Matches `Shop`, which numbers the second star power before counting it.
+                starpowers.append({
+                    "quantity": 1,
+                    "cost": 2000,
+                    "brawler": brawler_names[sp2_brawler],
+                    "sp": sp_keys[sp2_sp],
+                    "sp_name": sp_names[sp2_brawler][sp2_sp],
+                    "number": total_after_pp
+                })
+
+            gem_skins = [
+                {
+                    "skin": skin_names[idx],
+                    "brawler": skin_brawlers[idx],
+                    "cost": gem_costs[idx],
+                    "number": skin_numbers[pos]
+                }
+                for pos, idx in enumerate(gem_order[:gem_count])
+            ]
+            sp_skins = [
+                {
+                    "skin": skin_names[idx],
+                    "brawler": skin_brawlers[idx],
+                    "cost": sp_costs[idx],
+                    "number": skin_numbers[pos]
+                }
+                for pos, idx in enumerate(sp_order[:sp_count], gem_count)
+            ]
+
+            shops.append({"items": {
+                "brawlbox": brawlbox,
+                "starpowers": starpowers,
+                "tickets": ticket_item,
+                "powerpoints": powerpoints,
+                "gem_skins": gem_skins,
+                "sp_skins": sp_skins
+            }})
+
+        return shops
+
+
+def random_brawlers_data(all_brawlers: dict, rng: random.Random) -> dict:
+    """Return random brawler data of a user, for benchmarks."""
+
+    data = {}
+    for brawler in rng.sample(list(all_brawlers), rng.randint(1, len(all_brawlers))):
+        level = rng.randint(1, 10)
+        skins = ["Default"] + [
+            skin for skin in all_brawlers[brawler]["skins"] if rng.random() < 0.2
+        ]
+        data[brawler] = {
+            "trophies": 0,
+            "pb": 0,
+            "rank": 1,
+            "level": level,
+            "powerpoints": 0,
+            "total_powerpoints": rng.randint(0, 1410),
+            "skins": skins,
+            "selected_skin": "Default",
+            "sp1": level >= 9 and rng.random() < 0.5,
+            "sp2": level >= 9 and rng.random() < 0.5
+        }
+    return data
+
+
+def benchmark(
+    all_brawlers: dict, users: int = 100_000, batch_size: int = BATCH_SIZE, seed: int = 0
+):
+    """Time the per-user `Shop` path against `ShopBatchGenerator` for `users` users.
+
+    Returns a dict with the seconds taken by the per-user path, by encoding
+    the brawler data into arrays and by generating shops from the arrays.
+    """
+
+    _check_numpy()
+
+    rng = random.Random(seed)
+    brawlers_data = [random_brawlers_data(all_brawlers, rng) for _ in range(users)]
+
+    start = time.perf_counter()
+    for data in brawlers_data:
+        shop = Shop(all_brawlers, data)
+        try:
+            shop.generate_shop_items()
+        except UnboundLocalError:
+            # `Shop.get_skins` fails when only star point skins are available.
+            pass
+        shop.to_json()
+    per_user = time.perf_counter() - start
+
+    generator = ShopBatchGenerator(all_brawlers)
+    batches = [
+        (range(offset, min(offset + batch_size, users)),
+         brawlers_data[offset:offset + batch_size])
+        for offset in range(0, users, batch_size)
+    ]
+
+    start = time.perf_counter()
+    encoded = [generator.encode(data) for _, data in batches]
+    encode = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for (user_ids, _), arrays in zip(batches, encoded):
+        generator.generate_arrays(*arrays, shop_seeds(user_ids, 0))
+    generate = time.perf_counter() - start
+
+    return {"users": users, "per_user": per_user, "encode": encode, "generate": generate}
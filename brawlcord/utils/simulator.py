@@ -0,0 +1,470 @@
+import csv
+import math
+import multiprocessing
+import random
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .brawlers import Brawler, BrawlerRegistry
+from .engine import Engine, Player, engines_map
+from .vector_engine import VectorEngine
+
+# Brawler instances of the current worker process, created by `_init_worker`.
+_worker_brawlers: Dict[str, Brawler] = {}
+# Vectorized engines of the current worker process, created when first needed.
+_worker_vector_engines: Dict[str, VectorEngine] = {}
+
+
+class MatchupResult:
+    """Results of the matches between two brawlers in one game mode.
+
+    Wins, losses and draws are counted from the point of view of the first brawler.
+    """
+
+    __slots__ = ("matches", "wins", "losses", "draws", "timeouts", "turns")
+
+    def __init__(self, matches=0, wins=0, losses=0, draws=0, timeouts=0, turns=0):
+        self.matches = matches
+        self.wins = wins
+        self.losses = losses
+        self.draws = draws
+        # matches which reached the turn limit
+        self.timeouts = timeouts
+        # total number of turns played in all matches
+        self.turns = turns
+
+    @property
+    def win_rate(self) -> float:
+        """Win rate of the first brawler, counting draws as half a win."""
+
+        if not self.matches:
+            return 0.0
+        return (self.wins + self.draws * 0.5) / self.matches
+
+    @property
+    def avg_rounds(self) -> float:
+        """Average match length in rounds. Each round consists of two turns."""
+
+        if not self.matches:
+            return 0.0
+        return self.turns / self.matches / 2
+
+    @property
+    def timeout_rate(self) -> float:
+        if not self.matches:
+            return 0.0
+        return self.timeouts / self.matches
+
+
+class SimulationReport:
+    """Results of a balance simulation.
+
+    Attributes
+    -------------
+    brawlers: `List[str]`
+        Simulated brawlers, in matrix order.
+    results: `Dict[str, Dict[tuple, MatchupResult]]`
+        Results by game mode, keyed by `(brawler, level, opponent, opponent_level)`.
+    """
+
+    def __init__(self, brawlers: List[str]):
+        self.brawlers = brawlers
+        self.results: Dict[str, Dict[tuple, MatchupResult]] = {}
+
+    def add(self, mode: str, key: tuple, result: MatchupResult):
+        self.results.setdefault(mode, {})[key] = result
+
+    def matrix(self, mode: str, level: int, opp_level: int = None) -> List[List[float]]:
+        """Return the win rates of each brawler (rows) against each brawler (columns)."""
+
+        if opp_level is None:
+            opp_level = level
+
+        results = self.results[mode]
+        return [
+            [
+                results[(brawler, level, opponent, opp_level)].win_rate
+                for opponent in self.brawlers
+            ]
+            for brawler in self.brawlers
+        ]
+
+    def overall(self, mode: str) -> Dict[str, float]:
+        """Return the win rate of each brawler against all opponents."""
+
+        totals = {brawler: MatchupResult() for brawler in self.brawlers}
+        for (brawler, _, opponent, _), result in self.results[mode].items():
+            if brawler == opponent:
+                continue
+            total = totals[brawler]
+            total.matches += result.matches
+            total.wins += result.wins
+            total.draws += result.draws
+
+        return {brawler: total.win_rate for brawler, total in totals.items()}
+
+    def summary(self, mode: str) -> MatchupResult:
+        """Return the combined results of all matchups of a game mode."""
+
+        total = MatchupResult()
+        for result in self.results[mode].values():
+            for attr in MatchupResult.__slots__:
+                setattr(total, attr, getattr(total, attr) + getattr(result, attr))
+        return total
+
+    def to_csv(self, fp):
+        """Write the results of all matchups to a file object as CSV."""
+
+        writer = csv.writer(fp)
+        writer.writerow([
+            "mode", "brawler", "level", "opponent", "opponent_level", "matches",
+            "wins", "losses", "draws", "timeouts", "win_rate", "avg_rounds"
+        ])
+        for mode, results in self.results.items():
+            for (brawler, level, opponent, opp_level), result in results.items():
+                writer.writerow([
+                    mode, brawler, level, opponent, opp_level, result.matches,
+                    result.wins, result.losses, result.draws, result.timeouts,
+                    f"{result.win_rate:.4f}", f"{result.avg_rounds:.2f}"
+                ])
+
+
+def play_match(engine: Engine, first: Player, second: Player, rng: random.Random):
+    """Play a match between two bot players and return the final `MatchState`.
+
+    The seed of the match and the moves of the players are drawn from `rng`.
+    """
+
+    state, _ = engine.start(engine.new_state(first, second, rng.getrandbits(64)))
+    while not state.finished:
+        state, _ = engine.step(state, engine.random_move(state, rng))
+
+    return state
+
+
+def _init_worker(all_brawlers: dict):
+    _worker_brawlers.clear()
+    _worker_vector_engines.clear()
+    _worker_brawlers.update(BrawlerRegistry(all_brawlers))
+
+
+def _vector_engine(mode: str) -> VectorEngine:
+    try:
+        return _worker_vector_engines[mode]
+    except KeyError:
+        engine = _worker_vector_engines[mode] = VectorEngine(mode, _worker_brawlers)
+        return engine
+
+
+def _vector_result(matches: int, results, turns, timeouts) -> MatchupResult:
+    return MatchupResult(
+        matches=matches,
+        wins=int((results == 0).sum()),
+        losses=int((results == 1).sum()),
+        draws=int((results == -1).sum()),
+        timeouts=int(timeouts.sum()),
+        turns=int(turns.sum())
+    )
+
+
+def simulate_matchup(task: tuple) -> Tuple[str, tuple, MatchupResult]:
+    """Play all matches of a matchup in the current process.
+
+    `task` is a `(mode, (brawler, level, opponent, opponent_level), matches, seed,
+    vectorized)` tuple. Which brawler moves first is decided randomly for every
+    match, like in regular brawls.
+    """
+
+    mode, key, matches, seed, vectorized = task
+    brawler, level, opponent, opp_level = key
+
+    # The matches draw from a generator seeded per matchup.
+    # This keeps results the same regardless of the number of workers.
+    rng = random.Random(f"{seed}:{mode}:{brawler}:{level}:{opponent}:{opp_level}")
+
+    if vectorized:
+        engine = _vector_engine(mode)
+        results, turns, timeouts = engine.play(
+            np.full(matches, engine.index[brawler]), np.full(matches, level),
+            np.full(matches, engine.index[opponent]), np.full(matches, opp_level),
+            np.random.default_rng(rng.getrandbits(64))
+        )
+        return mode, key, _vector_result(matches, results, turns, timeouts)
+
+    engine = engines_map[mode]()
+    ub = _worker_brawlers[brawler]
+    ob = _worker_brawlers[opponent]
+
+    result = MatchupResult(matches=matches)
+    for _ in range(matches):
+        player = engine.new_player(0, ub, level)
+        opp = engine.new_player(1, ob, opp_level)
+        if rng.randint(1, 2) == 1:
+            state = play_match(engine, player, opp, rng)
+        else:
+            state = play_match(engine, opp, player, rng)
+
+        if state.turn >= engine.max_turns:
+            result.timeouts += 1
+            result.turns += state.turn
+        else:
+            result.turns += state.turn + 1
+
+        if state.winner is None:
+            result.draws += 1
+        elif state.winner is player:
+            result.wins += 1
+        else:
+            result.losses += 1
+
+    return mode, key, result
+
+
+def simulate(
+    all_brawlers: dict,
+    matches: int = 1000,
+    modes: Iterable[str] = None,
+    brawlers: Iterable[str] = None,
+    levels: Iterable[int] = (10,),
+    mixed_levels: bool = False,
+    seed: int = 0,
+    processes: Optional[int] = None,
+    vectorized: bool = False,
+) -> SimulationReport:
+    """Play bot matches between every pair of brawlers and collect the results.
+
+    Parameters
+    -------------
+    all_brawlers: `dict`
+        Data of all brawlers, as loaded from `brawlers.json`.
+    matches: `int`
+        Number of matches played per matchup.
+    modes: `Iterable[str]`
+        Game modes to simulate. Defaults to all game modes with an engine.
+    brawlers: `Iterable[str]`
+        Brawlers to simulate. Defaults to all brawlers.
+    levels: `Iterable[int]`
+        Brawler levels to simulate.
+    mixed_levels: `bool`
+        Whether to also play brawlers against opponents of different levels.
+        By default, brawlers only face opponents of the same level.
+    seed: `int`
+        Seed of the simulation. Runs with the same arguments and seed give the
+        same results.
+    processes: `Optional[int]`
+        Number of worker processes. Defaults to the number of CPUs.
+    vectorized: `bool`
+        Whether to play the matches of each matchup at once with `VectorEngine`.
+        Requires NumPy.
+    """
+
+    if vectorized and np is None:
+        raise RuntimeError("NumPy is required for the vectorized engine.")
+
+    modes = list(modes or engines_map)
+    brawlers = list(brawlers or all_brawlers)
+    levels = list(levels)
+
+    if mixed_levels:
+        level_pairs = [(level, opp_level) for level in levels for opp_level in levels]
+    else:
+        level_pairs = [(level, level) for level in levels]
+
+    tasks = [
+        (mode, (brawler, level, opponent, opp_level), matches, seed, vectorized)
+        for mode in modes
+        for level, opp_level in level_pairs
+        for brawler in brawlers
+        for opponent in brawlers
+    ]
+
+    report = SimulationReport(brawlers)
+    # forking the bot's process would copy its event loop, connections and threads
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(all_brawlers,)
+    ) as executor:
+        for mode, key, result in executor.map(simulate_matchup, tasks, chunksize=16):
+            report.add(mode, key, result)
+
+    return report
+
+
+def _object_play(
+    mode: str, brawlers: Dict[str, Brawler], pairs: list, level: int, rng: random.Random
+):
+    """Play a match for each `(brawler, opponent)` pair with the object engine.
+
+    Returns the same arrays as `VectorEngine.play`.
+    """
+
+    engine = engines_map[mode]()
+    results = []
+    turns = []
+    timeouts = []
+    for brawler, opponent in pairs:
+        player = engine.new_player(0, brawlers[brawler], level)
+        opp = engine.new_player(1, brawlers[opponent], level)
+        if rng.randint(1, 2) == 1:
+            state = play_match(engine, player, opp, rng)
+        else:
+            state = play_match(engine, opp, player, rng)
+
+        timeout = state.turn >= engine.max_turns
+        timeouts.append(timeout)
+        turns.append(state.turn if timeout else state.turn + 1)
+        if state.winner is None:
+            results.append(-1)
+        else:
+            results.append(0 if state.winner is player else 1)
+
+    return np.array(results), np.array(turns), np.array(timeouts)
+
+
+def _random_pairs(names: List[str], matches: int, rng: random.Random) -> list:
+    return [(rng.choice(names), rng.choice(names)) for _ in range(matches)]
+
+
+def benchmark(all_brawlers: dict, matches: int = 20_000, level: int = 10, seed: int = 0):
+    """Time the object engine against `VectorEngine` in a single process.
+
+    The object engine plays at most 5000 matches per game mode, as it is much
+    slower. Returns the matches per second of both engines by game mode.
+    """
+
+    if np is None:
+        raise RuntimeError("NumPy is required for the vectorized engine.")
+
+    brawlers = BrawlerRegistry(all_brawlers)
+    names = list(brawlers)
+    rng = random.Random(seed)
+
+    rates = {}
+    for mode in engines_map:
+        pairs = _random_pairs(names, min(matches, 5000), rng)
+        start = time.perf_counter()
+        _object_play(mode, brawlers, pairs, level, rng)
+        object_rate = len(pairs) / (time.perf_counter() - start)
+
+        engine = VectorEngine(mode, brawlers)
+        pairs = _random_pairs(names, matches, rng)
+        indexes = np.array([[engine.index[a], engine.index[b]] for a, b in pairs])
+        levels = np.full(matches, level)
+        start = time.perf_counter()
+        engine.play(
+            indexes[:, 0], levels, indexes[:, 1], levels, np.random.default_rng(seed)
+        )
+        vector_rate = matches / (time.perf_counter() - start)
+
+        rates[mode] = {"object": object_rate, "vector": vector_rate}
+
+    return rates
+
+
+def parity(all_brawlers: dict, mode: str, matches: int = 1000, level: int = 10, seed: int = 0):
+    """Compare the results of the object engine and `VectorEngine`.
+
+    Each brawler plays `matches` matches against random opponents with both
+    engines. The win rates of every brawler are compared with a two-proportion
+    z-test, counting draws as half a win.
+
+    Returns a dict with the `(object, vector)` win rate of each brawler, the
+    largest absolute z-score and the `(object, vector)` average match length in
+    rounds and timeout rate.
+    """
+
+    if np is None:
+        raise RuntimeError("NumPy is required for the vectorized engine.")
+
+    brawlers = BrawlerRegistry(all_brawlers)
+    names = list(brawlers)
+    rng = random.Random(seed)
+
+    engine = VectorEngine(mode, brawlers)
+    np_rng = np.random.default_rng(seed)
+
+    object_results = {}
+    vector_results = {}
+    for name in names:
+        pairs = [(name, rng.choice(names)) for _ in range(matches)]
+        object_results[name] = _vector_result(
+            matches, *_object_play(mode, brawlers, pairs, level, rng)
+        )
+
+        opponents = np.array([engine.index[opponent] for _, opponent in pairs])
+        levels = np.full(matches, level)
+        vector_results[name] = _vector_result(
+            matches,
+            *engine.play(np.full(matches, engine.index[name]), levels, opponents, levels, np_rng)
+        )
+
+    win_rates = {}
+    max_z = 0.0
+    for name in names:
+        first = object_results[name].win_rate
+        second = vector_results[name].win_rate
+        win_rates[name] = (first, second)
+
+        pooled = (first + second) / 2
+        error = math.sqrt(pooled * (1 - pooled) * 2 / matches)
+        if error:
+            max_z = max(max_z, abs(first - second) / error)
+
+    def combined(results: Dict[str, MatchupResult]) -> MatchupResult:
+        total = MatchupResult()
+        for result in results.values():
+            total.matches += result.matches
+            total.turns += result.turns
+            total.timeouts += result.timeouts
+        return total
+
+    object_total = combined(object_results)
+    vector_total = combined(vector_results)
+
+    return {
+        "win_rates": win_rates,
+        "max_z": max_z,
+        "avg_rounds": (object_total.avg_rounds, vector_total.avg_rounds),
+        "timeout_rate": (object_total.timeout_rate, vector_total.timeout_rate),
+    }
+
+
+def memory_benchmark(all_brawlers: dict, matches: int = 5000, seed: int = 0):
+    """Measure the memory used by `matches` concurrent matches of each game mode.
+
+    Brawlers are shared by all matches, so only the players and match states
+    are counted. Returns the total and per-match size in bytes by game mode.
+    """
+
+    brawlers = BrawlerRegistry(all_brawlers)
+    names = list(brawlers)
+    rng = random.Random(seed)
+
+    sizes = {}
+    for mode, engine_class in engines_map.items():
+        engine = engine_class()
+        pairs = _random_pairs(names, matches, rng)
+
+        tracemalloc.start()
+        try:
+            states = []
+            for user_id, (brawler, opponent) in enumerate(pairs):
+                first = engine.new_player(2 * user_id, brawlers[brawler], 10)
+                second = engine.new_player(2 * user_id + 1, brawlers[opponent], 10)
+                states.append(engine.new_state(first, second))
+            total, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        sizes[mode] = {"total": total, "per_match": total / matches}
+
+    return sizes
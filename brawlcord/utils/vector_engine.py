@@ -0,0 +1,449 @@
+"""Vectorized match engine for bulk simulation.
+
+Requires NumPy, which is an optional dependency. The engine plays many bot
+matches at once, storing each stat of every match in an array and advancing
+all running matches by one turn per step. It follows the same rules as the
+engines in `engine.py`, with bots picking random moves, but draws its random
+numbers from a NumPy generator, so single matches don't replay the same way.
+"""
+
+from typing import Dict, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .brawlers import Brawler, Healer, HealSpawner, Piper, Spawner
+from .engine import ShowdownEngine, engines_map, healing_over_time, healing_time
+
+# kinds of Super abilities
+ULT_DAMAGE = 0
+ULT_HEAL = 1
+ULT_INVISIBLE = 2
+
+# kinds of spawns
+SPAWN_NONE = 0
+SPAWN_DAMAGE = 1
+SPAWN_HEAL = 2
+
+# multipliers of `Brawler.chance_calculation`, indexed by the number it rolls
+CHANCE_MULTIPLIERS = (0, 0, 0.3, 0.3, 0.5, 0.5, 0.7, 0.7, 0.7, 1, 1)
+
+# moves a player can make
+ATTACK = 1
+MODE_MOVE = 2
+INVINCIBILITY = 3
+SUPER = 4
+ATTACK_SPAWN = 5
+DROPPED_GEMS = 6
+
+
+def _check_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for the vectorized engine.")
+
+
+def ability_stats(brawler: Brawler, level: int) -> dict:
+    """Return the values a brawler's abilities are rolled from at a level.
+
+    The values come from the brawler's precomputed stat tables, the same ones
+    `_attack`, `_ult` and `_spawn` read before applying their random rolls.
+    """
+
+    stats = brawler.buff_stats(level)
+    raw = brawler.raw_stats(level)
+
+    values = {
+        "health": stats["health"],
+        "attack": raw["attack"],
+        "attack_poison": raw.get("attack_poison", 0),
+        "attack_range": 0,
+        "ult_kind": ULT_DAMAGE,
+        "ult": raw["ult"],
+        "ult_poison": raw.get("ult_poison", 0),
+        "spawn_kind": SPAWN_NONE,
+        "spawn": raw.get("spawn", 0),
+        "spawn_health": stats.get("spawn_health", 0),
+        "stuns": brawler.name == "Frank",
+    }
+
+    if isinstance(brawler, Piper):
+        values["attack_range"] = brawler.attack["range"]
+
+    if brawler.name == "Leon":
+        values["ult_kind"] = ULT_INVISIBLE
+    elif isinstance(brawler, Healer):
+        values["ult_kind"] = ULT_HEAL
+    elif isinstance(brawler, Spawner):
+        values["spawn_kind"] = SPAWN_DAMAGE
+    elif isinstance(brawler, HealSpawner):
+        values["spawn_kind"] = SPAWN_HEAL
+
+    return values
+
+
+class VectorEngine:
+    """Plays many bot matches of one game mode at once.
+
+    Parameters
+    -------------
+    mode: `str`
+        Name of the game mode.
+    brawlers: `Dict[str, Brawler]`
+        Brawler instances by name. Brawlers are referred to by their position
+        in this dict when playing matches.
+    """
+
+    def __init__(self, mode: str, brawlers: Dict[str, Brawler]):
+        _check_numpy()
+
+        self.mode = mode
+        self.rules = engines_map[mode]()
+        self.names = list(brawlers)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        rows = [
+            [ability_stats(brawler, level) for level in range(1, 11)]
+            for brawler in brawlers.values()
+        ]
+        self.tables = {
+            key: np.array([[values[key] for values in row] for row in rows])
+            for key in rows[0][0]
+        }
+
+        self._chance = np.array(CHANCE_MULTIPLIERS)
+
+    def play(self, brawler_a, level_a, brawler_b, level_b, rng) -> Tuple:
+        """Play one match for each element of the given arrays.
+
+        Which brawler moves first is decided randomly for every match, like in
+        regular brawls.
+
+        Parameters
+        -------------
+        brawler_a, brawler_b:
+            Arrays of brawler positions.
+        level_a, level_b:
+            Arrays of brawler levels, from 1 to 10.
+        rng: `numpy.random.Generator`
+            Generator the random numbers are drawn from.
+
+        Returns
+        -------------
+        `Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]`
+            Result of each match (0 if `a` won, 1 if `b` won and -1 in case of
+            draws), the number of turns played and whether the turn limit was hit.
+        """
+
+        brawler_a = np.asarray(brawler_a)
+        brawler_b = np.asarray(brawler_b)
+        level_a = np.asarray(level_a)
+        level_b = np.asarray(level_b)
+        n = len(brawler_a)
+
+        # slot 0 moves on even turns, slot 1 on odd turns
+        swap = rng.random(n) < 0.5
+        brawler = np.stack([
+            np.where(swap, brawler_b, brawler_a), np.where(swap, brawler_a, brawler_b)
+        ])
+        level = np.stack([
+            np.where(swap, level_b, level_a), np.where(swap, level_a, level_b)
+        ]) - 1
+
+        self._stats = {key: table[brawler, level] for key, table in self.tables.items()}
+        health = self._stats["health"].astype(float)
+
+        self.state = {
+            "health": health,
+            "static_health": health.copy(),
+            "attacks": np.zeros((2, n), dtype=int),
+            "invincibility": np.zeros((2, n), dtype=bool),
+            "spawn": np.zeros((2, n)),
+            "is_respawning": np.zeros((2, n), dtype=bool),
+            "stunned": np.zeros((2, n), dtype=bool),
+            "can_super": np.zeros((2, n), dtype=bool),
+            "last_attack": np.full((2, n), -1),
+            "gems": np.zeros((2, n), dtype=int),
+            "dropped": np.zeros((2, n), dtype=int),
+            "goals": np.zeros((2, n), dtype=int),
+            "powerups": np.ones((2, n), dtype=int),
+        }
+
+        winner = np.full(n, -1)
+        turns = np.full(n, self.rules.max_turns)
+        timeouts = np.zeros(n, dtype=bool)
+
+        # positions of the running matches in the result arrays
+        ids = np.arange(n)
+        active = np.ones(n, dtype=bool)
+
+        for turn in range(self.rules.max_turns):
+            first_won, second_won, done = self._turn(turn, active, rng)
+            f = turn % 2
+            winner[ids[first_won]] = f
+            winner[ids[second_won]] = 1 - f
+            turns[ids[done]] = turn + 1
+            active &= ~done
+
+            running = np.count_nonzero(active)
+            if not running:
+                break
+            # drop finished matches from the state once enough of them have ended
+            if running < len(active) * 0.9:
+                self._compact(active)
+                ids = ids[active]
+                active = np.ones(running, dtype=bool)
+
+        timeouts[ids[active]] = True
+        self._stats = self.state = None
+
+        result = np.where(winner == -1, -1, np.where(swap, 1 - winner, winner))
+        return result, turns, timeouts
+
+    def _turn(self, turn: int, active, rng):
+        st = self.state
+        stats = self._stats
+        rules = self.rules
+        n = len(active)
+        f = turn % 2
+        s = 1 - f
+
+        health = st["health"]
+        static = st["static_health"]
+        invinc = st["invincibility"]
+        spawn = st["spawn"]
+        respawning = st["is_respawning"]
+        last_attack = st["last_attack"]
+        attacks = st["attacks"]
+
+        if rules.respawns:
+            resp = active & respawning[f]
+            mv = active & ~resp
+        else:
+            resp = np.zeros(n, dtype=bool)
+            mv = active.copy()
+
+        # healing over time
+        heal = mv & (last_attack[f] + healing_time < turn)
+        health[f] = np.where(
+            heal, np.minimum(health[f] + healing_over_time, static[f]), health[f]
+        )
+
+        stun = mv & st["stunned"][f]
+        st["stunned"][f, stun] = False
+        mv &= ~stun
+
+        # available moves
+        opp_resp = mv & respawning[s]
+        normal = mv & ~opp_resp
+        can_super = st["can_super"]
+        can_super[f] = np.where(normal, attacks[f] >= 6, can_super[f])
+        end = np.where(normal, 3 + can_super[f], 3 if self.mode == "Gem Grab" else 2)
+
+        opp_spawn = spawn[s]
+        live_spawn = mv & (opp_spawn != 0)
+        end += live_spawn & (opp_spawn > 0)
+        spawn[s] = np.where(live_spawn & (opp_spawn <= 0), 0, opp_spawn)
+
+        choice = (rng.random(n) * end).astype(int) + 1
+
+        move = np.zeros(n, dtype=int)
+        move[normal & (choice == 1)] = ATTACK
+        move[normal & (choice == 2)] = MODE_MOVE
+        move[normal & (choice == 3)] = INVINCIBILITY
+        move[normal & (choice == 4) & can_super[f]] = SUPER
+        move[normal & (((choice == 4) & ~can_super[f]) | (choice == 5))] = ATTACK_SPAWN
+        if opp_resp.any():
+            respawning[s, opp_resp] = False
+            move[opp_resp & (choice == 1)] = MODE_MOVE
+            move[opp_resp & (choice == 2)] = INVINCIBILITY
+            if self.mode == "Gem Grab":
+                move[opp_resp & (choice == 3)] = DROPPED_GEMS
+                move[opp_resp & (choice == 4)] = ATTACK_SPAWN
+            else:
+                move[opp_resp & (choice == 3)] = ATTACK_SPAWN
+
+        attacking = (move == ATTACK) | (move == ATTACK_SPAWN)
+        if attacking.any():
+            scale = np.where(
+                stats["attack_range"][f] > 0,
+                (stats["attack_range"][f] - 4 + rng.integers(0, 5, n)) * 0.1,
+                1.0
+            )
+            damage = self._powerups(f, self._roll(
+                stats["attack"][f] + stats["attack_poison"][f] * rng.integers(1, 4, n), rng
+            ) * scale)
+
+            m = move == ATTACK
+            last_attack[f, m] = turn
+            hit = m & ~invinc[s]
+            health[s] -= np.where(hit, damage, 0)
+            last_attack[s, hit] = turn
+            attacks[f] += hit
+            invinc[s, m & ~hit] = False
+
+            m = move == ATTACK_SPAWN
+            spawn[s] -= np.where(m, damage, 0)
+
+        m = move == INVINCIBILITY
+        invinc[f, m] = True
+        invinc[s, m] = False
+
+        m = move == SUPER
+        if m.any():
+            self._super(m, f, s, turn, rng)
+
+        m = move == MODE_MOVE
+        if m.any():
+            self._mode_move(m, f, s, turn, rng)
+
+        m = move == DROPPED_GEMS
+        if m.any():
+            dropped = st["dropped"]
+            collected = (rng.random(n) * (dropped[s] + 1)).astype(int)
+            st["gems"][f] += np.where(m, collected, 0)
+            dropped[s, m] = 0
+            invinc[s, m] = False
+
+        self._spawn_attack(mv, f, s, turn, rng)
+
+        if rules.respawns:
+            defeated = mv & (health[s] <= 0)
+            if self.mode == "Gem Grab":
+                gems = st["gems"]
+                dropped = st["dropped"]
+                dropped[s] = np.where(
+                    defeated, np.ceil(gems[s] * 0.5).astype(int), dropped[s]
+                )
+                gems[s] -= np.where(defeated, dropped[s], 0)
+            respawning[s, defeated] = True
+            health[s] = np.where(defeated, static[s], health[s])
+            check = resp | (mv & ~defeated)
+        else:
+            if turn >= ShowdownEngine.poison_starting:
+                health[:, mv] -= ShowdownEngine.poison_damage
+            check = mv
+
+        if self.mode == "Gem Grab":
+            first_reached = st["gems"][f] >= 10
+            second_reached = st["gems"][s] >= 10
+            first_won = first_reached & ~second_reached
+            second_won = second_reached & ~first_reached
+            draw = first_reached & second_reached
+        elif self.mode == "Brawl Ball":
+            first_won = st["goals"][f] == 2
+            second_won = ~first_won & (st["goals"][s] == 2)
+            draw = np.zeros(n, dtype=bool)
+        else:
+            first_alive = health[f] > 0
+            second_alive = health[s] > 0
+            first_won = first_alive & ~second_alive
+            second_won = second_alive & ~first_alive
+            draw = ~first_alive & ~second_alive
+
+        first_won &= check
+        second_won &= check
+        done = first_won | second_won | (draw & check)
+
+        return first_won, second_won, done
+
+    def _compact(self, keep):
+        for arrays in (self.state, self._stats):
+            for key, array in arrays.items():
+                arrays[key] = array[:, keep]
+
+    def _roll(self, raw, rng):
+        """Vectorized `Brawler.chance_calculation`."""
+
+        return raw * self._chance[rng.integers(0, 11, len(raw))]
+
+    def _powerups(self, f: int, value):
+        """Vectorized `ShowdownEngine.apply_powerups`."""
+
+        if self.mode != "Solo Showdown":
+            return value
+
+        powerups = self.state["powerups"][f]
+        for count in range(1, int(powerups.max())):
+            value = np.where(powerups > count, value + np.round(value * 0.1), value)
+        return value
+
+    def _super(self, m, f: int, s: int, turn: int, rng):
+        st = self.state
+        stats = self._stats
+        health = st["health"]
+        invinc = st["invincibility"]
+        n = len(m)
+
+        st["last_attack"][f, m] = turn
+
+        # Leon's Super only makes him invisible
+        leon = m & (stats["ult_kind"][f] == ULT_INVISIBLE)
+        invinc[f, leon] = True
+        m = m & ~leon
+
+        value = self._powerups(f, self._roll(
+            stats["ult"][f] + stats["ult_poison"][f] * rng.integers(1, 4, n), rng
+        ))
+        st["spawn"][f, m] = stats["spawn_health"][f, m]
+        st["attacks"][f, m] = 0
+
+        healer = m & (stats["ult_kind"][f] == ULT_HEAL)
+        health[f] = np.where(
+            healer, np.minimum(health[f] + value, st["static_health"][f]), health[f]
+        )
+
+        m = m & ~healer
+        health[s] -= np.where(m, np.where(invinc[s], value * 0.5, value), 0)
+        invinc[s, m] = False
+        st["last_attack"][s, m] = turn
+        st["stunned"][s, m & stats["stuns"][f]] = True
+
+    def _mode_move(self, m, f: int, s: int, turn: int, rng):
+        st = self.state
+        n = len(m)
+
+        if self.mode == "Gem Grab":
+            # 0.75 of collecting one gem
+            st["gems"][f] += m & (rng.random(n) < 0.75)
+        elif self.mode == "Brawl Ball":
+            # 0.10 chance of scoring a goal, with another 0.40 chance if Super is ready
+            goal = rng.random(n) < 0.1
+            goal |= st["can_super"][f] & (rng.random(n) < 0.4)
+            st["goals"][f] += m & goal
+        else:
+            st["last_attack"][f, m] = turn
+            # 0.5 of collecting powerup
+            collected = m & (rng.random(n) < 0.5)
+            st["powerups"][f] += collected
+            st["static_health"][f] += collected * 400
+            st["health"][f] += collected * 400
+
+        st["invincibility"][s, m] = False
+
+    def _spawn_attack(self, mv, f: int, s: int, turn: int, rng):
+        st = self.state
+        stats = self._stats
+        health = st["health"]
+        invinc = st["invincibility"]
+        n = len(mv)
+
+        # spawns have 50% chance of attacking/healing
+        m = mv & (st["spawn"][f] != 0) & (rng.random(n) < 0.5)
+        if not m.any():
+            return
+
+        value = self._powerups(f, self._roll(stats["spawn"][f], rng))
+
+        healer = m & (stats["spawn_kind"][f] == SPAWN_HEAL)
+        health[f] = np.where(
+            healer, np.minimum(health[f] + value, st["static_health"][f]), health[f]
+        )
+
+        m = m & ~healer
+        hit = m & ~invinc[s]
+        health[s] -= np.where(hit, value, 0)
+        st["last_attack"][s, hit] = turn
+        st["attacks"][f] += hit
+        invinc[s, m & ~hit] = False